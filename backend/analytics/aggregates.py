@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .models import AnalysisResult, SemanticAggregate
+from .summaries import load_summary_section
+
+logger = logging.getLogger(__name__)
+
+
+def aggregate_parts(semantic_config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Split a semantic_config into the independently cached pieces of
+    semantic_aggregates. Each part only names the config fields it depends
+    on: the target distribution needs just the target column, and each
+    metric series needs the metric plus the target (or time) column.
+    """
+    config = semantic_config or {}
+    target_col = config.get("target_column") or None
+    time_col = config.get("time_column") or None
+    metric_cols = list(dict.fromkeys(config.get("metric_columns") or []))
+
+    parts: List[Dict[str, Any]] = []
+    if target_col:
+        parts.append(
+            {
+                "kind": "target_distribution",
+                "target_column": target_col,
+                "time_column": None,
+                "metric": None,
+            }
+        )
+        for metric in metric_cols:
+            parts.append(
+                {
+                    "kind": "metrics_by_target",
+                    "target_column": target_col,
+                    "time_column": None,
+                    "metric": metric,
+                }
+            )
+    if time_col:
+        for metric in metric_cols:
+            parts.append(
+                {
+                    "kind": "metrics_over_time",
+                    "target_column": None,
+                    "time_column": time_col,
+                    "metric": metric,
+                }
+            )
+    return parts
+
+
+def aggregate_cache_key(version: int, part: Dict[str, Any]) -> str:
+    raw = json.dumps(
+        [
+            version,
+            part["kind"],
+            part["target_column"],
+            part["time_column"],
+            part["metric"],
+        ]
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def aggregate_part(row: SemanticAggregate) -> Dict[str, Any]:
+    return {
+        "kind": row.kind,
+        "target_column": row.target_column,
+        "time_column": row.time_column,
+        "metric": row.metric,
+    }
+
+
+def _part_label(part: Dict[str, Any]) -> str:
+    if part["metric"] is None:
+        return part["kind"]
+    return f"{part['kind']}.{part['metric']}"
+
+
+def sync_semantic_aggregates(analysis: AnalysisResult) -> List[str]:
+    """
+    Make sure every part of the current semantic_config has a cache row and
+    return the keys that still have to be computed (new parts and ones that
+    failed before). Rows from older analysis versions are dropped; rows for
+    parts no longer in the config are kept so switching back is free.
+    """
+    if analysis.status != "COMPLETED":
+        return []
+
+    parts = aggregate_parts(load_summary_section(analysis, "semantic_config"))
+
+    SemanticAggregate.objects.filter(dataset_id=analysis.dataset_id).exclude(
+        version=analysis.version
+    ).delete()
+
+    to_compute: List[str] = []
+    for part in parts:
+        key = aggregate_cache_key(analysis.version, part)
+        row, created = SemanticAggregate.objects.get_or_create(
+            dataset_id=analysis.dataset_id,
+            cache_key=key,
+            defaults={"version": analysis.version, **part},
+        )
+        if row.status == "FAILED":
+            row.status = "PENDING"
+            row.save(update_fields=["status", "updated_at"])
+            created = True
+        if created:
+            to_compute.append(key)
+
+    if to_compute:
+        logger.info(
+            "Scheduling %s of %s semantic aggregates for dataset %s",
+            len(to_compute),
+            len(parts),
+            analysis.dataset_id,
+        )
+    return to_compute
+
+
+def assemble_semantic_aggregates(analysis: AnalysisResult) -> Dict[str, Any]:
+    """
+    Build semantic_aggregates for the current semantic_config from cached
+    parts only; nothing is computed here. Parts still being computed are
+    listed under ``pending`` (e.g. ``"metrics_by_target.revenue"``).
+    """
+    parts = aggregate_parts(load_summary_section(analysis, "semantic_config"))
+    if not parts:
+        return {}
+
+    keys = [aggregate_cache_key(analysis.version, part) for part in parts]
+    rows = {
+        row.cache_key: row
+        for row in SemanticAggregate.objects.filter(
+            dataset_id=analysis.dataset_id, cache_key__in=keys
+        )
+    }
+
+    aggregates: Dict[str, Any] = {
+        "target_distribution": [],
+        "metrics_by_target": {},
+        "metrics_over_time": {},
+        "pending": [],
+    }
+    for part, key in zip(parts, keys):
+        row = rows.get(key)
+        if row is None or row.status == "PENDING":
+            aggregates["pending"].append(_part_label(part))
+            continue
+        if row.status != "COMPLETED" or row.payload is None:
+            continue
+        if part["kind"] == "target_distribution":
+            aggregates["target_distribution"] = row.payload
+        else:
+            aggregates[part["kind"]][part["metric"]] = row.payload
+
+    return aggregates
+
+
+def bucket_range(label: str) -> Tuple[str, pd.Timestamp, pd.Timestamp]:
+    """
+    Bucket size and [start, end) of a metrics_over_time bucket label, as
+    written by semantic_utils: "2024-03-05" (day), "2024-03-04/2024-03-10"
+    (week) or "2024-03" (month).
+    """
+    if "/" in label:
+        first, last = label.split("/", 1)
+        start = pd.Timestamp(first, tz="UTC")
+        return "W", start, pd.Timestamp(last, tz="UTC") + pd.Timedelta(days=1)
+    if len(label) == 7:
+        start = pd.Timestamp(label + "-01", tz="UTC")
+        return "M", start, start + pd.offsets.MonthBegin(1)
+    start = pd.Timestamp(label, tz="UTC")
+    return "D", start, start + pd.Timedelta(days=1)
+
+
+def _weighted(
+    base: Optional[float], base_count: int, delta: Optional[float], delta_count: int
+) -> Optional[float]:
+    if delta is None or delta_count == 0:
+        return base
+    if base is None or base_count == 0:
+        return delta
+    return (base * base_count + delta * delta_count) / (base_count + delta_count)
+
+
+def _pooled_std(base: Dict[str, Any], delta: Dict[str, Any]) -> Optional[float]:
+    # Sample std of the union from each side's count, mean and std (None
+    # when a side with values lacks them, e.g. a payload from before std).
+    count = base["count"] + delta["count"]
+    if count < 2:
+        return None
+    squares = 0.0
+    for row in (base, delta):
+        if row["count"] == 0:
+            continue
+        if row.get("mean") is None or (row["count"] > 1 and row.get("std") is None):
+            return None
+        squares += (row.get("std") or 0.0) ** 2 * (row["count"] - 1)
+    if base["count"] and delta["count"]:
+        gap = base["mean"] - delta["mean"]
+        squares += gap * gap * base["count"] * delta["count"] / count
+    return math.sqrt(squares / (count - 1))
+
+
+def _extreme(
+    pick, base: Dict[str, Any], delta: Dict[str, Any], field: str
+) -> Optional[float]:
+    values = [row.get(field) for row in (base, delta) if row["count"]]
+    if not values or any(value is None for value in values):
+        return None
+    return pick(values)
+
+
+def _merge_rows(
+    base: List[Dict[str, Any]],
+    delta: List[Dict[str, Any]],
+    key: str,
+    fields: List[str],
+    has_quantiles: bool = False,
+) -> List[Dict[str, Any]]:
+    # Rows matched on ``key``; ``fields`` are count-weighted averages, and
+    # std / min / max are combined exactly where the rows carry them. An
+    # average of two sides' quantiles only estimates the union's, so with
+    # ``has_quantiles`` such rows get "quantiles_approximate".
+    merged = {row[key]: dict(row) for row in base}
+    for row in delta:
+        current = merged.get(row[key])
+        if current is None:
+            merged[row[key]] = dict(row)
+            continue
+        if "std" in current or "std" in row:
+            current["std"] = _pooled_std(current, row)
+        for field, pick in (("min", min), ("max", max)):
+            if field in current or field in row:
+                current[field] = _extreme(pick, current, row, field)
+        for field in fields:
+            current[field] = _weighted(
+                current.get(field), current["count"], row.get(field), row["count"]
+            )
+        if has_quantiles and current["count"] and row["count"]:
+            current["quantiles_approximate"] = True
+        current["count"] += row["count"]
+    return list(merged.values())
+
+
+def merge_aggregate_payload(kind: str, base: Any, delta: Any) -> Any:
+    """
+    Combine a cached semantic aggregate with the same aggregate computed
+    over appended rows only. Counts, means, std, min and max are exact;
+    by-target medians and quartiles become count-weighted means of the two
+    sides' values, and their rows are flagged "quantiles_approximate".
+    """
+    if delta is None:
+        return base
+    if base is None:
+        return delta
+
+    if kind == "target_distribution":
+        rows = _merge_rows(base, delta, "target", [])
+        total = float(sum(row["count"] for row in rows)) or 1.0
+        for row in rows:
+            row["pct"] = row["count"] / total * 100.0
+        return sorted(rows, key=lambda row: row["count"], reverse=True)
+
+    if kind == "metrics_by_target":
+        return _merge_rows(
+            base,
+            delta,
+            "target",
+            ["mean", "median", "p25", "p75"],
+            has_quantiles=True,
+        )
+
+    rows = _merge_rows(base, delta, "bucket", ["mean"])
+    return sorted(rows, key=lambda row: row["bucket"])
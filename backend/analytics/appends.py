@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.db.models import Max
+
+from .aggregates import (
+    aggregate_cache_key,
+    aggregate_part,
+    bucket_range,
+    merge_aggregate_payload,
+    sync_semantic_aggregates,
+)
+from .ingest import (
+    batch_columns,
+    build_batch_columnar_cache,
+    build_batch_quality_index,
+    dataset_columns,
+    has_dataset_sketches,
+    iter_batch_chunks,
+    iter_dataset_chunks,
+    load_batch_frame,
+    load_dataset_sketches,
+    replace_dataset_sketches,
+    store_dataset_sketches,
+)
+from .models import AnalysisResult, Dataset, DatasetBatch, SemanticAggregate
+from .profiling import ProgressCallback, SketchProfiler
+from .semantic_utils import compute_semantic_aggregate_parts, time_bucket_freq
+from .summaries import analysis_card, load_summary, save_summary
+
+logger = logging.getLogger(__name__)
+
+
+def find_appended_batch(dataset: Dataset, content_hash: str) -> Optional[DatasetBatch]:
+    """
+    A batch with the same content already appended (or being appended) to
+    the dataset, so a retried append is not applied twice.
+    """
+    return (
+        dataset.batches.filter(content_hash=content_hash)
+        .exclude(status="FAILED")
+        .first()
+    )
+
+
+def create_batch(
+    dataset: Dataset, file: UploadedFile, content_hash: str
+) -> DatasetBatch:
+    last = dataset.batches.aggregate(last=Max("number"))["last"] or 0
+    return DatasetBatch.objects.create(
+        dataset=dataset,
+        number=last + 1,
+        original_file=file,
+        content_hash=content_hash,
+    )
+
+
+def append_effects(dataset: Dataset) -> Dict[str, Any]:
+    """
+    What merging a batch into the dataset costs and changes besides adding
+    its rows: the first append to a dataset without stored sketches reads
+    all of its current rows to sketch them, and switches it to APPROXIMATE
+    profiling.
+    """
+    if has_dataset_sketches(dataset):
+        return {"rescans_dataset": False, "profiling_mode_change": None}
+    change = None
+    if dataset.profiling_mode != "APPROXIMATE":
+        change = {"from": dataset.profiling_mode, "to": "APPROXIMATE"}
+    return {"rescans_dataset": True, "profiling_mode_change": change}
+
+
+def _base_sketches(dataset: Dataset) -> Tuple[SketchProfiler, bool]:
+    """
+    Sketches of the dataset's current rows: the stored ones, or, for a
+    dataset profiled without sketches, built once from the data (later
+    appends then reuse them). The flag tells whether they were stored.
+    """
+    data = load_dataset_sketches(dataset)
+    if data is not None:
+        return SketchProfiler.from_dict(data), True
+
+    logger.info(
+        "Dataset %s has no stored sketches; sketching its current rows once",
+        dataset.id,
+    )
+    profiler = SketchProfiler()
+    for chunk in iter_dataset_chunks(dataset):
+        profiler.update(chunk)
+    return profiler, False
+
+
+def _time_freqs(
+    rows: List[SemanticAggregate], batch_df: pd.DataFrame
+) -> Dict[str, Optional[str]]:
+    """
+    Bucket size per time column for merging metrics_over_time, or None when
+    the appended rows widen the time span enough to change it (those series
+    are then recomputed over the whole dataset). The current span is taken
+    from the bucket labels, which can only overstate it, so a kept size is
+    always the one a full recompute would pick.
+    """
+    ranges: Dict[str, list] = {}
+    for row in rows:
+        if row.kind != "metrics_over_time":
+            continue
+        labels = [item["bucket"] for item in row.payload or []]
+        span = ranges.setdefault(row.time_column, [None, None, None])
+        for label in labels[:1] + labels[-1:]:
+            freq, start, end = bucket_range(label)
+            span[0] = freq
+            span[1] = start if span[1] is None else min(span[1], start)
+            span[2] = end if span[2] is None else max(span[2], end)
+
+    freqs: Dict[str, Optional[str]] = {}
+    for column, (freq, start, end) in ranges.items():
+        if freq is None or column not in batch_df.columns:
+            freqs[column] = None
+            continue
+        times = pd.to_datetime(batch_df[column], errors="coerce", utc=True).dropna()
+        if not times.empty:
+            start, end = min(start, times.min()), max(end, times.max())
+        freqs[column] = freq if time_bucket_freq((end - start).days) == freq else None
+    return freqs
+
+
+def _merged_semantic_aggregates(
+    analysis: AnalysisResult, batch: DatasetBatch, version: int
+) -> List[SemanticAggregate]:
+    """
+    The completed semantic aggregates of the current version, each merged
+    with the same aggregate over the batch's rows, as rows for ``version``.
+    Aggregates that cannot be merged are left out; apply_batch has them
+    recomputed over the whole dataset.
+    """
+    rows = list(
+        SemanticAggregate.objects.filter(
+            dataset_id=analysis.dataset_id,
+            version=analysis.version,
+            status="COMPLETED",
+        )
+    )
+    if not rows:
+        return []
+
+    available = set(dataset_columns(batch.dataset))
+    columns: List[str] = []
+    for row in rows:
+        for name in (row.target_column, row.time_column, row.metric):
+            if name in available and name not in columns:
+                columns.append(name)
+    batch_df = load_batch_frame(batch, columns)
+
+    freqs = _time_freqs(rows, batch_df)
+    rows = [
+        row
+        for row in rows
+        if row.kind != "metrics_over_time" or freqs.get(row.time_column)
+    ]
+    parts = [aggregate_part(row) for row in rows]
+    deltas = compute_semantic_aggregate_parts(batch_df, parts, time_freqs=freqs)
+
+    return [
+        SemanticAggregate(
+            dataset_id=analysis.dataset_id,
+            cache_key=aggregate_cache_key(version, part),
+            version=version,
+            status="COMPLETED",
+            payload=merge_aggregate_payload(row.kind, row.payload, delta),
+            **part,
+        )
+        for row, part, delta in zip(rows, parts, deltas)
+    ]
+
+
+def _merged_quality_issues(
+    current: Optional[Dict[str, Dict[str, int]]],
+    added: Dict[str, Dict[str, int]],
+) -> Dict[str, Dict[str, int]]:
+    merged = {column: dict(counts) for column, counts in (current or {}).items()}
+    for column, counts in added.items():
+        column_counts = merged.setdefault(column, {})
+        for kind, count in counts.items():
+            column_counts[kind] = column_counts.get(kind, 0) + count
+    return merged
+
+
+def apply_batch(
+    batch: DatasetBatch, progress: Optional[ProgressCallback] = None
+) -> List[str]:
+    """
+    Profile only the batch's rows and merge them into the dataset's
+    analysis: column statistics through the mergeable sketches (counts,
+    moments, min / max, quantiles, distinct counts, top values), quality
+    issue counts, and the cached semantic aggregates (distributions and
+    time buckets). Cost follows the batch size, not the dataset's, except
+    for the first append to a dataset profiled without sketches, which
+    sketches its rows once and switches it to APPROXIMATE profiling.
+
+    Returns the cache keys of the semantic aggregates that could not be
+    merged (time series whose bucket size changed, parts not computed
+    yet); the caller has them computed over the whole dataset.
+
+    Raises ValueError when the batch's columns differ from the dataset's.
+    """
+    dataset = batch.dataset
+    analysis = dataset.analysis
+    columns = dataset_columns(dataset)
+
+    build_batch_columnar_cache(batch)
+    received = batch_columns(batch)
+    if set(received) != set(columns):
+        missing = [name for name in columns if name not in received]
+        unexpected = [name for name in received if name not in columns]
+        raise ValueError(
+            "Appended rows must have the dataset's columns "
+            f"(missing: {missing}, unexpected: {unexpected})."
+        )
+
+    sketches, stored = _base_sketches(dataset)
+    delta = SketchProfiler(
+        top_capacity=sketches.top_capacity,
+        sketch_k=sketches.sketch_k,
+        hll_precision=sketches.hll_precision,
+    )
+    for chunk in iter_batch_chunks(batch, columns):
+        delta.update(chunk)
+        if progress is not None:
+            progress({"type": "chunk", "pass": 1, "rows": delta.row_count})
+
+    batch.row_offset = sketches.row_count
+    batch.row_count = delta.row_count
+    batch.save(update_fields=["row_offset", "row_count", "updated_at"])
+
+    sketches.merge(delta)
+    result = sketches.result()
+
+    summary = load_summary(analysis) or {}
+    summary.update(result)
+    quality = build_batch_quality_index(batch, result["columns"])
+    if quality is not None:
+        summary["quality_issues"] = _merged_quality_issues(
+            summary.get("quality_issues"), quality.issue_counts()
+        )
+
+    version = analysis.version + 1
+    aggregates = _merged_semantic_aggregates(analysis, batch, version)
+
+    # The merged sketches are written before the analysis is marked
+    # COMPLETED and swapped in with it, so the next append (which may start
+    # right after the commit) always loads the sketches of these rows. If
+    # they cannot be written the batch fails and the old ones stay valid.
+    sketches_name = store_dataset_sketches(dataset, sketches.to_dict())
+    try:
+        with transaction.atomic():
+            replace_dataset_sketches(dataset, sketches_name)
+            if not stored and dataset.profiling_mode != "APPROXIMATE":
+                # The statistics now come from sketches, with error bounds
+                # instead of exact values; the mode says so from now on, and
+                # re-analyses store sketches for the next append.
+                dataset.profiling_mode = "APPROXIMATE"
+                dataset.save(update_fields=["profiling_mode"])
+            save_summary(analysis, summary)
+            analysis.card = analysis_card(summary)
+            analysis.status = "COMPLETED"
+            analysis.error_message = None
+            analysis.version = version
+            analysis.save()
+            SemanticAggregate.objects.bulk_create(aggregates)
+            batch.status = "COMPLETED"
+            batch.error_message = None
+            batch.save(update_fields=["status", "error_message", "updated_at"])
+    except Exception:
+        dataset.original_file.storage.delete(sketches_name)
+        raise
+
+    logger.info(
+        "Appended batch %s (%s rows) to dataset %s; %s rows in total",
+        batch.number,
+        batch.row_count,
+        dataset.id,
+        sketches.row_count,
+    )
+    return sync_semantic_aggregates(analysis)
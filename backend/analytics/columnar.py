@@ -0,0 +1,499 @@
+from __future__ import annotations
+
+import json
+import logging
+import re
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from .compaction import compact_table
+from .csvplan import CsvPlan, convert_options, schema_types
+from .formats import (
+    NDJSON,
+    PARQUET,
+    InputFormat,
+    detect_format,
+    estimated_data_size,
+    iter_frames,
+    open_input,
+    plan_csv,
+)
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_SUFFIX = ".parquet"
+CSV_BLOCK_SIZE = 16 * 1024 * 1024
+# CSVs up to this (decoded) size are parsed whole by Arrow's multi-threaded
+# reader; larger ones stream block by block on one thread.
+CSV_READ_ALL_BYTES = 256 * 1024 * 1024
+DEFAULT_BATCH_ROWS = 100_000
+# Small enough that any page of rows is served from one or two row groups.
+ROW_GROUP_ROWS = 65_536
+
+# When a later block does not fit the type inferred from the first block,
+# the column is widened one step and the conversion restarted.
+_WIDER_TYPE = {
+    pa.int64(): pa.float64(),
+    pa.bool_(): pa.string(),
+    pa.float64(): pa.string(),
+}
+
+_CONVERSION_ERROR = re.compile(r"In CSV column #(\d+)")
+
+
+def _pandas_compatible_type(arrow_type: pa.DataType) -> Optional[pa.DataType]:
+    """
+    Type to force for a column so the cache reads back like ``read_csv``:
+    pandas leaves dates as strings and types all-null columns as float64.
+    """
+    if (
+        pa.types.is_timestamp(arrow_type)
+        or pa.types.is_date(arrow_type)
+        or pa.types.is_time(arrow_type)
+    ):
+        return pa.string()
+    if pa.types.is_null(arrow_type):
+        return pa.float64()
+    return None
+
+
+@contextmanager
+def _open_csv(
+    source_path: str,
+    compression: Optional[str],
+    column_types: Dict[str, pa.DataType],
+    plan: CsvPlan,
+) -> Iterator[pa_csv.CSVStreamingReader]:
+    # Closes the reader and its (decompressing) input stream on exit.
+    with open_input(source_path, compression) as stream:
+        reader = pa_csv.open_csv(
+            stream,
+            read_options=plan.read_options(CSV_BLOCK_SIZE),
+            parse_options=plan.parse_options(),
+            convert_options=convert_options(plan, column_types),
+        )
+        try:
+            yield reader
+        finally:
+            reader.close()
+
+
+def _read_csv(
+    source_path: str,
+    compression: Optional[str],
+    column_types: Dict[str, pa.DataType],
+    plan: CsvPlan,
+) -> pa.Table:
+    with open_input(source_path, compression) as stream:
+        return pa_csv.read_csv(
+            stream,
+            read_options=plan.read_options(CSV_BLOCK_SIZE),
+            parse_options=plan.parse_options(),
+            convert_options=convert_options(plan, column_types),
+        )
+
+
+def _write_batches(
+    dest_path: str, schema: pa.Schema, batches: Iterable[pa.RecordBatch]
+) -> int:
+    rows = 0
+    with pq.ParquetWriter(dest_path, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch, row_group_size=ROW_GROUP_ROWS)
+            rows += batch.num_rows
+    return rows
+
+
+def _write_csv_cache(
+    source_path: str,
+    compression: Optional[str],
+    dest_path: str,
+    plan: CsvPlan,
+    read_all: bool = False,
+) -> int:
+    """
+    Parsed with the plan's dialect, starting from its column types. Other
+    types are inferred the way pandas would see them: temporal columns
+    stay strings (type inference decides about datetimes later), all-null
+    columns become float64, and a column whose later values do not fit
+    its type is widened int -> float -> string before the conversion is
+    retried. With ``read_all`` the file is parsed in one multi-threaded
+    read instead of streamed.
+    """
+    column_types = plan.arrow_column_types()
+
+    for _ in range(64):
+        schema: Optional[pa.Schema] = None
+        try:
+            # The streaming reader infers types from the first block only,
+            # like the whole-file reader, so its schema serves both.
+            with _open_csv(source_path, compression, column_types, plan) as reader:
+                schema = reader.schema
+                overrides = {
+                    field.name: _pandas_compatible_type(field.type)
+                    for field in schema
+                    if field.name not in column_types
+                    and _pandas_compatible_type(field.type) is not None
+                }
+                if overrides:
+                    column_types.update(overrides)
+                    continue
+                if not read_all:
+                    return _write_batches(dest_path, schema, reader)
+
+            # Only the first block was parsed above; the reader is closed
+            # before the whole file is read.
+            table = _read_csv(source_path, compression, column_types, plan)
+            return _write_batches(dest_path, table.schema, table.to_batches())
+        except pa.ArrowInvalid as exc:
+            match = _CONVERSION_ERROR.search(str(exc))
+            if not match:
+                raise
+            if schema is None:
+                # The first block already breaks a planned type.
+                with _open_csv(source_path, compression, {}, plan) as reader:
+                    schema = reader.schema
+            field = schema.field(int(match.group(1)))
+            current = column_types.get(field.name, field.type)
+            wider = _WIDER_TYPE.get(current, pa.string())
+            if current == wider:
+                raise
+            logger.debug(
+                "Widening column '%s' from %s to %s for columnar cache",
+                field.name,
+                current,
+                wider,
+            )
+            column_types[field.name] = wider
+
+    raise ValueError(f"Could not settle column types for {source_path}")
+
+
+class _ColumnConflict(Exception):
+    """
+    A later NDJSON chunk does not fit the schema written so far.
+    """
+
+    def __init__(self, column: str, current: Optional[pa.DataType]) -> None:
+        super().__init__(column)
+        self.column = column
+        self.current = current
+
+
+class _NewColumns(Exception):
+    def __init__(self, columns: List[str]) -> None:
+        super().__init__(columns)
+        self.columns = columns
+
+
+def _frame_column_to_arrow(
+    series: pd.Series, name: str, target: Optional[pa.DataType]
+) -> pa.Array:
+    if target == pa.string():
+        series = series.astype(object).where(series.isna(), series.astype(str))
+    try:
+        array = pa.array(series, type=target, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        raise _ColumnConflict(name, target) from None
+    compatible = _pandas_compatible_type(array.type)
+    if target is None and compatible is not None:
+        array = array.cast(compatible)
+    return array
+
+
+def _write_frames(
+    frames: Iterator[pd.DataFrame],
+    dest_path: str,
+    column_types: Dict[str, pa.DataType],
+    columns: Optional[List[str]],
+) -> int:
+    writer: Optional[pq.ParquetWriter] = None
+    types = dict(column_types)
+    rows = 0
+    try:
+        for df in frames:
+            if columns is None:
+                columns = [str(name) for name in df.columns]
+            df.columns = [str(name) for name in df.columns]
+            extra = [name for name in df.columns if name not in columns]
+            if extra:
+                raise _NewColumns(columns + extra)
+            df = df.reindex(columns=columns)
+
+            arrays = [
+                _frame_column_to_arrow(df[name], name, types.get(name))
+                for name in columns
+            ]
+            table = pa.Table.from_arrays(arrays, names=columns)
+            if writer is None:
+                types.update({field.name: field.type for field in table.schema})
+                writer = pq.ParquetWriter(dest_path, table.schema)
+            writer.write_table(table, row_group_size=ROW_GROUP_ROWS)
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pq.write_table(
+            pa.table({name: pa.array([], pa.float64()) for name in columns or []}),
+            dest_path,
+        )
+    return rows
+
+
+def _write_ndjson_cache(
+    source_path: str, input_format: InputFormat, dest_path: str
+) -> int:
+    """
+    NDJSON is parsed in chunks by pandas (Arrow's JSON reader rejects a key
+    that is a number on one line and a string on another). Column types
+    come from the first chunk and are widened int -> float -> string, with
+    the conversion restarted, when a later chunk does not fit; keys first
+    seen in a later chunk restart it with the extra column.
+    """
+    column_types: Dict[str, pa.DataType] = {}
+    columns: Optional[List[str]] = None
+
+    for _ in range(64):
+        frames = iter_frames(
+            source_path, chunk_rows=DEFAULT_BATCH_ROWS, input_format=input_format
+        )
+        try:
+            return _write_frames(frames, dest_path, column_types, columns)
+        except _NewColumns as exc:
+            logger.debug("Restarting NDJSON conversion with columns %s", exc.columns)
+            columns = exc.columns
+        except _ColumnConflict as exc:
+            wider = _WIDER_TYPE.get(exc.current, pa.string())
+            if exc.current == wider:
+                raise ValueError(
+                    f"Could not convert NDJSON key '{exc.column}' to {wider}"
+                ) from None
+            logger.debug(
+                "Widening column '%s' from %s to %s for columnar cache",
+                exc.column,
+                exc.current,
+                wider,
+            )
+            column_types[exc.column] = wider
+
+    raise ValueError(f"Could not settle column types for {source_path}")
+
+
+def _flatten_for_pandas(batch: pa.RecordBatch) -> pa.RecordBatch:
+    """
+    Bring a Parquet batch in line with CSV-derived caches: temporal columns
+    as strings, all-null as float64, dictionaries decoded, decimals as
+    float64 and nested values as JSON text.
+    """
+    arrays = []
+    for field, column in zip(batch.schema, batch.columns):
+        arrow_type = field.type
+        if pa.types.is_dictionary(arrow_type):
+            column = column.dictionary_decode()
+            arrow_type = column.type
+        if pa.types.is_decimal(arrow_type):
+            column = column.cast(pa.float64())
+        elif pa.types.is_nested(arrow_type):
+            column = pa.array(
+                [
+                    None if value is None else json.dumps(value, default=str)
+                    for value in column.to_pylist()
+                ],
+                type=pa.string(),
+            )
+        else:
+            compatible = _pandas_compatible_type(arrow_type)
+            if compatible is not None:
+                column = column.cast(compatible)
+        arrays.append(column)
+    return pa.RecordBatch.from_arrays(arrays, names=batch.schema.names)
+
+
+def _write_parquet_cache(source_path: str, dest_path: str) -> int:
+    """
+    Rewrite an uploaded Parquet file with small row groups (for paging) and
+    CSV-compatible column types.
+    """
+    parquet_file = pq.ParquetFile(source_path)
+    writer: Optional[pq.ParquetWriter] = None
+    rows = 0
+    try:
+        for batch in parquet_file.iter_batches(batch_size=ROW_GROUP_ROWS):
+            batch = _flatten_for_pandas(batch)
+            if writer is None:
+                writer = pq.ParquetWriter(dest_path, batch.schema)
+            writer.write_batch(batch, row_group_size=ROW_GROUP_ROWS)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pq.write_table(parquet_file.schema_arrow.empty_table(), dest_path)
+    return rows
+
+
+def write_columnar_cache(
+    source_path: str, dest_path: str, plan: Optional[CsvPlan] = None
+) -> int:
+    """
+    Convert an upload (CSV, NDJSON or Parquet, optionally gzip / zstd
+    compressed) to Parquet block by block and return the row count.
+    Compressed input is decompressed as it is read. CSV is parsed with
+    ``plan`` (see formats.plan_csv), planned here when not given.
+    """
+    input_format = detect_format(source_path)
+    logger.debug(
+        "Converting %s (%s, compression=%s) to Parquet",
+        source_path,
+        input_format.format,
+        input_format.compression,
+    )
+    if input_format.format == PARQUET:
+        return _write_parquet_cache(source_path, dest_path)
+    if input_format.format == NDJSON:
+        return _write_ndjson_cache(source_path, input_format, dest_path)
+    plan = plan or plan_csv(source_path, input_format)
+    read_all = (
+        not plan.newlines_in_values
+        and estimated_data_size(source_path, input_format) <= CSV_READ_ALL_BYTES
+    )
+    return _write_csv_cache(
+        source_path, input_format.compression, dest_path, plan, read_all
+    )
+
+
+def _to_pandas(table: pa.Table, deduplicate: bool = True) -> pd.DataFrame:
+    df = table.to_pandas(deduplicate_objects=deduplicate)
+    # Arrow hands missing strings back as None; pandas.read_csv uses NaN,
+    # which is what downstream ``astype(str)`` counting expects.
+    for col in df.columns[df.dtypes == object]:
+        series = df[col]
+        if series.isna().any():
+            df[col] = series.where(series.notna(), np.nan)
+    return df
+
+
+def read_columnar(
+    path: str, columns: Optional[List[str]] = None, compact: bool = False
+) -> pd.DataFrame:
+    """
+    Load the cache (or ``columns`` of it). ``compact`` narrows the column
+    types (see compaction.compact_table) and converts one column at a
+    time, so only one is ever held both as Arrow and as pandas. Strings
+    still plain after compaction are mostly distinct, where Arrow's
+    de-duplication of equal values costs far more than it saves.
+    """
+    if not compact:
+        return _to_pandas(pq.read_table(path, columns=columns))
+    parquet_file = pq.ParquetFile(path)
+    names = parquet_file.schema_arrow.names if columns is None else columns
+    if not names:
+        return _to_pandas(parquet_file.read(columns=[]))
+    frames = [
+        _to_pandas(compact_table(parquet_file.read(columns=[name])), deduplicate=False)
+        for name in names
+    ]
+    return pd.concat(frames, axis=1, copy=False)
+
+
+def iter_columnar(
+    path: str,
+    columns: Optional[List[str]] = None,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+) -> Iterator[pd.DataFrame]:
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_rows, columns=columns):
+        yield _to_pandas(pa.Table.from_batches([batch]))
+
+
+def columnar_columns(path: str) -> List[str]:
+    return list(pq.read_schema(path).names)
+
+
+def columnar_plan_types(path: str) -> Dict[str, str]:
+    return schema_types(pq.read_schema(path))
+
+
+def columnar_row_count(path: str) -> int:
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+def read_columnar_rows(
+    path: str,
+    offset: int,
+    limit: int,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Read rows ``offset .. offset + limit`` by locating them in the row-group
+    index of the Parquet footer and reading only the row groups they span,
+    so the cost does not depend on how deep the page is.
+    """
+    parquet_file = pq.ParquetFile(path)
+    metadata = parquet_file.metadata
+
+    groups: List[int] = []
+    first_group_start = 0
+    start = 0
+    end = offset + limit
+    for index in range(metadata.num_row_groups):
+        group_rows = metadata.row_group(index).num_rows
+        if start + group_rows > offset and start < end:
+            if not groups:
+                first_group_start = start
+            groups.append(index)
+        start += group_rows
+        if start >= end:
+            break
+
+    if not groups:
+        return _to_pandas(
+            parquet_file.schema_arrow.empty_table().select(
+                columns or parquet_file.schema_arrow.names
+            )
+        )
+
+    table = parquet_file.read_row_groups(groups, columns=columns)
+    return _to_pandas(table.slice(offset - first_group_start, limit))
+
+
+def take_columnar_rows(
+    path: str,
+    row_ids: np.ndarray,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Fetch specific rows (in the order given) by reading only the row groups
+    that contain them.
+    """
+    parquet_file = pq.ParquetFile(path)
+    metadata = parquet_file.metadata
+    row_ids = np.asarray(row_ids, dtype="int64")
+
+    group_starts = np.cumsum(
+        [0] + [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+    )
+    groups = np.unique(np.searchsorted(group_starts, row_ids, side="right") - 1)
+    groups = groups[(groups >= 0) & (groups < metadata.num_row_groups)]
+    if groups.size == 0:
+        return _to_pandas(
+            parquet_file.schema_arrow.empty_table().select(
+                columns or parquet_file.schema_arrow.names
+            )
+        )
+
+    table = parquet_file.read_row_groups(groups.tolist(), columns=columns)
+    # Position of each wanted row inside the concatenation of the groups read.
+    sizes = group_starts[groups + 1] - group_starts[groups]
+    read_starts = np.cumsum(sizes) - sizes
+    group_of_row = np.searchsorted(group_starts, row_ids, side="right") - 1
+    local = row_ids - group_starts[group_of_row]
+    indices = read_starts[np.searchsorted(groups, group_of_row)] + local
+    return _to_pandas(table.take(pa.array(indices)))
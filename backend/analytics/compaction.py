@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pandas.api.types import infer_dtype, is_bool_dtype, is_integer_dtype
+
+logger = logging.getLogger(__name__)
+
+# Text columns with at most this many distinct values per non-null value
+# are held as pandas Categoricals (codes plus one copy of each string);
+# above it the codes save too little to pay for building them.
+CATEGORICAL_MAX_RATIO = 0.5
+
+_INT_TYPES = (pa.int8(), pa.int16(), pa.int32())
+# Every integer of at most this magnitude is exact in float32.
+_FLOAT32_EXACT_INT = 2**24
+
+
+def _smallest_int_type(low: int, high: int) -> Optional[pa.DataType]:
+    for arrow_type in _INT_TYPES:
+        info = np.iinfo(arrow_type.to_pandas_dtype())
+        if info.min <= low and high <= info.max:
+            return arrow_type
+    return None
+
+
+def _compact_integers(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    bounds = pc.min_max(column)
+    low, high = bounds["min"].as_py(), bounds["max"].as_py()
+    if low is None:
+        return column
+    if column.null_count:
+        # pandas holds integers with gaps as floats.
+        if -_FLOAT32_EXACT_INT <= low and high <= _FLOAT32_EXACT_INT:
+            return column.cast(pa.float32())
+        return column
+    target = _smallest_int_type(low, high)
+    return column if target is None else column.cast(target)
+
+
+def _compact_floats(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    narrow = column.cast(pa.float32(), safe=False)
+    # Out-of-range values become inf and NaN never equals itself, so both
+    # fail the round trip unless handled.
+    exact = pc.or_kleene(pc.equal(narrow.cast(pa.float64()), column), pc.is_nan(column))
+    if pc.all(exact).as_py() is False:
+        return column
+    return narrow
+
+
+def _compact_strings(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    non_null = len(column) - column.null_count
+    if not non_null:
+        return column
+    if pc.count_distinct(column).as_py() > CATEGORICAL_MAX_RATIO * non_null:
+        return column
+    return column.dictionary_encode()
+
+
+def compact_table(table: pa.Table) -> pa.Table:
+    """
+    Narrow a table before it becomes a DataFrame: integers to the smallest
+    type holding their range (float32 when they have gaps and fit it
+    exactly), float64 to float32 when every value survives the round
+    trip, and low-cardinality strings to dictionaries, which pandas turns
+    into Categoricals without building a Python string per row. Values
+    are unchanged; profiling widens numbers back to float64 per block.
+    """
+    for position, field in enumerate(table.schema):
+        column = table.column(position)
+        if pa.types.is_integer(field.type):
+            compacted = _compact_integers(column)
+        elif pa.types.is_float64(field.type):
+            compacted = _compact_floats(column)
+        elif pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+            compacted = _compact_strings(column)
+        else:
+            continue
+        if compacted is not column:
+            table = table.set_column(position, field.name, compacted)
+    return table
+
+
+def _compact_series(series: pd.Series) -> pd.Series:
+    if is_bool_dtype(series):
+        return series
+    if is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+    if series.dtype == "float64":
+        values = series.to_numpy()
+        narrow = values.astype("float32")
+        if np.array_equal(narrow.astype("float64"), values, equal_nan=True):
+            return pd.Series(narrow, index=series.index, name=series.name)
+        return series
+    if series.dtype == "object" and infer_dtype(series, skipna=True) == "string":
+        codes, uniques = pd.factorize(series)
+        if len(uniques) <= CATEGORICAL_MAX_RATIO * int((codes >= 0).sum()):
+            return pd.Series(
+                pd.Categorical.from_codes(codes, uniques),
+                index=series.index,
+                name=series.name,
+            )
+    return series
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    compact_table for a frame that is already in pandas (e.g. parsed from
+    the original upload): the same narrowing, applied column by column.
+    """
+    for position in range(len(df.columns)):
+        series = df.iloc[:, position]
+        compacted = _compact_series(series)
+        if compacted is not series:
+            df.isetitem(position, compacted)
+    return df
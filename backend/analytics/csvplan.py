@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import logging
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+logger = logging.getLogger(__name__)
+
+# Delimiters and quote characters tried when sniffing, in order of
+# preference when several fit equally well.
+DELIMITERS = (",", ";", "\t", "|")
+QUOTE_CHARS = ('"', "'")
+# Rows of the first block compared when sniffing.
+SNIFF_ROWS = 100
+
+# Same tokens pandas.read_csv treats as missing by default.
+NULL_VALUES = [
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "None",
+    "n/a",
+    "nan",
+    "null",
+]
+
+# Column types a plan can hold, as stored in Dataset.parse_plan.
+PLAN_TYPES = {
+    "int64": pa.int64(),
+    "float64": pa.float64(),
+    "bool": pa.bool_(),
+    "string": pa.string(),
+}
+
+_DECIMAL_COMMA = re.compile(r"^[+-]?\d+(,\d+)?$")
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+class CsvPlan(NamedTuple):
+    """
+    How to parse one CSV upload: its dialect, sniffed from the first
+    block, and the type of each column, first from a sample and then as
+    settled by the columnar conversion. Stored on Dataset.parse_plan so
+    later reads skip both steps.
+    """
+
+    delimiter: str = ","
+    quotechar: str = '"'
+    encoding: str = "utf-8"
+    header: bool = True
+    # Quoted values spanning lines (Arrow must then parse serially).
+    newlines_in_values: bool = False
+    # "," for exports that write 1,5 (only with a delimiter other than ",").
+    decimal: str = "."
+    # Generated names ("column_1", ...) for files without a header row.
+    columns: Optional[List[str]] = None
+    # Column name -> one of PLAN_TYPES; columns left out are inferred.
+    column_types: Optional[Dict[str, str]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CsvPlan":
+        return cls(**{key: data[key] for key in cls._fields if key in data})
+
+    def arrow_column_types(self) -> Dict[str, pa.DataType]:
+        return {
+            name: PLAN_TYPES[kind]
+            for name, kind in (self.column_types or {}).items()
+            if kind in PLAN_TYPES
+        }
+
+    def read_options(self, block_size: int, use_threads: bool = True):
+        return pa_csv.ReadOptions(
+            block_size=block_size,
+            encoding=self.encoding,
+            column_names=None if self.header else self.columns,
+            use_threads=use_threads,
+        )
+
+    def parse_options(self) -> pa_csv.ParseOptions:
+        return pa_csv.ParseOptions(
+            delimiter=self.delimiter,
+            quote_char=self.quotechar,
+            newlines_in_values=self.newlines_in_values,
+        )
+
+    def pandas_options(self) -> Dict[str, Any]:
+        """
+        Dialect keywords for pandas.read_csv (types are left to pandas,
+        which keeps integer columns with missing values as float64).
+        """
+        options: Dict[str, Any] = {
+            "sep": self.delimiter,
+            "quotechar": self.quotechar,
+            "encoding": self.encoding,
+            "decimal": self.decimal,
+        }
+        if not self.header:
+            options.update(header=None, names=self.columns)
+        return options
+
+
+def _decode(head: bytes) -> Tuple[str, str]:
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            text = head.decode(encoding, errors="ignore")
+            return text.lstrip("\ufeff"), encoding
+    # The block may end inside a multi-byte character.
+    for encoding in ("utf-8", "cp1252"):
+        try:
+            return codecs.getincrementaldecoder(encoding)().decode(head), encoding
+        except UnicodeDecodeError:
+            continue
+    return head.decode("latin-1"), "latin-1"
+
+
+def _rows(text: str, delimiter: str, quotechar: str) -> List[List[str]]:
+    reader = csv.reader(io.StringIO(text), delimiter=delimiter, quotechar=quotechar)
+    rows: List[List[str]] = []
+    try:
+        for row in reader:
+            if row:
+                rows.append(row)
+            if len(rows) >= SNIFF_ROWS:
+                break
+    except csv.Error:
+        pass
+    return rows
+
+
+def _dialect_score(rows: List[List[str]]) -> Tuple[float, int]:
+    # Share of rows with the most common width, and that width; a
+    # delimiter that never splits a row scores nothing.
+    widths: Dict[int, int] = {}
+    for row in rows:
+        widths[len(row)] = widths.get(len(row), 0) + 1
+    if not widths:
+        return 0.0, 0
+    width, count = max(widths.items(), key=lambda item: (item[1], item[0]))
+    if width < 2:
+        return 0.0, width
+    return count / len(rows), width
+
+
+def _is_number(value: str) -> bool:
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _has_header(rows: List[List[str]]) -> bool:
+    """
+    Only all-numeric files are read without a header: the first row is
+    taken as data when it and every column below it are numbers, unless
+    it is an increasing run of integers (years, 1..N), which names
+    columns more often than it holds data.
+    """
+    first, rest = rows[0], rows[1:]
+    for position, value in enumerate(first):
+        below = [row[position] for row in rest if position < len(row) and row[position]]
+        if not _is_number(value) or not below or not all(map(_is_number, below)):
+            return True
+    try:
+        names = [int(value) for value in first]
+    except ValueError:
+        return False
+    return len(names) > 1 and all(b > a for a, b in zip(names, names[1:]))
+
+
+def _decimal_comma(rows: List[List[str]]) -> bool:
+    # Some column holds numbers written with a decimal comma ("1,5").
+    for position in range(len(rows[0]) if rows else 0):
+        values = [row[position] for row in rows[1:] if position < len(row)]
+        values = [value for value in values if value]
+        if values and all(_DECIMAL_COMMA.match(value) for value in values):
+            if any("," in value for value in values):
+                return True
+    return False
+
+
+def sniff_csv(head: bytes, complete: bool = False) -> CsvPlan:
+    """
+    Dialect of a CSV file from its first (decompressed) block, or the
+    whole file when ``complete``: encoding (BOM, else UTF-8, cp1252 or
+    latin-1), the delimiter and quote character that split the rows most
+    consistently, whether the first row is a header, and whether quoted
+    values span lines, and whether numbers use a decimal comma.
+    """
+    text, encoding = _decode(head)
+    if not complete and "\n" in text:
+        # The last line of the block may be cut off.
+        text = text[: text.rfind("\n") + 1]
+    best: Optional[Tuple[Tuple[float, int], str, str, List[List[str]]]] = None
+    for quotechar in QUOTE_CHARS:
+        for delimiter in DELIMITERS:
+            rows = _rows(text, delimiter, quotechar)
+            score = _dialect_score(rows)
+            if best is None or score > best[0]:
+                best = (score, delimiter, quotechar, rows)
+
+    assert best is not None
+    (_, width), delimiter, quotechar, rows = best
+    if width < 2:
+        # One column (or nothing to go on): the defaults parse it as such.
+        delimiter, quotechar = ",", '"'
+        rows = _rows(text, delimiter, quotechar)
+        width = max((len(row) for row in rows), default=1)
+
+    header = _has_header(rows) if len(rows) > 1 else True
+    return CsvPlan(
+        delimiter=delimiter,
+        quotechar=quotechar,
+        encoding=encoding,
+        header=header,
+        newlines_in_values=any("\n" in value for row in rows for value in row),
+        decimal="," if delimiter != "," and _decimal_comma(rows) else ".",
+        columns=None if header else [f"column_{i + 1}" for i in range(width)],
+    )
+
+
+def plan_type(arrow_type: pa.DataType) -> str:
+    """
+    The plan type for an Arrow type, matching what pandas.read_csv would
+    produce: dates and times stay strings, all-null columns are float64.
+    """
+    if pa.types.is_integer(arrow_type):
+        return "int64"
+    if pa.types.is_floating(arrow_type) or pa.types.is_null(arrow_type):
+        return "float64"
+    if pa.types.is_boolean(arrow_type):
+        return "bool"
+    return "string"
+
+
+def schema_types(schema: pa.Schema) -> Dict[str, str]:
+    return {field.name: plan_type(field.type) for field in schema}
+
+
+def convert_options(
+    plan: CsvPlan, column_types: Optional[Dict[str, pa.DataType]] = None
+) -> pa_csv.ConvertOptions:
+    return pa_csv.ConvertOptions(
+        column_types=column_types or {},
+        null_values=NULL_VALUES,
+        strings_can_be_null=True,
+        decimal_point=plan.decimal,
+    )
+
+
+def sample_column_types(sample: bytes, plan: CsvPlan) -> Dict[str, str]:
+    """
+    Column types inferred from a sample of the file (up to its last line
+    break), so the full parse starts with them instead of re-inferring
+    per block. An unparseable sample gives no types.
+    """
+    text = codecs.getincrementaldecoder(plan.encoding)(errors="ignore").decode(sample)
+    text = text.lstrip("\ufeff")
+    if "\n" in text:
+        text = text[: text.rfind("\n") + 1]
+    data = text.encode("utf-8")
+    try:
+        table = pa_csv.read_csv(
+            pa.BufferReader(data),
+            read_options=plan._replace(encoding="utf-8").read_options(
+                block_size=max(len(data), 1)
+            ),
+            parse_options=plan.parse_options(),
+            convert_options=convert_options(plan),
+        )
+    except pa.ArrowInvalid as exc:
+        logger.debug("Could not infer column types from the sample: %s", exc)
+        return {}
+    return schema_types(table.schema)
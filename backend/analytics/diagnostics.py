@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import logging
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_PROC_STATUS = "/proc/self/status"
+_PROC_CLEAR_REFS = "/proc/self/clear_refs"
+
+
+def _proc_status_bytes(field: str) -> Optional[int]:
+    try:
+        with open(_PROC_STATUS) as status:
+            for line in status:
+                if line.startswith(field):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss() -> bool:
+    """
+    Start a new peak-RSS window for this process (Linux only). Returns
+    False when the peak cannot be reset and peak_rss() covers the whole
+    process lifetime instead.
+    """
+    try:
+        with open(_PROC_CLEAR_REFS, "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def peak_rss() -> int:
+    # VmHWM, or ru_maxrss (KiB on Linux, bytes on macOS) without /proc.
+    peak = _proc_status_bytes("VmHWM:")
+    if peak is not None:
+        return peak
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+class Diagnostics:
+    """
+    Where one analysis run spent its time and memory, stored on
+    AnalysisResult.diagnostics: wall time, CPU time (all threads of the
+    process), rows/sec and peak RSS per stage, and wall time per column
+    and profiling phase. Column shards each collect their own and are
+    merged into the run's (``merge``).
+    """
+
+    def __init__(self, started_at: Optional[float] = None) -> None:
+        self.started_at = time.time() if started_at is None else started_at
+        self.mode: Optional[str] = None
+        self.stages: List[Dict[str, Any]] = []
+        self.columns: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Time the enclosed block as stage ``name``. The yielded record can
+        be given ``rows`` once they are known, for a rows/sec figure.
+        """
+        record: Dict[str, Any] = {"name": name, "rows": rows}
+        peak_is_stage = reset_peak_rss()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            wall = time.perf_counter() - wall_start
+            record["wall_seconds"] = round(wall, 6)
+            record["cpu_seconds"] = round(time.process_time() - cpu_start, 6)
+            if record["rows"] is None:
+                del record["rows"]
+            elif wall > 0:
+                record["rows_per_second"] = round(record["rows"] / wall, 1)
+            record["peak_rss_bytes"] = peak_rss()
+            # Without a reset the peak may predate the stage.
+            record["peak_rss_scope"] = "stage" if peak_is_stage else "process"
+            self.stages.append(record)
+            logger.debug("Analysis stage %s: %s", name, record)
+
+    def time_column(self, column: str, phase: str, seconds: float) -> None:
+        """ColumnTimer for the profiling functions (see profiling.py)."""
+        phases = self.columns.setdefault(column, {})
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+    def _add_columns(self, columns: Dict[str, Dict[str, float]]) -> None:
+        for column, phases in columns.items():
+            for phase, seconds in phases.items():
+                if phase != "total_seconds":
+                    self.time_column(column, phase, seconds)
+
+    def merge(self, data: Dict[str, Any], shard: int) -> None:
+        """Fold in the diagnostics of a column shard of the same run."""
+        for record in data.get("stages", []):
+            self.stages.append(dict(record, shard=shard))
+        self._add_columns(data.get("columns", {}))
+
+    @property
+    def elapsed(self) -> float:
+        return max(time.time() - self.started_at, 0.0)
+
+    def stage_seconds(self) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        for record in self.stages:
+            totals[record["name"]] = (
+                totals.get(record["name"], 0.0) + record["wall_seconds"]
+            )
+        return totals
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        The stored form. Only the ANALYSIS_DIAGNOSTICS_MAX_COLUMNS slowest
+        columns are kept, so wide datasets do not bloat the row.
+        """
+        columns = sorted(
+            (
+                (name, {phase: round(s, 6) for phase, s in phases.items()})
+                for name, phases in self.columns.items()
+            ),
+            key=lambda item: sum(item[1].values()),
+            reverse=True,
+        )
+        limit = settings.ANALYSIS_DIAGNOSTICS_MAX_COLUMNS
+        return {
+            "started_at": self.started_at,
+            "mode": self.mode,
+            "wall_seconds": round(self.elapsed, 6),
+            "cpu_seconds": round(
+                sum(record["cpu_seconds"] for record in self.stages), 6
+            ),
+            "peak_rss_bytes": max(
+                (record["peak_rss_bytes"] for record in self.stages), default=None
+            ),
+            "stages": self.stages,
+            "columns": {
+                name: dict(phases, total_seconds=round(sum(phases.values()), 6))
+                for name, phases in columns[:limit]
+            },
+            "columns_omitted": max(len(columns) - limit, 0),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "Diagnostics":
+        data = data or {}
+        diagnostics = cls(started_at=data.get("started_at"))
+        diagnostics.mode = data.get("mode")
+        diagnostics.stages = list(data.get("stages", []))
+        diagnostics._add_columns(data.get("columns", {}))
+        return diagnostics
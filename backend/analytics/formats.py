@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .csvplan import CsvPlan, sample_column_types, sniff_csv
+
+logger = logging.getLogger(__name__)
+
+CSV = "csv"
+NDJSON = "ndjson"
+PARQUET = "parquet"
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_PARQUET_MAGIC = b"PAR1"
+# Decompressed bytes looked at to tell NDJSON from CSV.
+SNIFF_BYTES = 64 * 1024
+# Rough in-memory size of a DataFrame per byte of compressed input (gzip,
+# zstd, Parquet), used to pick the profiling engine from the file size.
+COMPRESSED_SIZE_FACTOR = 5
+# Decompressed bytes of a CSV read to plan its column types.
+PLAN_SAMPLE_BYTES = 4 * 1024 * 1024
+
+
+class InputFormat(NamedTuple):
+    format: str
+    compression: Optional[str]
+
+
+def detect_format(path: str) -> InputFormat:
+    """
+    Identify an upload from its content rather than its name: Parquet and
+    gzip / zstd compression by their magic bytes, then NDJSON vs CSV by
+    whether the (decompressed) data starts with a JSON object.
+    """
+    with open(path, "rb") as fh:
+        magic = fh.read(4)
+
+    if magic == _PARQUET_MAGIC:
+        return InputFormat(PARQUET, None)
+
+    compression = None
+    if magic[:2] == _GZIP_MAGIC:
+        compression = GZIP
+    elif magic == _ZSTD_MAGIC:
+        compression = ZSTD
+
+    with open_input(path, compression) as stream:
+        head = stream.read(SNIFF_BYTES)
+    head = head.lstrip(b"\xef\xbb\xbf").lstrip()
+    if head.startswith(b"{"):
+        return InputFormat(NDJSON, compression)
+    return InputFormat(CSV, compression)
+
+
+def open_input(path: str, compression: Optional[str]) -> pa.NativeFile:
+    """
+    A binary stream over the file's content, decompressing on the fly; the
+    decompressed data is never written to disk.
+    """
+    return pa.input_stream(path, compression=compression)
+
+
+def _read_head(path: str, compression: Optional[str], size: int) -> bytes:
+    with open_input(path, compression) as stream:
+        return stream.read(size)
+
+
+def sniff_csv_file(path: str, compression: Optional[str] = None) -> CsvPlan:
+    """
+    The dialect of a CSV file (no column types), from its first block.
+    """
+    head = _read_head(path, compression, SNIFF_BYTES + 1)
+    return sniff_csv(head[:SNIFF_BYTES], complete=len(head) <= SNIFF_BYTES)
+
+
+def plan_csv(
+    path: str,
+    input_format: Optional[InputFormat] = None,
+    column_types: Optional[Dict[str, str]] = None,
+) -> Optional[CsvPlan]:
+    """
+    Parse plan for a CSV upload (None for other formats): the sniffed
+    dialect plus ``column_types``, or types inferred from the first
+    PLAN_SAMPLE_BYTES.
+    """
+    input_format = input_format or detect_format(path)
+    if input_format.format != CSV:
+        return None
+    sample = _read_head(path, input_format.compression, PLAN_SAMPLE_BYTES)
+    plan = sniff_csv(sample[:SNIFF_BYTES], complete=len(sample) <= SNIFF_BYTES)
+    if column_types is None:
+        column_types = sample_column_types(sample, plan)
+    return plan._replace(column_types=column_types)
+
+
+def estimated_data_size(path: str, input_format: Optional[InputFormat] = None) -> int:
+    input_format = input_format or detect_format(path)
+    size = os.path.getsize(path)
+    if input_format.compression or input_format.format == PARQUET:
+        return size * COMPRESSED_SIZE_FACTOR
+    return size
+
+
+def _json_text(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+
+def _ndjson_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # Nested objects / arrays are kept as their JSON text so every column
+    # holds scalars, as it would coming from a CSV.
+    for col in df.columns[df.dtypes == object]:
+        series = df[col]
+        if series.map(lambda value: isinstance(value, (dict, list))).any():
+            df[col] = series.map(_json_text)
+    return df
+
+
+def _select(df: pd.DataFrame, columns: Optional[List[str]]) -> pd.DataFrame:
+    if columns is None:
+        return df
+    # Lines missing a key do not produce the column at all.
+    return df.reindex(columns=columns)
+
+
+def iter_frames(
+    path: str,
+    columns: Optional[List[str]] = None,
+    chunk_rows: int = 100_000,
+    input_format: Optional[InputFormat] = None,
+    plan: Optional[CsvPlan] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Read any supported input as DataFrames of at most ``chunk_rows`` rows,
+    streaming (and decompressing) as it goes. CSV is parsed with ``plan``'s
+    dialect, sniffed when no plan is given.
+    """
+    input_format = input_format or detect_format(path)
+
+    if input_format.format == PARQUET:
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    with open_input(path, input_format.compression) as stream:
+        if input_format.format == NDJSON:
+            reader = pd.read_json(
+                stream,
+                lines=True,
+                chunksize=chunk_rows,
+                dtype=False,
+                convert_dates=False,
+            )
+            for chunk in reader:
+                yield _select(_ndjson_frame(chunk), columns)
+            return
+
+        plan = plan or sniff_csv_file(path, input_format.compression)
+        yield from pd.read_csv(
+            stream, usecols=columns, chunksize=chunk_rows, **plan.pandas_options()
+        )
+
+
+def read_frame(
+    path: str,
+    columns: Optional[List[str]] = None,
+    input_format: Optional[InputFormat] = None,
+    plan: Optional[CsvPlan] = None,
+) -> pd.DataFrame:
+    input_format = input_format or detect_format(path)
+    if input_format == InputFormat(CSV, None):
+        plan = plan or sniff_csv_file(path)
+        return pd.read_csv(path, usecols=columns, **plan.pandas_options())
+    if input_format.format == PARQUET:
+        return pq.read_table(path, columns=columns).to_pandas()
+    frames = list(iter_frames(path, columns, input_format=input_format, plan=plan))
+    if not frames:
+        return pd.DataFrame(columns=columns or [])
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_column_names(
+    path: str,
+    input_format: Optional[InputFormat] = None,
+    plan: Optional[CsvPlan] = None,
+) -> List[str]:
+    input_format = input_format or detect_format(path)
+    if input_format.format == PARQUET:
+        return list(pq.read_schema(path).names)
+    if input_format.format == CSV:
+        plan = plan or sniff_csv_file(path, input_format.compression)
+        if not plan.header:
+            return list(plan.columns or [])
+        with open_input(path, input_format.compression) as stream:
+            return list(pd.read_csv(stream, nrows=0, **plan.pandas_options()).columns)
+    # NDJSON has no header; the first chunk's keys have to do.
+    for chunk in iter_frames(path, input_format=input_format):
+        return list(chunk.columns)
+    return []
+
+
+def read_rows(
+    path: str,
+    offset: int,
+    limit: int,
+    input_format: Optional[InputFormat] = None,
+    plan: Optional[CsvPlan] = None,
+) -> pd.DataFrame:
+    """
+    Rows ``offset .. offset + limit``, reading the input up to them.
+    """
+    input_format = input_format or detect_format(path)
+    if input_format.format == CSV:
+        plan = plan or sniff_csv_file(path, input_format.compression)
+        first = 1 if plan.header else 0
+        with open_input(path, input_format.compression) as stream:
+            return pd.read_csv(
+                stream,
+                skiprows=range(first, offset + first),
+                nrows=limit,
+                **plan.pandas_options(),
+            )
+
+    pieces = []
+    start = 0
+    for chunk in iter_frames(path, input_format=input_format):
+        end = start + len(chunk)
+        if end > offset:
+            pieces.append(chunk.iloc[max(offset - start, 0) : offset + limit - start])
+        start = end
+        if start >= offset + limit:
+            break
+    if not pieces:
+        return pd.DataFrame(columns=read_column_names(path, input_format))
+    return pd.concat(pieces, ignore_index=True)
+
+
+def take_rows(
+    path: str,
+    row_ids: np.ndarray,
+    input_format: Optional[InputFormat] = None,
+    plan: Optional[CsvPlan] = None,
+) -> pd.DataFrame:
+    """
+    Specific rows, in the order given, from one scan over the input.
+    """
+    input_format = input_format or detect_format(path)
+    row_ids = np.asarray(row_ids, dtype="int64")
+    wanted = np.unique(row_ids)
+
+    if input_format.format == CSV:
+        plan = plan or sniff_csv_file(path, input_format.compression)
+        # Line 0 is the header, when there is one.
+        first = 1 if plan.header else 0
+        lines = set(int(row) + first for row in wanted)
+        with open_input(path, input_format.compression) as stream:
+            df = pd.read_csv(
+                stream,
+                skiprows=lambda line: line not in lines
+                and not (plan.header and line == 0),
+                **plan.pandas_options(),
+            )
+    else:
+        pieces = []
+        start = 0
+        for chunk in iter_frames(path, input_format=input_format):
+            local = wanted[(wanted >= start) & (wanted < start + len(chunk))] - start
+            if local.size:
+                pieces.append(chunk.iloc[local])
+            start += len(chunk)
+        if not pieces:
+            return pd.DataFrame(columns=read_column_names(path, input_format))
+        df = pd.concat(pieces, ignore_index=True)
+
+    order = np.searchsorted(wanted, row_ids)
+    return df.iloc[order].reset_index(drop=True)
@@ -0,0 +1,591 @@
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .columnar import (
+    COLUMNAR_SUFFIX,
+    columnar_columns,
+    columnar_plan_types,
+    columnar_row_count,
+    iter_columnar,
+    read_columnar,
+    read_columnar_rows,
+    take_columnar_rows,
+    write_columnar_cache,
+)
+from .compaction import compact_frame
+from .csvplan import CsvPlan
+from .formats import (
+    iter_frames,
+    plan_csv,
+    read_column_names,
+    read_frame,
+    read_rows,
+    take_rows,
+)
+from .models import Dataset, DatasetBatch
+from .quality import QualityIndexBuilder, build_quality_index, write_quality_index
+
+logger = logging.getLogger(__name__)
+
+QUALITY_INDEX_SUFFIX = ".quality.npz"
+SKETCHES_SUFFIX = ".sketches.json.gz"
+
+
+def _write_columnar_file(
+    source, label: str, plan: Optional[CsvPlan] = None
+) -> Optional[str]:
+    """
+    Convert the uploaded file ``source`` to a typed Parquet file stored
+    next to it; returns the stored name, or None when the conversion fails.
+    """
+    storage = source.storage
+    stem = os.path.splitext(source.name)[0]
+    name = storage.get_available_name(stem + COLUMNAR_SUFFIX)
+    dest_path = storage.path(name)
+
+    try:
+        rows = write_columnar_cache(source.path, dest_path, plan)
+    except Exception:
+        logger.exception(
+            "Failed to build columnar cache for %s; using original file", label
+        )
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        return None
+
+    logger.info("Wrote columnar cache for %s (%s rows, '%s')", label, rows, name)
+    return name
+
+
+def build_columnar_cache(dataset: Dataset) -> bool:
+    """
+    Convert the original upload to a typed Parquet file stored next to it
+    and record it on ``Dataset.columnar_file``. Runs once per upload; later
+    calls are no-ops while the cached file exists.
+
+    A CSV is parsed by the plan stored on ``Dataset.parse_plan``, which is
+    made here the first time (dialect sniffed, types from a sample) and
+    updated with the types the conversion settled on.
+
+    Returns False when the conversion fails, in which case readers keep
+    using the original CSV.
+    """
+    if dataset.columnar_file and os.path.exists(dataset.columnar_file.path):
+        return True
+
+    plan = dataset_csv_plan(dataset) or _plan_upload(dataset.original_file.path)
+    name = _write_columnar_file(dataset.original_file, f"dataset {dataset.id}", plan)
+    update_fields = []
+    if plan is not None:
+        if name is not None:
+            # The types the conversion settled on, widening included.
+            plan = plan._replace(
+                column_types=columnar_plan_types(
+                    dataset.original_file.storage.path(name)
+                )
+            )
+        dataset.parse_plan = plan.to_dict()
+        update_fields.append("parse_plan")
+    if name is not None:
+        dataset.columnar_file.name = name
+        update_fields.append("columnar_file")
+    if update_fields:
+        dataset.save(update_fields=update_fields)
+    return name is not None
+
+
+def _plan_upload(
+    path: str, column_types: Optional[Dict[str, str]] = None
+) -> Optional[CsvPlan]:
+    try:
+        return plan_csv(path, column_types=column_types)
+    except Exception:
+        logger.exception("Could not plan parsing '%s'; using defaults", path)
+        return None
+
+
+def dataset_csv_plan(dataset: Dataset) -> Optional[CsvPlan]:
+    """
+    The stored parse plan of a CSV upload (None for other formats, or
+    before ingest has planned it).
+    """
+    return CsvPlan.from_dict(dataset.parse_plan) if dataset.parse_plan else None
+
+
+def build_batch_columnar_cache(batch: DatasetBatch) -> bool:
+    """
+    Same as build_columnar_cache for one appended batch.
+    """
+    if batch.columnar_file and os.path.exists(batch.columnar_file.path):
+        return True
+
+    # Batches carry the dataset's columns, so its settled types are reused.
+    dataset_plan = dataset_csv_plan(batch.dataset)
+    plan = _plan_upload(
+        batch.original_file.path,
+        column_types=dataset_plan.column_types if dataset_plan else None,
+    )
+    name = _write_columnar_file(
+        batch.original_file,
+        f"batch {batch.number} of dataset {batch.dataset_id}",
+        plan,
+    )
+    if name is None:
+        return False
+    batch.columnar_file.name = name
+    batch.save(update_fields=["columnar_file", "updated_at"])
+    return True
+
+
+def batch_columns(batch: DatasetBatch) -> List[str]:
+    if batch.columnar_file and os.path.exists(batch.columnar_file.path):
+        return columnar_columns(batch.columnar_file.path)
+    return read_column_names(batch.original_file.path)
+
+
+def batch_row_count(batch: DatasetBatch) -> int:
+    if batch.columnar_file and os.path.exists(batch.columnar_file.path):
+        return columnar_row_count(batch.columnar_file.path)
+    return sum(len(chunk) for chunk in iter_frames(batch.original_file.path))
+
+
+def has_columnar_cache(dataset: Dataset) -> bool:
+    return bool(dataset.columnar_file) and os.path.exists(dataset.columnar_file.path)
+
+
+def dataset_columns(dataset: Dataset) -> List[str]:
+    if has_columnar_cache(dataset):
+        return columnar_columns(dataset.columnar_file.path)
+    return read_column_names(dataset.original_file.path, plan=dataset_csv_plan(dataset))
+
+
+class _Part(NamedTuple):
+    """
+    One stored piece of a dataset's rows: the original upload or an
+    appended batch, read from its columnar cache when it has one.
+    """
+
+    original_path: str
+    columnar_path: Optional[str]
+    row_offset: int
+    # None for the original upload when there are no batches after it.
+    row_count: Optional[int]
+    # Dialect for parsing original_path when there is no columnar cache.
+    plan: Optional[CsvPlan] = None
+
+
+def _completed_batches(dataset: Dataset) -> List[DatasetBatch]:
+    return list(dataset.batches.filter(status="COMPLETED").order_by("number"))
+
+
+def _dataset_parts(dataset: Dataset) -> List[_Part]:
+    batches = _completed_batches(dataset)
+    parts = [
+        _Part(
+            dataset.original_file.path,
+            dataset.columnar_file.path if has_columnar_cache(dataset) else None,
+            0,
+            batches[0].row_offset if batches else None,
+            dataset_csv_plan(dataset),
+        )
+    ]
+    for batch in batches:
+        has_cache = bool(batch.columnar_file) and os.path.exists(
+            batch.columnar_file.path
+        )
+        parts.append(
+            _Part(
+                batch.original_file.path,
+                batch.columnar_file.path if has_cache else None,
+                batch.row_offset,
+                batch.row_count,
+            )
+        )
+    return parts
+
+
+def _conform(df: pd.DataFrame, columns: Optional[List[str]]) -> pd.DataFrame:
+    # Batches may list the columns in another order than the original.
+    if columns is None or list(df.columns) == list(columns):
+        return df
+    return df.reindex(columns=columns)
+
+
+def _read_part(
+    part: _Part, columns: Optional[List[str]], compact: bool = False
+) -> pd.DataFrame:
+    if part.columnar_path:
+        return read_columnar(part.columnar_path, columns=columns, compact=compact)
+    df = read_frame(part.original_path, columns=columns, plan=part.plan)
+    return compact_frame(df) if compact else df
+
+
+def _iter_part(
+    part: _Part, columns: Optional[List[str]], chunk_rows: int
+) -> Iterator[pd.DataFrame]:
+    if part.columnar_path:
+        return iter_columnar(part.columnar_path, columns=columns, batch_rows=chunk_rows)
+    return iter_frames(
+        part.original_path, columns=columns, chunk_rows=chunk_rows, plan=part.plan
+    )
+
+
+def load_dataset_frame(
+    dataset: Dataset, columns: Optional[List[str]] = None, compact: bool = False
+) -> pd.DataFrame:
+    """
+    Load a dataset (or just ``columns`` of it) from the columnar cache,
+    falling back to parsing the original upload. Appended batches follow
+    the original rows. ``compact`` returns narrowed numeric types and
+    Categorical text columns (see compaction.py) with the same values.
+    """
+    parts = _dataset_parts(dataset)
+    if len(parts) == 1:
+        return _read_part(parts[0], columns, compact)
+
+    columns = columns or dataset_columns(dataset)
+    df = pd.concat(
+        [_conform(_read_part(part, columns, compact), columns) for part in parts],
+        ignore_index=True,
+    )
+    # Categoricals with different categories concatenate to object.
+    return compact_frame(df) if compact else df
+
+
+def iter_dataset_chunks(
+    dataset: Dataset,
+    columns: Optional[List[str]] = None,
+    chunk_rows: Optional[int] = None,
+) -> Iterator[pd.DataFrame]:
+    chunk_rows = chunk_rows or settings.ANALYSIS_CHUNK_ROWS
+    parts = _dataset_parts(dataset)
+    if len(parts) > 1:
+        columns = columns or dataset_columns(dataset)
+    for part in parts:
+        for chunk in _iter_part(part, columns, chunk_rows):
+            yield _conform(chunk, columns)
+
+
+def iter_batch_chunks(
+    batch: DatasetBatch,
+    columns: List[str],
+    chunk_rows: Optional[int] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    The rows of one appended batch only, in the dataset's column order.
+    """
+    chunk_rows = chunk_rows or settings.ANALYSIS_CHUNK_ROWS
+    if batch.columnar_file and os.path.exists(batch.columnar_file.path):
+        chunks = iter_columnar(
+            batch.columnar_file.path, columns=columns, batch_rows=chunk_rows
+        )
+    else:
+        chunks = iter_frames(
+            batch.original_file.path, columns=columns, chunk_rows=chunk_rows
+        )
+    for chunk in chunks:
+        yield _conform(chunk, columns)
+
+
+def load_batch_frame(batch: DatasetBatch, columns: List[str]) -> pd.DataFrame:
+    if batch.columnar_file and os.path.exists(batch.columnar_file.path):
+        df = read_columnar(batch.columnar_file.path, columns=columns)
+    else:
+        df = read_frame(batch.original_file.path, columns=columns)
+    return _conform(df, columns)
+
+
+def dataset_row_count(dataset: Dataset) -> Optional[int]:
+    """
+    Row count from the columnar cache footer (plus appended batches); None
+    when there is no cache.
+    """
+    if not has_columnar_cache(dataset):
+        return None
+    batches = _completed_batches(dataset)
+    if batches:
+        return batches[-1].row_offset + batches[-1].row_count
+    return columnar_row_count(dataset.columnar_file.path)
+
+
+def _part_rows(part: _Part, offset: int, limit: int) -> pd.DataFrame:
+    if part.columnar_path:
+        return read_columnar_rows(part.columnar_path, offset, limit)
+    return read_rows(part.original_path, offset, limit, plan=part.plan)
+
+
+def load_dataset_rows(dataset: Dataset, offset: int, limit: int) -> pd.DataFrame:
+    """
+    One page of rows. Served from the row-group index of the columnar cache;
+    without a cache the upload has to be read up to the page. Only the
+    parts (original upload, appended batches) the page spans are read.
+    """
+    parts = _dataset_parts(dataset)
+    if len(parts) == 1:
+        return _part_rows(parts[0], offset, limit)
+
+    columns = dataset_columns(dataset)
+    end = offset + limit
+    pieces = []
+    for part in parts:
+        part_end = part.row_offset + part.row_count
+        if part_end <= offset or part.row_offset >= end:
+            continue
+        local = max(offset - part.row_offset, 0)
+        pieces.append(
+            _conform(
+                _part_rows(part, local, min(end, part_end) - part.row_offset - local),
+                columns,
+            )
+        )
+    if not pieces:
+        return _part_rows(parts[0], offset, limit)
+    return pd.concat(pieces, ignore_index=True)
+
+
+def _take_part_rows(part: _Part, row_ids: np.ndarray) -> pd.DataFrame:
+    if part.columnar_path:
+        return take_columnar_rows(part.columnar_path, row_ids)
+    return take_rows(part.original_path, row_ids, plan=part.plan)
+
+
+def load_dataset_rows_by_id(dataset: Dataset, row_ids: np.ndarray) -> pd.DataFrame:
+    """
+    Specific rows, in the order given. Only the row groups holding them are
+    read from the columnar cache; without a cache the upload is scanned.
+    """
+    parts = _dataset_parts(dataset)
+    if len(parts) == 1:
+        return _take_part_rows(parts[0], row_ids)
+
+    row_ids = np.asarray(row_ids, dtype="int64")
+    columns = dataset_columns(dataset)
+    starts = np.array([part.row_offset for part in parts], dtype="int64")
+    owner = np.searchsorted(starts, row_ids, side="right") - 1
+
+    pieces = []
+    positions = []
+    for index in np.unique(owner):
+        selected = np.flatnonzero(owner == index)
+        part = parts[index]
+        pieces.append(
+            _conform(
+                _take_part_rows(part, row_ids[selected] - part.row_offset), columns
+            )
+        )
+        positions.append(selected)
+    if not pieces:
+        return _take_part_rows(parts[0], row_ids)
+    df = pd.concat(pieces, ignore_index=True)
+    return df.iloc[np.argsort(np.concatenate(positions), kind="stable")].reset_index(
+        drop=True
+    )
+
+
+def build_dataset_quality_index(
+    dataset: Dataset, column_summaries: Dict[str, Dict[str, Any]]
+) -> Optional[QualityIndexBuilder]:
+    """
+    Scan the dataset once more to record which rows have missing values,
+    coercion failures or outliers (see ``quality.QualityIndexBuilder``) and
+    store the row lists next to the upload on ``Dataset.quality_index``.
+
+    Returns None when the index could not be built; quality rows are then
+    unavailable but the analysis itself is unaffected.
+    """
+    storage = dataset.original_file.storage
+    stem = os.path.splitext(dataset.original_file.name)[0]
+    name = storage.get_available_name(stem + QUALITY_INDEX_SUFFIX)
+    dest_path = storage.path(name)
+
+    try:
+        builder = build_quality_index(
+            iter_dataset_chunks(dataset, columns=list(column_summaries)),
+            column_summaries,
+        )
+        write_quality_index(dest_path, builder)
+    except Exception:
+        logger.exception("Failed to build quality index for dataset %s", dataset.id)
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        return None
+
+    if dataset.quality_index:
+        delete_dataset_file(dataset, dataset.quality_index)
+    dataset.quality_index.name = name
+    dataset.save(update_fields=["quality_index"])
+
+    # The new index covers appended batches too.
+    for batch in dataset.batches.all():
+        if batch.quality_index:
+            batch.quality_index.delete(save=False)
+            batch.save(update_fields=["quality_index", "updated_at"])
+    return builder
+
+
+def build_batch_quality_index(
+    batch: DatasetBatch, column_summaries: Dict[str, Dict[str, Any]]
+) -> Optional[QualityIndexBuilder]:
+    """
+    Quality index for the rows of one appended batch, numbered within the
+    whole dataset, stored on ``DatasetBatch.quality_index``. Rows indexed
+    earlier keep the outlier fences they were checked against until the
+    next full analysis.
+    """
+    storage = batch.original_file.storage
+    stem = os.path.splitext(batch.original_file.name)[0]
+    name = storage.get_available_name(stem + QUALITY_INDEX_SUFFIX)
+    dest_path = storage.path(name)
+
+    try:
+        builder = build_quality_index(
+            iter_batch_chunks(batch, list(column_summaries)),
+            column_summaries,
+            row_offset=batch.row_offset,
+        )
+        write_quality_index(dest_path, builder)
+    except Exception:
+        logger.exception(
+            "Failed to build quality index for batch %s of dataset %s",
+            batch.number,
+            batch.dataset_id,
+        )
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        return None
+
+    batch.quality_index.name = name
+    batch.save(update_fields=["quality_index", "updated_at"])
+    return builder
+
+
+def has_quality_index(dataset: Dataset) -> bool:
+    return bool(dataset.quality_index) and os.path.exists(dataset.quality_index.path)
+
+
+def quality_index_paths(dataset: Dataset) -> List[str]:
+    """
+    The dataset's quality index followed by those of batches appended
+    since it was built; their row numbers do not overlap and increase.
+    """
+    paths = [dataset.quality_index.path]
+    for batch in _completed_batches(dataset):
+        if batch.quality_index and os.path.exists(batch.quality_index.path):
+            paths.append(batch.quality_index.path)
+    return paths
+
+
+def store_dataset_sketches(dataset: Dataset, sketches: Dict[str, Any]) -> str:
+    """
+    Write serialized sketches (gzipped JSON) to a new file next to the
+    upload and return its storage name; nothing refers to it yet (see
+    ``replace_dataset_sketches``). A partly written file is removed before
+    the error propagates.
+    """
+    storage = dataset.original_file.storage
+    stem = os.path.splitext(dataset.original_file.name)[0]
+    name = storage.get_available_name(stem + SKETCHES_SUFFIX)
+    dest_path = storage.path(name)
+    try:
+        with gzip.open(dest_path, "wt", encoding="utf-8") as fh:
+            json.dump(sketches, fh, separators=(",", ":"))
+    except Exception:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+    return name
+
+
+def replace_dataset_sketches(dataset: Dataset, name: Optional[str]) -> None:
+    """
+    Point ``Dataset.stats_sketches`` at ``name`` (or at nothing); the file
+    it replaces is deleted once the surrounding transaction commits.
+    """
+    old = dataset.stats_sketches.name or None
+    dataset.stats_sketches = name
+    dataset.save(update_fields=["stats_sketches"])
+    if old and old != name:
+        transaction.on_commit(lambda: _delete_unshared_file(dataset, old))
+
+
+def write_dataset_sketches(dataset: Dataset, sketches: Dict[str, Any]) -> None:
+    """
+    Store serialized sketches on ``Dataset.stats_sketches``, replacing
+    older ones. If they cannot be written the old ones are dropped too,
+    since they no longer match the data.
+    """
+    try:
+        name = store_dataset_sketches(dataset, sketches)
+    except Exception:
+        logger.exception("Failed to store sketches for dataset %s", dataset.id)
+        name = None
+    replace_dataset_sketches(dataset, name)
+
+
+def has_dataset_sketches(dataset: Dataset) -> bool:
+    return bool(dataset.stats_sketches) and os.path.exists(dataset.stats_sketches.path)
+
+
+def load_dataset_sketches(dataset: Dataset) -> Optional[Dict[str, Any]]:
+    if not has_dataset_sketches(dataset):
+        return None
+    with gzip.open(dataset.stats_sketches.path, "rt", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _shared_file(dataset: Dataset, name: str) -> bool:
+    shared = (
+        Dataset.objects.filter(
+            Q(original_file=name)
+            | Q(columnar_file=name)
+            | Q(quality_index=name)
+            | Q(stats_sketches=name)
+        )
+        .exclude(pk=dataset.pk)
+        .exists()
+    )
+    if shared:
+        logger.info("Keeping '%s'; still used by another dataset", name)
+    return shared
+
+
+def _delete_unshared_file(dataset: Dataset, name: str) -> None:
+    # For files the dataset no longer refers to.
+    if not _shared_file(dataset, name):
+        dataset.original_file.storage.delete(name)
+
+
+def delete_dataset_file(dataset: Dataset, field) -> None:
+    """
+    Delete one of the dataset's stored files unless another dataset (a
+    deduplicated re-upload) still points at it.
+    """
+    if not _shared_file(dataset, field.name):
+        field.delete(save=False)
+
+
+def delete_dataset_files(dataset: Dataset) -> None:
+    for field in (
+        dataset.original_file,
+        dataset.columnar_file,
+        dataset.quality_index,
+        dataset.stats_sketches,
+    ):
+        if field:
+            delete_dataset_file(dataset, field)
+    # Batch files belong to a single dataset.
+    for batch in dataset.batches.all():
+        for field in (batch.original_file, batch.columnar_file, batch.quality_index):
+            if field:
+                field.delete(save=False)
@@ -0,0 +1,49 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.utils import wordnet_antonym_pairs
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute the word -> antonym table used for boolean target labels "
+        "from NLTK WordNet (downloading the corpus if needed)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=str(settings.ANTONYM_TABLE_PATH),
+            help="Where to write the table (default: ANTONYM_TABLE_PATH).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import nltk
+            from nltk.corpus import wordnet as wn
+        except ImportError as exc:
+            raise CommandError("NLTK is required to build the table.") from exc
+
+        try:
+            wn.ensure_loaded()
+        except LookupError:
+            self.stdout.write("Downloading WordNet...")
+            if not nltk.download("wordnet", quiet=True):
+                raise CommandError("Could not download WordNet.")
+            wn.ensure_loaded()
+
+        table = dict(wordnet_antonym_pairs(wn))
+
+        output = options["output"]
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        tmp_path = f"{output}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(table, fh, sort_keys=True, separators=(",", ":"))
+        os.replace(tmp_path, output)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {len(table)} antonyms to {output}")
+        )
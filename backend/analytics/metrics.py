@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import logging
+import math
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import redis
+
+from .progress import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Counters and histograms live in one Redis hash so every web and worker
+# process adds to the same totals; each field is a Prometheus sample name
+# with its labels, e.g. analysis_tasks_total{queue="analysis_small"}.
+METRICS_KEY = "analysis-metrics"
+
+
+class Metric(NamedTuple):
+    kind: str  # "counter", "histogram" or "gauge"
+    help: str
+    buckets: Tuple[float, ...] = ()
+
+
+DURATION_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+WAIT_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900)
+
+METRICS: Dict[str, Metric] = {
+    "analysis_tasks_total": Metric(
+        "counter", "Analysis runs finished, by queue, engine and status."
+    ),
+    "analysis_task_duration_seconds": Metric(
+        "histogram",
+        "Wall time of analysis runs from start to saved summary.",
+        DURATION_BUCKETS,
+    ),
+    "analysis_stage_seconds_total": Metric(
+        "counter", "Wall time spent in each analysis stage."
+    ),
+    "analysis_queue_wait_seconds": Metric(
+        "histogram",
+        "Delay between publishing an analysis task and a worker starting it.",
+        WAIT_BUCKETS,
+    ),
+    "analysis_bytes_processed_total": Metric(
+        "counter", "Decoded input bytes of completed analyses."
+    ),
+    "analysis_rows_processed_total": Metric(
+        "counter", "Rows profiled by completed analyses."
+    ),
+    "analysis_queue_depth": Metric(
+        "gauge", "Messages waiting in the broker per analysis queue."
+    ),
+    "analysis_queue_analyses": Metric(
+        "gauge", "Analyses queued or running per analysis queue, by status."
+    ),
+}
+
+Labels = Dict[str, str]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample(name: str, labels: Optional[Labels] = None) -> str:
+    if not labels:
+        return name
+    pairs = ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items())
+    return f"{name}{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def increment(name: str, amount: float = 1, **labels: str) -> None:
+    try:
+        redis_client().hincrbyfloat(METRICS_KEY, _sample(name, labels), amount)
+    except redis.RedisError as exc:
+        logger.debug("Could not record %s: %s", name, exc)
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    """
+    Add one observation to histogram ``name``. Buckets are stored
+    cumulative, as they are exposed.
+    """
+    try:
+        pipe = redis_client().pipeline()
+        for bound in METRICS[name].buckets + (math.inf,):
+            # Adding 0 still creates the field, so every bucket is exposed.
+            sample = _sample(f"{name}_bucket", {**labels, "le": _format_value(bound)})
+            pipe.hincrby(METRICS_KEY, sample, int(value <= bound))
+        pipe.hincrbyfloat(METRICS_KEY, _sample(f"{name}_sum", labels), value)
+        pipe.hincrby(METRICS_KEY, _sample(f"{name}_count", labels), 1)
+        pipe.execute()
+    except redis.RedisError as exc:
+        logger.debug("Could not record %s: %s", name, exc)
+
+
+def record_analysis(
+    queue: str,
+    mode: str,
+    status: str,
+    seconds: float,
+    stage_seconds: Dict[str, float],
+    rows: Optional[int] = None,
+    data_bytes: Optional[int] = None,
+) -> None:
+    """Count one finished analysis run in the shared metrics."""
+    labels = {"queue": queue or "default", "mode": mode or "unknown"}
+    try:
+        pipe = redis_client().pipeline()
+        pipe.hincrbyfloat(
+            METRICS_KEY,
+            _sample("analysis_tasks_total", {**labels, "status": status}),
+            1,
+        )
+        for stage, stage_total in stage_seconds.items():
+            pipe.hincrbyfloat(
+                METRICS_KEY,
+                _sample("analysis_stage_seconds_total", {**labels, "stage": stage}),
+                stage_total,
+            )
+        if rows is not None:
+            pipe.hincrbyfloat(
+                METRICS_KEY, _sample("analysis_rows_processed_total", labels), rows
+            )
+        if data_bytes is not None:
+            pipe.hincrbyfloat(
+                METRICS_KEY,
+                _sample("analysis_bytes_processed_total", labels),
+                data_bytes,
+            )
+        pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning("Could not record analysis metrics: %s", exc)
+    observe("analysis_task_duration_seconds", seconds, **labels, status=status)
+
+
+def _family(sample: str) -> str:
+    name = sample.split("{", 1)[0]
+    for suffix in ("_bucket", "_sum", "_count"):
+        base = name[: -len(suffix)]
+        if (
+            name.endswith(suffix)
+            and METRICS.get(base, Metric("", "")).kind == "histogram"
+        ):
+            return base
+    return name
+
+
+def _bucket_order(sample: str) -> Tuple[str, float]:
+    # Buckets of one label set in ascending ``le``, then _sum and _count.
+    head, _, le = sample.rpartition('le="')
+    if not head:
+        return sample, math.inf
+    bound = le.split('"', 1)[0]
+    return head, math.inf if bound == "+Inf" else float(bound)
+
+
+def render_metrics(gauges: Iterable[Tuple[str, Labels, float]] = ()) -> str:
+    """
+    Prometheus text exposition of the stored counters and histograms
+    plus ``gauges`` (name, labels, value) read by the caller at scrape
+    time.
+    """
+    try:
+        stored = redis_client().hgetall(METRICS_KEY)
+    except redis.RedisError as exc:
+        logger.warning("Could not read analysis metrics: %s", exc)
+        stored = {}
+
+    families: Dict[str, List[Tuple[str, float]]] = {name: [] for name in METRICS}
+    for field, value in stored.items():
+        sample = field.decode() if isinstance(field, bytes) else field
+        families.setdefault(_family(sample), []).append((sample, float(value)))
+    for name, labels, value in gauges:
+        families.setdefault(name, []).append((_sample(name, labels), float(value)))
+
+    lines: List[str] = []
+    for name, samples in families.items():
+        if not samples:
+            continue
+        metric = METRICS.get(name)
+        if metric is not None:
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+        for sample, value in sorted(samples, key=lambda item: _bucket_order(item[0])):
+            lines.append(f"{sample} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
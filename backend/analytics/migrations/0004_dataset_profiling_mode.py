@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0003_dataset_is_active_delete_datasetsemanticconfig"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataset",
+            name="profiling_mode",
+            field=models.CharField(
+                choices=[
+                    ("AUTO", "Auto"),
+                    ("IN_MEMORY", "In memory"),
+                    ("STREAMING", "Streaming"),
+                ],
+                default="AUTO",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0004_dataset_profiling_mode"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataset",
+            name="columnar_file",
+            field=models.FileField(blank=True, null=True, upload_to="datasets/"),
+        ),
+    ]
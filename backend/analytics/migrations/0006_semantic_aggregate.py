@@ -0,0 +1,85 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0005_dataset_columnar_file"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="analysisresult",
+            name="version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="SemanticAggregate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cache_key", models.CharField(max_length=64)),
+                ("version", models.PositiveIntegerField()),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("target_distribution", "Target distribution"),
+                            ("metrics_by_target", "Metric by target"),
+                            ("metrics_over_time", "Metric over time"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "target_column",
+                    models.CharField(blank=True, max_length=255, null=True),
+                ),
+                (
+                    "time_column",
+                    models.CharField(blank=True, max_length=255, null=True),
+                ),
+                ("metric", models.CharField(blank=True, max_length=255, null=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("COMPLETED", "Completed"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=10,
+                    ),
+                ),
+                ("payload", models.JSONField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "dataset",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="semantic_aggregates",
+                        to="analytics.dataset",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("dataset", "cache_key"),
+                        name="unique_semantic_aggregate",
+                    )
+                ],
+            },
+        ),
+    ]
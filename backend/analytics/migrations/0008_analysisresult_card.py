@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_cards(apps, schema_editor):
+    from analytics.summaries import analysis_card
+
+    AnalysisResult = apps.get_model("analytics", "AnalysisResult")
+    for analysis in AnalysisResult.objects.exclude(summary_json=None).iterator():
+        analysis.card = analysis_card(analysis.summary_json)
+        analysis.save(update_fields=["card"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0007_dataset_quality_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="analysisresult",
+            name="card",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="analysisresult",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_cards, migrations.RunPython.noop),
+    ]
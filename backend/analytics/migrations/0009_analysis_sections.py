@@ -0,0 +1,80 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def split_summaries(apps, schema_editor):
+    AnalysisResult = apps.get_model("analytics", "AnalysisResult")
+    AnalysisSection = apps.get_model("analytics", "AnalysisSection")
+    for analysis in AnalysisResult.objects.exclude(summary_json=None).iterator():
+        AnalysisSection.objects.bulk_create(
+            [
+                AnalysisSection(
+                    analysis=analysis, name=name, position=position, payload=payload
+                )
+                for position, (name, payload) in enumerate(
+                    analysis.summary_json.items()
+                )
+            ]
+        )
+
+
+def join_summaries(apps, schema_editor):
+    AnalysisResult = apps.get_model("analytics", "AnalysisResult")
+    for analysis in AnalysisResult.objects.iterator():
+        sections = analysis.sections.order_by("position")
+        if sections.exists():
+            analysis.summary_json = {
+                section.name: section.payload for section in sections
+            }
+            analysis.save(update_fields=["summary_json"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0008_analysisresult_card"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnalysisSection",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=64)),
+                ("position", models.PositiveIntegerField(default=0)),
+                ("payload", models.JSONField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "analysis",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sections",
+                        to="analytics.analysisresult",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["position"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("analysis", "name"), name="unique_analysis_section"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(split_summaries, join_summaries),
+        migrations.RemoveField(
+            model_name="analysisresult",
+            name="summary_json",
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0009_analysis_sections"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataset",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="dataset",
+            index=models.Index(
+                fields=["owner", "content_hash"], name="dataset_owner_content_hash"
+            ),
+        ),
+    ]
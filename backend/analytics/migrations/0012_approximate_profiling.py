@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0011_upload_session"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataset",
+            name="stats_sketches",
+            field=models.FileField(blank=True, null=True, upload_to="datasets/"),
+        ),
+        migrations.AlterField(
+            model_name="dataset",
+            name="profiling_mode",
+            field=models.CharField(
+                choices=[
+                    ("AUTO", "Auto"),
+                    ("IN_MEMORY", "In memory"),
+                    ("STREAMING", "Streaming"),
+                    ("APPROXIMATE", "Approximate (sketches)"),
+                ],
+                default="AUTO",
+                max_length=16,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="uploadsession",
+            name="profiling_mode",
+            field=models.CharField(
+                choices=[
+                    ("AUTO", "Auto"),
+                    ("IN_MEMORY", "In memory"),
+                    ("STREAMING", "Streaming"),
+                    ("APPROXIMATE", "Approximate (sketches)"),
+                ],
+                default="AUTO",
+                max_length=16,
+            ),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0012_approximate_profiling"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DatasetBatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("number", models.PositiveIntegerField()),
+                ("original_file", models.FileField(upload_to="datasets/")),
+                (
+                    "columnar_file",
+                    models.FileField(blank=True, null=True, upload_to="datasets/"),
+                ),
+                (
+                    "quality_index",
+                    models.FileField(blank=True, null=True, upload_to="datasets/"),
+                ),
+                (
+                    "content_hash",
+                    models.CharField(blank=True, max_length=64, null=True),
+                ),
+                ("row_offset", models.PositiveBigIntegerField(blank=True, null=True)),
+                ("row_count", models.PositiveBigIntegerField(blank=True, null=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("RUNNING", "Running"),
+                            ("COMPLETED", "Completed"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=10,
+                    ),
+                ),
+                ("error_message", models.TextField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "dataset",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="batches",
+                        to="analytics.dataset",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["number"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("dataset", "number"), name="unique_dataset_batch"
+                    )
+                ],
+            },
+        ),
+    ]
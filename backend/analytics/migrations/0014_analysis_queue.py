@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0013_dataset_batch"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="analysisresult",
+            name="estimated_cost",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="analysisresult",
+            name="queue",
+            field=models.CharField(blank=True, default="", max_length=32),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0014_analysis_queue"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataset",
+            name="parse_plan",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0015_dataset_parse_plan"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="analysisresult",
+            name="diagnostics",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0016_analysis_diagnostics"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="uploadsession",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("OPEN", "Open"),
+                    ("ASSEMBLING", "Assembling"),
+                    ("COMPLETED", "Completed"),
+                    ("ABORTED", "Aborted"),
+                ],
+                default="OPEN",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0017_upload_session_assembling"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="analysissection",
+            name="digest",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.contrib.auth import get_user_model
 from django.db import models
 
@@ -5,16 +7,92 @@ User = get_user_model()
 
 
 class Dataset(models.Model):
+    PROFILING_MODE_CHOICES = [
+        ("AUTO", "Auto"),
+        ("IN_MEMORY", "In memory"),
+        ("STREAMING", "Streaming"),
+        ("APPROXIMATE", "Approximate (sketches)"),
+    ]
+
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="datasets")
     name = models.CharField(max_length=255)
     original_file = models.FileField(upload_to="datasets/")
+    # Parquet copy of original_file written once at ingest; all reads go here.
+    columnar_file = models.FileField(upload_to="datasets/", null=True, blank=True)
+    # Row numbers with missing / unparseable / outlying values, per column.
+    quality_index = models.FileField(upload_to="datasets/", null=True, blank=True)
+    # Serialized quantile / distinct / top-value sketches from an
+    # APPROXIMATE analysis, kept so they can be merged without a rescan.
+    stats_sketches = models.FileField(upload_to="datasets/", null=True, blank=True)
+    # How a CSV original_file is parsed (dialect and column types, see
+    # csvplan.CsvPlan); planned once at ingest so re-reads skip sniffing.
+    parse_plan = models.JSONField(null=True, blank=True)
+    # SHA-256 of original_file; re-uploads of the same content by the same
+    # owner share its files and analysis (see uploads.clone_dataset).
+    content_hash = models.CharField(max_length=64, null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=False)
+    profiling_mode = models.CharField(
+        max_length=16, choices=PROFILING_MODE_CHOICES, default="AUTO"
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["owner", "content_hash"], name="dataset_owner_content_hash"
+            )
+        ]
 
     def __str__(self):
         return f"{self.name} (id={self.id})"
 
 
+class DatasetBatch(models.Model):
+    """
+    Rows appended to a dataset after its upload. The dataset's data is the
+    original upload followed by its COMPLETED batches in ``number`` order;
+    each batch is profiled on its own and merged into the existing summary
+    (see appends.py).
+    """
+
+    STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("RUNNING", "Running"),
+        ("COMPLETED", "Completed"),
+        ("FAILED", "Failed"),
+    ]
+
+    dataset = models.ForeignKey(
+        Dataset, on_delete=models.CASCADE, related_name="batches"
+    )
+    # 1, 2, ...; the original upload is version 0 of the data.
+    number = models.PositiveIntegerField()
+    original_file = models.FileField(upload_to="datasets/")
+    columnar_file = models.FileField(upload_to="datasets/", null=True, blank=True)
+    # Issue rows of this batch only, numbered within the whole dataset.
+    quality_index = models.FileField(upload_to="datasets/", null=True, blank=True)
+    content_hash = models.CharField(max_length=64, null=True, blank=True)
+    # Position of the batch's first row in the dataset, and its row count;
+    # both set once the batch is merged.
+    row_offset = models.PositiveBigIntegerField(null=True, blank=True)
+    row_count = models.PositiveBigIntegerField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="PENDING")
+    error_message = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["number"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dataset", "number"], name="unique_dataset_batch"
+            )
+        ]
+
+    def __str__(self):
+        return f"Batch {self.number} of Dataset {self.dataset_id} [{self.status}]"
+
+
 class AnalysisResult(models.Model):
     STATUS_CHOICES = [
         ("PENDING", "Pending"),
@@ -27,9 +105,134 @@ class AnalysisResult(models.Model):
         Dataset, on_delete=models.CASCADE, related_name="analysis"
     )
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="PENDING")
-    summary_json = models.JSONField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     error_message = models.TextField(null=True, blank=True)
+    # Bumped each time profiling completes; caches derived from the data
+    # (e.g. SemanticAggregate) are keyed by it.
+    version = models.PositiveIntegerField(default=0)
+    # Small per-dataset summary for list views (see summaries.analysis_card).
+    card = models.JSONField(null=True, blank=True)
+    # Celery queue the last run was sent to and the cost estimate that
+    # chose it (see scheduling.estimate_analysis_cost).
+    queue = models.CharField(max_length=32, blank=True, default="")
+    estimated_cost = models.BigIntegerField(null=True, blank=True)
+    # Time and memory per stage and column of the last run (see
+    # diagnostics.Diagnostics.to_dict).
+    diagnostics = models.JSONField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Analysis for Dataset {self.dataset_id} [{self.status}]"
+
+
+class AnalysisSection(models.Model):
+    """
+    One top-level key of an analysis summary (columns, missing_values,
+    semantic_config, ...) stored as its own row, so readers load only the
+    sections they ask for and a config write does not rewrite the column
+    statistics. The columns section is split over several rows of up to
+    summaries.COLUMNS_PER_SECTION columns. See summaries.save_summary /
+    load_summary.
+    """
+
+    analysis = models.ForeignKey(
+        AnalysisResult, on_delete=models.CASCADE, related_name="sections"
+    )
+    name = models.CharField(max_length=64)
+    # Keeps the summary's key order when sections are reassembled.
+    position = models.PositiveIntegerField(default=0)
+    payload = models.JSONField(null=True, blank=True)
+    # SHA-256 of the payload; save_summary leaves unchanged sections alone.
+    digest = models.CharField(max_length=64, blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["position"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["analysis", "name"], name="unique_analysis_section"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.name} for Analysis {self.analysis_id}"
+
+
+class SemanticAggregate(models.Model):
+    """
+    One cached piece of ``semantic_aggregates`` (the target distribution, or
+    a single metric's by-target / over-time series), keyed by the analysis
+    version and the semantic_config fields it depends on.
+    """
+
+    KIND_CHOICES = [
+        ("target_distribution", "Target distribution"),
+        ("metrics_by_target", "Metric by target"),
+        ("metrics_over_time", "Metric over time"),
+    ]
+
+    STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("COMPLETED", "Completed"),
+        ("FAILED", "Failed"),
+    ]
+
+    dataset = models.ForeignKey(
+        Dataset, on_delete=models.CASCADE, related_name="semantic_aggregates"
+    )
+    cache_key = models.CharField(max_length=64)
+    version = models.PositiveIntegerField()
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    target_column = models.CharField(max_length=255, null=True, blank=True)
+    time_column = models.CharField(max_length=255, null=True, blank=True)
+    metric = models.CharField(max_length=255, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="PENDING")
+    # Null when the aggregate does not apply (e.g. a non-numeric metric).
+    payload = models.JSONField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dataset", "cache_key"], name="unique_semantic_aggregate"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for Dataset {self.dataset_id} [{self.status}]"
+
+
+class UploadSession(models.Model):
+    """
+    A resumable chunked upload: parts are PUT one by one into a directory
+    under MEDIA_ROOT and joined into the dataset file on completion (see
+    uploads.py). ASSEMBLING marks a session whose parts are being joined.
+    """
+
+    STATUS_CHOICES = [
+        ("OPEN", "Open"),
+        ("ASSEMBLING", "Assembling"),
+        ("COMPLETED", "Completed"),
+        ("ABORTED", "Aborted"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="upload_sessions"
+    )
+    filename = models.CharField(max_length=255)
+    name = models.CharField(max_length=255)
+    profiling_mode = models.CharField(
+        max_length=16, choices=Dataset.PROFILING_MODE_CHOICES, default="AUTO"
+    )
+    # Declared by the client; checked against the parts on completion.
+    total_size = models.PositiveBigIntegerField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="OPEN")
+    dataset = models.ForeignKey(
+        Dataset, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload {self.id} ({self.filename}) [{self.status}]"
@@ -0,0 +1,1339 @@
+from __future__ import annotations
+
+import logging
+import math
+import time
+import warnings
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import (
+    infer_dtype,
+    is_bool_dtype,
+    is_datetime64_any_dtype,
+    is_numeric_dtype,
+)
+
+from .sketches import (
+    HyperLogLog,
+    KLLSketch,
+    MisraGries,
+    ReservoirSample,
+    RunningMoments,
+)
+
+logger = logging.getLogger(__name__)
+
+# Called with a column subset (or None for all columns) and yields DataFrames.
+ChunkReader = Callable[[Optional[List[str]]], Iterable[pd.DataFrame]]
+# Receives {"type": "column", "column", "summary"} as each column finishes
+# and, when streaming, {"type": "chunk", "pass", "rows"} after each chunk.
+ProgressCallback = Callable[[Dict[str, Any]], None]
+# Receives (column, phase, seconds) for the work done on each column:
+# "inference", "describe", "value_counts", "histogram" and, when
+# streaming, "summary". Work shared by a numeric block is split evenly.
+ColumnTimer = Callable[[str, str, float], None]
+
+HISTOGRAM_BINS = 10
+TOP_VALUES = 10
+DESCRIBE_PERCENTILES = (0.25, 0.5, 0.75)
+# Numeric columns are widened to float64 a block at a time; the sort and
+# histogram binning take several temporaries of the block's size, so
+# blocks are kept under this however long the frame.
+NUMERIC_BLOCK_BYTES = 16 * 1024 * 1024
+
+# Approximate mode: the serialized sketches keep this many of each text
+# column's sampled values for re-inferring its type after a merge.
+SKETCH_RESERVOIR_ITEMS = 1_000
+
+# Type inference looks at a bounded sample and only scans the whole column
+# when the sample leaves the decision below this confidence.
+TYPE_SAMPLE_SIZE = 10_000
+TYPE_CONFIDENCE_THRESHOLD = 0.99
+# to_datetime falls back to per-value parsing, so it gets a smaller sample.
+DATETIME_SAMPLE_SIZE = 1_000
+DATETIME_RATIO = 0.8
+BOOL_TOKEN_PAIRS = [
+    {"true", "false"},
+    {"yes", "no"},
+    {"y", "n"},
+    {"t", "f"},
+    {"0", "1"},
+]
+
+
+def _inference(
+    col_type: str, confidence: float, sample_size: int, method: str
+) -> Dict[str, Any]:
+    return {
+        "type": col_type,
+        "confidence": round(float(confidence), 4),
+        "sample_size": int(sample_size),
+        "method": method,
+    }
+
+
+def _sample_non_null(
+    series: pd.Series, sample_size: int, seed: int = 0
+) -> Tuple[pd.Series, bool]:
+    """
+    Up to ``sample_size`` non-null values drawn uniformly from the column,
+    plus whether they are in fact all of its non-null values. Cost depends
+    on ``sample_size``, not on the column length.
+    """
+    if len(series) <= sample_size:
+        return series.dropna(), True
+
+    rng = np.random.default_rng(seed)
+    positions = np.sort(rng.integers(0, len(series), size=sample_size))
+    sample = series.iloc[positions].dropna()
+    if not sample.empty:
+        return sample, False
+
+    # Almost entirely null: the sample missed the values, so look at them all.
+    non_null = series.dropna()
+    if len(non_null) <= sample_size:
+        return non_null, True
+    positions = np.sort(rng.integers(0, len(non_null), size=sample_size))
+    return non_null.iloc[positions], False
+
+
+def _all_hold_confidence(sample_size: int) -> float:
+    """
+    Confidence that a rule which held for every sampled value holds for the
+    whole column: one minus the rule-of-three 95% upper bound on the rate
+    of values breaking it.
+    """
+    if sample_size <= 0:
+        return 0.0
+    return max(0.0, 1.0 - 3.0 / sample_size)
+
+
+def _ratio_confidence(ratio: float, threshold: float, sample_size: int) -> float:
+    """
+    Probability (normal approximation) that the column-wide ratio falls on
+    the same side of ``threshold`` as the sampled ``ratio``.
+    """
+    if sample_size <= 0:
+        return 0.0
+    std_error = math.sqrt(threshold * (1.0 - threshold) / sample_size)
+    z = abs(ratio - threshold) / std_error
+    return 0.5 * (1.0 + math.erf(z / math.sqrt(2.0)))
+
+
+def _is_binary(values: np.ndarray) -> bool:
+    # At most two distinct values, both truncating to 0 or 1.
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return False
+    low, high = values.min(), values.max()
+    if not ((values == low) | (values == high)).all():
+        return False
+    return np.trunc(low) >= 0 and np.trunc(high) <= 1
+
+
+def _boolean_pair(tokens: Iterable[str]) -> Optional[set]:
+    tokens = set(tokens)
+    for pair in BOOL_TOKEN_PAIRS:
+        if tokens.issubset(pair):
+            return pair
+    return None
+
+
+def _is_text(series: pd.Series) -> bool:
+    # Categoricals come from compaction.py and only ever hold strings.
+    return series.dtype == "object" or isinstance(series.dtype, pd.CategoricalDtype)
+
+
+def _datetime_ratio(values: pd.Series) -> float:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=UserWarning)
+        parsed = pd.to_datetime(values, errors="coerce", utc=False)
+    return float(parsed.notna().mean())
+
+
+def infer_column_type_details(
+    series: pd.Series,
+    name: str,
+    sample_size: int = TYPE_SAMPLE_SIZE,
+    confidence_threshold: float = TYPE_CONFIDENCE_THRESHOLD,
+    population: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Infer a semantic column type with extra logic for:
+    - boolean-like numeric (0/1)
+    - boolean-like strings (true/false, yes/no, etc.)
+    - datetime in object columns via to_datetime sampling
+
+    Checks run on a bounded uniform sample first and escalate to the whole
+    column only when the sample leaves the decision below
+    ``confidence_threshold``. Returns the type with its confidence, the
+    number of values examined and whether that was a ``sample``, a
+    ``full`` scan or the ``dtype`` alone.
+
+    ``population`` is for callers passing a sample themselves (e.g. a
+    streaming reservoir): the number of non-null values it stands for. Such
+    inputs are never escalated.
+    """
+    try:
+        dtype_str = str(series.dtype)
+        logger.debug("Inferring type for column '%s' with dtype '%s'", name, dtype_str)
+
+        # 1) Explicit boolean / datetime dtypes
+        if is_bool_dtype(series):
+            logger.debug("Column '%s' detected as boolean (native bool dtype)", name)
+            return _inference("boolean", 1.0, 0, "dtype")
+
+        if is_datetime64_any_dtype(series):
+            logger.debug("Column '%s' detected as datetime (native datetime64)", name)
+            return _inference("datetime", 1.0, 0, "dtype")
+
+        if not is_numeric_dtype(series) and not _is_text(series):
+            # 2) Fallback: other dtypes
+            logger.debug("Column '%s' treated as 'other' (dtype=%s)", name, dtype_str)
+            return _inference("other", 1.0, 0, "dtype")
+
+        can_escalate = population is None
+        sample, exact = _sample_non_null(series, sample_size)
+        if population is not None:
+            exact = population <= len(sample)
+        method = "full" if exact else "sample"
+
+        # 3) Numeric with possible 0/1 boolean-like values
+        if is_numeric_dtype(series):
+            values = sample.to_numpy(dtype="float64", na_value=np.nan)
+            # A non-binary value in the sample settles it; an all-binary
+            # sample is only as good as its size.
+            if _is_binary(values) and not exact:
+                confidence = _all_hold_confidence(len(values))
+                if confidence < confidence_threshold and can_escalate:
+                    values = series.to_numpy(dtype="float64", na_value=np.nan)
+                    values = values[~np.isnan(values)]
+                    confidence, method = 1.0, "full"
+            else:
+                confidence = 1.0
+            if _is_binary(values):
+                logger.debug(
+                    "Column '%s' numeric but binary {0,1} -> treating as boolean",
+                    name,
+                )
+                return _inference("boolean", confidence, values.size, method)
+            logger.debug("Column '%s' detected as numeric", name)
+            return _inference("numeric", confidence, values.size, method)
+
+        # 4) Object-like: try boolean-like strings first
+        if sample.empty:
+            logger.debug("Column '%s' treated as categorical (object)", name)
+            return _inference("categorical", 1.0, 0, "full")
+
+        tokens = {str(v).strip().lower() for v in pd.unique(sample)}
+        pair = _boolean_pair(tokens)
+        if pair is not None:
+            confidence = 1.0 if exact else _all_hold_confidence(len(sample))
+            if confidence < confidence_threshold and can_escalate:
+                tokens = {str(v).strip().lower() for v in series.dropna().unique()}
+                pair = _boolean_pair(tokens)
+                confidence, method = 1.0, "full"
+            if pair is not None:
+                logger.debug(
+                    "Column '%s' object but boolean-like strings %s -> boolean",
+                    name,
+                    pair,
+                )
+                return _inference("boolean", confidence, len(sample), method)
+
+        # 5) Try datetime coercion on object columns
+        dt_sample = sample.iloc[:DATETIME_SAMPLE_SIZE]
+        dt_exact = exact and len(dt_sample) == len(sample)
+        dt_method = "full" if dt_exact else "sample"
+        try:
+            ratio = _datetime_ratio(dt_sample)
+            confidence = (
+                1.0
+                if dt_exact
+                else _ratio_confidence(ratio, DATETIME_RATIO, len(dt_sample))
+            )
+            if confidence < confidence_threshold and can_escalate:
+                dt_sample = series.dropna()
+                ratio = _datetime_ratio(dt_sample)
+                confidence, dt_method = 1.0, "full"
+            logger.debug(
+                "Column '%s' datetime coercion non-null ratio = %.3f",
+                name,
+                ratio,
+            )
+            if ratio >= DATETIME_RATIO:
+                logger.debug(
+                    "Column '%s' treated as datetime (object -> datetime)",
+                    name,
+                )
+                return _inference("datetime", confidence, len(dt_sample), dt_method)
+        except Exception:
+            logger.debug(
+                "Column '%s' datetime coercion failed, leaving as categorical",
+                name,
+            )
+            confidence = 1.0
+
+        logger.debug("Column '%s' treated as categorical (object)", name)
+        return _inference("categorical", confidence, len(dt_sample), dt_method)
+
+    except Exception:
+        logger.exception("Failed to infer type for column '%s'", name)
+        return _inference("other", 0.0, 0, "dtype")
+
+
+def infer_column_type(series: pd.Series, name: str) -> str:
+    return infer_column_type_details(series, name)["type"]
+
+
+def _type_inference_summary(inference: Dict[str, Any]) -> Dict[str, Any]:
+    # What gets stored next to "type" in each column summary.
+    return {
+        "confidence": inference["confidence"],
+        "sample_size": inference["sample_size"],
+        "method": inference["method"],
+    }
+
+
+def _format_bin_label(left: float, right: float) -> str:
+    return f"{float(left):.2f}–{float(right):.2f}"
+
+
+def histogram_edges(min_value: float, max_value: float) -> np.ndarray:
+    """
+    Bin edges equivalent to ``Series.value_counts(bins=10)``: equal-width,
+    right-closed bins whose first edge is nudged left by 0.1% of the range.
+    """
+    if min_value == max_value:
+        adj = 0.001 * abs(min_value) if min_value != 0 else 0.001
+        return np.linspace(min_value - adj, max_value + adj, HISTOGRAM_BINS + 1)
+
+    edges = np.linspace(min_value, max_value, HISTOGRAM_BINS + 1)
+    edges[0] -= (max_value - min_value) * 0.001
+    return edges
+
+
+def bin_counts(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    # Intervals are (left, right], so a value equal to an edge belongs to
+    # the bin on its left.
+    idx = np.searchsorted(edges, values, side="left") - 1
+    idx = np.clip(idx, 0, HISTOGRAM_BINS - 1)
+    return np.bincount(idx, minlength=HISTOGRAM_BINS)
+
+
+def _round_edge(value: float, precision: int = 3) -> float:
+    # pandas.cut rounds interval breaks like this before building labels.
+    if not np.isfinite(value) or value == 0:
+        return value
+    frac, whole = np.modf(value)
+    if whole == 0:
+        digits = -int(np.floor(np.log10(abs(frac)))) - 1 + precision
+    else:
+        digits = precision
+    return float(np.around(value, digits))
+
+
+def histogram_rows(edges: np.ndarray, counts: np.ndarray) -> List[Dict[str, Any]]:
+    labels = [_round_edge(edge) for edge in edges]
+    # value_counts(bins=...) uses include_lowest, which lowers the first
+    # displayed break by one unit of precision.
+    labels[0] -= 0.001
+    return [
+        {
+            "bin": _format_bin_label(labels[i], labels[i + 1]),
+            "count": int(counts[i]),
+        }
+        for i in range(HISTOGRAM_BINS)
+    ]
+
+
+def _block_quantiles(
+    block: np.ndarray, count: np.ndarray, qs: Iterable[float]
+) -> List[np.ndarray]:
+    """
+    Linearly interpolated quantiles per column, from one column-wise sort.
+    NaNs sort to the end, so each column's valid values are its first
+    ``count`` rows; ``nanpercentile`` would instead loop over columns in
+    Python whenever any NaN is present.
+    """
+    if block.shape[0] == 0:
+        return [np.full(block.shape[1], np.nan) for _ in qs]
+
+    ordered = np.sort(block, axis=0)
+    last = np.maximum(count - 1, 0)
+    out = []
+    for q in qs:
+        position = q * last
+        lower = np.floor(position).astype("int64")
+        upper = np.minimum(lower + 1, last)
+        low_values = np.take_along_axis(ordered, lower[None, :], axis=0)[0]
+        high_values = np.take_along_axis(ordered, upper[None, :], axis=0)[0]
+        values = low_values + (high_values - low_values) * (position - lower)
+        values[count == 0] = np.nan
+        out.append(values)
+    return out
+
+
+def _numeric_block_stats(block: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Column-wise describe() statistics for a 2-D float block (rows x columns)
+    in a handful of NumPy reductions instead of one describe() per column.
+    """
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        valid = ~np.isnan(block)
+        count = valid.sum(axis=0)
+        mean = np.nanmean(block, axis=0)
+        std = np.nanstd(block, axis=0, ddof=1)
+        std[count < 2] = np.nan
+        min_value = np.nanmin(block, axis=0, initial=np.inf)
+        max_value = np.nanmax(block, axis=0, initial=-np.inf)
+        min_value[count == 0] = np.nan
+        max_value[count == 0] = np.nan
+        q25, q50, q75 = _block_quantiles(block, count, DESCRIBE_PERCENTILES)
+        # Mirrors infer_column_type: at most two distinct values that both
+        # truncate to 0 or 1.
+        two_valued = ((block == min_value) | (block == max_value) | ~valid).all(axis=0)
+        binary = (
+            two_valued
+            & (count > 0)
+            & (np.trunc(min_value) >= 0)
+            & (np.trunc(max_value) <= 1)
+        )
+
+    return {
+        "count": count,
+        "mean": mean,
+        "std": std,
+        "min": min_value,
+        "25%": q25,
+        "50%": q50,
+        "75%": q75,
+        "max": max_value,
+        "binary": binary,
+    }
+
+
+def _numeric_block_histograms(
+    block: np.ndarray, min_value: np.ndarray, max_value: np.ndarray
+) -> List[Optional[List[Dict[str, Any]]]]:
+    """
+    ``value_counts(bins=10)`` for every column of ``block`` at once: bin
+    indices come from one broadcast expression and the counts from a single
+    ``bincount`` over (column, bin) keys.
+    """
+    n_cols = block.shape[1]
+    if n_cols == 0:
+        # Every column of the block turned out to be 0/1.
+        return []
+    has_values = ~np.isnan(min_value)
+    edges = np.vstack(
+        [
+            (
+                histogram_edges(min_value[i], max_value[i])
+                if has_values[i]
+                else np.zeros(HISTOGRAM_BINS + 1)
+            )
+            for i in range(n_cols)
+        ]
+    )
+    width = edges[:, 2] - edges[:, 1]
+    width[width == 0] = 1.0
+    origin = edges[:, 1] - width
+
+    # In place: each temporary here is the size of the block.
+    with np.errstate(invalid="ignore"):
+        idx = block - origin
+        idx /= width
+        np.ceil(idx, out=idx)
+        idx -= 1
+    valid = ~np.isnan(idx)
+    idx[~valid] = 0
+    idx = np.clip(idx, 0, HISTOGRAM_BINS - 1, out=idx).astype("int64")
+
+    # The division can land a value sitting exactly on an edge one bin off;
+    # nudge it back against the real (left, right] edges.
+    columns = np.arange(n_cols, dtype="int64")
+    with np.errstate(invalid="ignore"):
+        idx -= (block <= edges[columns, idx]) & (idx > 0)
+        idx += (block > edges[columns, idx + 1]) & (idx < HISTOGRAM_BINS - 1)
+
+    idx += columns * HISTOGRAM_BINS
+    counts = np.bincount(idx[valid], minlength=n_cols * HISTOGRAM_BINS).reshape(
+        n_cols, HISTOGRAM_BINS
+    )
+
+    return [
+        histogram_rows(edges[i], counts[i]) if has_values[i] else None
+        for i in range(n_cols)
+    ]
+
+
+def _category_value_counts(series: pd.Series) -> pd.Series:
+    """
+    ``value_counts(dropna=False)`` of a Categorical from a bincount of its
+    codes. Keys are put in order of first appearance before sorting by
+    count, as the hash pass over the object column would leave them, so
+    ties come out in the same order.
+    """
+    slots = series.cat.codes.to_numpy().astype("int64") + 1
+    counts = np.bincount(slots, minlength=len(series.cat.categories) + 1)
+    first = np.full(counts.size, slots.size, dtype="int64")
+    np.minimum.at(first, slots, np.arange(slots.size))
+    seen = np.flatnonzero(counts)
+    seen = seen[np.argsort(first[seen], kind="stable")]
+    keys = np.concatenate(
+        [[np.nan], series.cat.categories.to_numpy(dtype=object)]
+    ).astype(object)
+    vc = pd.Series(counts[seen], index=pd.Index(keys[seen], dtype=object))
+    return vc.sort_values(ascending=False)
+
+
+def _value_counts(series: pd.Series) -> pd.Series:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return _category_value_counts(series)
+    return series.value_counts(dropna=False)
+
+
+def _text_keys(keys: pd.Index) -> bool:
+    # str() keeps text keys apart, unless NaN ("nan") meets a literal "nan".
+    if infer_dtype(keys, skipna=True) != "string":
+        return False
+    return not (keys.hasnans and (keys.to_numpy(dtype=object) == "nan").any())
+
+
+def _str_value_counts(series: pd.Series) -> pd.Series:
+    """
+    ``series.astype(str).value_counts()``, counted on the values themselves
+    so text columns are not copied into a second column of strings.
+    """
+    vc = _value_counts(series)
+    if not _text_keys(vc.index):
+        return series.astype(str).value_counts()
+    vc.index = vc.index.map(str)
+    return vc
+
+
+def _value_counts_summary(series: pd.Series) -> Dict[str, Any]:
+    """
+    Object/bool describe() plus the top string value counts from a single
+    hash pass over the column (a bincount of the codes for Categoricals).
+    """
+    vc = _value_counts(series)
+    non_null = vc[vc.index.notna()]
+
+    count = int(non_null.sum())
+    if count:
+        describe = {
+            "count": count,
+            "unique": int(len(non_null)),
+            "top": non_null.index[0],
+            "freq": int(non_null.iloc[0]),
+        }
+        if isinstance(describe["top"], np.generic):
+            describe["top"] = describe["top"].item()
+    else:
+        describe = {"count": 0, "unique": 0, "top": np.nan, "freq": np.nan}
+
+    # Same keys as ``series.astype(str).value_counts()``: NaN becomes "nan".
+    # Text keys stay distinct as strings, so only the top ones are renamed.
+    if _text_keys(vc.index):
+        by_str = vc.head(TOP_VALUES)
+        by_str.index = by_str.index.map(str)
+    else:
+        by_str = vc.groupby(vc.index.map(str), sort=False, dropna=False).sum()
+        by_str = by_str.sort_values(ascending=False, kind="stable").head(TOP_VALUES)
+    value_counts = [
+        {"value": value, "count": int(count)} for value, count in by_str.items()
+    ]
+    return {"describe": describe, "value_counts": value_counts}
+
+
+@contextmanager
+def _timed(timer: Optional[ColumnTimer], column: str, phase: str) -> Iterator[None]:
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer(column, phase, time.perf_counter() - start)
+
+
+def _time_shared(
+    timer: Optional[ColumnTimer], columns: List[str], phase: str, seconds: float
+) -> None:
+    for column in columns:
+        timer(column, phase, seconds / len(columns))
+
+
+def profile_dataframe(
+    df: pd.DataFrame,
+    dataset_id: Optional[int] = None,
+    batch_columns: int = 256,
+    progress: Optional[ProgressCallback] = None,
+    timer: Optional[ColumnTimer] = None,
+) -> Dict[str, Any]:
+    """
+    Build the ``summary_json`` payload for a fully loaded DataFrame.
+
+    Numeric columns are profiled together as 2-D float blocks of up to
+    ``batch_columns`` columns and NUMERIC_BLOCK_BYTES (counts, moments,
+    quantiles, min/max and histograms as axis-0 reductions); other columns
+    get one ``value_counts`` pass each that feeds both describe() and the
+    top values. Compacted frames (see compaction.py) give the same
+    summary as their float64 / object originals. ``timer`` receives the
+    time spent per column and phase.
+    """
+    result: Dict[str, Any] = {
+        "row_count": int(len(df)),
+        "column_count": int(len(df.columns)),
+        "columns": {},
+        "missing_values": df.isnull().sum().to_dict(),
+    }
+    summaries: Dict[int, Dict[str, Any]] = {}
+
+    numeric_positions = [
+        i
+        for i, dtype in enumerate(df.dtypes)
+        if is_numeric_dtype(dtype) and not is_bool_dtype(dtype)
+    ]
+    block_columns = max(
+        1, min(batch_columns, NUMERIC_BLOCK_BYTES // max(8 * len(df), 1))
+    )
+    for start in range(0, len(numeric_positions), block_columns):
+        positions = numeric_positions[start : start + block_columns]
+        block_start = time.perf_counter()
+        block = df.iloc[:, positions].to_numpy(dtype="float64", na_value=np.nan)
+        stats = _numeric_block_stats(block)
+        numeric_type = np.where(stats.pop("binary"), "boolean", "numeric")
+        numeric = numeric_type == "numeric"
+        histogram_start = time.perf_counter()
+        histograms = _numeric_block_histograms(
+            block if numeric.all() else block[:, numeric],
+            stats["min"][numeric],
+            stats["max"][numeric],
+        )
+        histograms_iter = iter(histograms)
+        if timer is not None:
+            names = [df.columns[pos] for pos in positions]
+            _time_shared(timer, names, "describe", histogram_start - block_start)
+            _time_shared(
+                timer,
+                [name for name, is_numeric in zip(names, numeric) if is_numeric],
+                "histogram",
+                time.perf_counter() - histogram_start,
+            )
+
+        for j, pos in enumerate(positions):
+            # The block reductions already looked at every value, so the
+            # 0/1 check is exact.
+            col_summary: Dict[str, Any] = {
+                "type": str(numeric_type[j]),
+                "type_inference": _type_inference_summary(
+                    _inference("", 1.0, stats["count"][j], "full")
+                ),
+                "describe": {key: float(values[j]) for key, values in stats.items()},
+            }
+            if col_summary["type"] == "numeric":
+                histogram = next(histograms_iter)
+                if histogram is not None:
+                    col_summary["histogram"] = histogram
+            else:
+                with _timed(timer, df.columns[pos], "value_counts"):
+                    col_summary["value_counts"] = _value_counts_summary(
+                        df.iloc[:, pos]
+                    )["value_counts"]
+            summaries[pos] = col_summary
+            if progress is not None:
+                progress(
+                    {
+                        "type": "column",
+                        "column": df.columns[pos],
+                        "summary": col_summary,
+                    }
+                )
+
+    for pos, col in enumerate(df.columns):
+        if pos in summaries:
+            continue
+        series = df.iloc[:, pos]
+        with _timed(timer, col, "inference"):
+            inference = infer_column_type_details(series, col)
+        col_type = inference["type"]
+        col_summary = {
+            "type": col_type,
+            "type_inference": _type_inference_summary(inference),
+        }
+
+        try:
+            if _is_text(series) or is_bool_dtype(series):
+                with _timed(timer, col, "value_counts"):
+                    counted = _value_counts_summary(series)
+                col_summary["describe"] = counted["describe"]
+                if col_type in ("categorical", "boolean"):
+                    col_summary["value_counts"] = counted["value_counts"]
+            else:
+                with _timed(timer, col, "describe"):
+                    col_summary["describe"] = series.describe(include="all").to_dict()
+        except Exception:
+            logger.exception(
+                "Failed to profile column '%s' in dataset %s",
+                col,
+                dataset_id,
+            )
+            col_summary.setdefault("describe", {})
+        summaries[pos] = col_summary
+        if progress is not None:
+            progress({"type": "column", "column": col, "summary": col_summary})
+
+    for pos, col in enumerate(df.columns):
+        result["columns"][col] = summaries[pos]
+        logger.debug(
+            "Column '%s' summary stored with type '%s' (keys=%s)",
+            col,
+            summaries[pos]["type"],
+            list(summaries[pos].keys()),
+        )
+
+    return result
+
+
+class _DistinctBudget:
+    """
+    Distinct values the columns of one profile may still hold exactly. It
+    is shared by all columns, so memory stays bounded however wide the
+    dataset is.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.remaining = limit
+
+
+def _present_keys(vc: pd.Series, missing: int) -> np.ndarray:
+    # The string value-count keys, without the "nan" that missing values
+    # become.
+    keys = vc.index.to_numpy(dtype=object)
+    return keys[keys != "nan"] if missing else keys
+
+
+class _StreamingColumn:
+    """
+    Partial statistics for one column, fed one chunk at a time.
+
+    The physical kind (numeric vs. everything else) is fixed by the first
+    chunk holding a non-null value; before that the column is only counting
+    nulls, which mirrors pandas typing an all-null column as float64.
+    Numeric 0/1 detection is exact; other columns are typed at the end from
+    a reservoir sample of their non-null values. Distinct values are kept
+    exactly while the profile's shared budget allows, then counted with a
+    HyperLogLog.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        top_capacity: int,
+        distinct_budget: Optional[_DistinctBudget],
+        sketch_k: int,
+        hll_precision: int = 12,
+    ) -> None:
+        self.name = name
+        self.top_capacity = top_capacity
+        self.distinct_budget = distinct_budget
+        self.sketch_k = sketch_k
+        self.hll_precision = hll_precision
+
+        self.kind: Optional[str] = None
+        self.inference: Optional[Dict[str, Any]] = None
+        self.is_bool = False
+        self.missing = 0
+        self.count = 0
+        self.coerced = 0
+
+        self.moments = RunningMoments()
+        self.quantiles = KLLSketch(k=sketch_k)
+        # Distinct non-null values while the column still looks like 0/1.
+        self.binary_values: Optional[set] = set()
+        self.binary_counts: Dict[str, int] = {}
+
+        self.top = MisraGries(capacity=top_capacity)
+        self.distinct: Optional[set] = set()
+        self.hll: Optional[HyperLogLog] = None
+        self.reservoir = ReservoirSample(capacity=TYPE_SAMPLE_SIZE)
+
+        self.edges: Optional[np.ndarray] = None
+        self.hist_counts: Optional[np.ndarray] = None
+
+    def _start(self, series: pd.Series) -> None:
+        self.is_bool = is_bool_dtype(series)
+        self.kind = (
+            "numeric" if is_numeric_dtype(series) and not self.is_bool else "object"
+        )
+
+    def update(self, series: pd.Series) -> None:
+        missing = int(series.isna().sum())
+        self.missing += missing
+
+        if self.kind is None:
+            if missing == len(series):
+                return
+            self._start(series)
+
+        if self.kind == "numeric":
+            self._update_numeric(series)
+        else:
+            self._update_object(series, missing)
+
+    def _update_numeric(self, series: pd.Series) -> None:
+        if not is_numeric_dtype(series) or is_bool_dtype(series):
+            numeric = pd.to_numeric(series, errors="coerce")
+            coerced = int(numeric.isna().sum() - series.isna().sum())
+            if coerced and not self.coerced:
+                logger.warning(
+                    "Column '%s' has non-numeric values after the first chunk; "
+                    "treating them as missing for statistics",
+                    self.name,
+                )
+            self.coerced += coerced
+            series = numeric
+
+        values = series.to_numpy(dtype="float64", na_value=np.nan)
+        values = values[~np.isnan(values)]
+        self.count += int(values.size)
+        self.moments.update(values)
+        self.quantiles.update(values)
+
+        if self.binary_values is not None and values.size:
+            self.binary_values.update(np.unique(values).tolist())
+            if len(self.binary_values) > 2:
+                self.binary_values = None
+                self.binary_counts = {}
+            else:
+                for key, count in series.astype(str).value_counts().items():
+                    self.binary_counts[key] = self.binary_counts.get(key, 0) + int(
+                        count
+                    )
+
+    def _update_object(self, series: pd.Series, missing: int) -> None:
+        self.count += len(series) - missing
+
+        vc = _str_value_counts(series)
+        self.top.update(vc.index, vc.to_numpy())
+        self.reservoir.update(series.dropna().to_numpy(dtype=object))
+
+        if self.distinct is None:
+            self.hll.update(_present_keys(vc, missing))
+            return
+        before = len(self.distinct)
+        self.distinct.update(pd.unique(series.dropna()).tolist())
+        self.distinct_budget.remaining -= len(self.distinct) - before
+        if self.distinct_budget.remaining < 0:
+            self._estimate_distinct()
+
+    def _estimate_distinct(self) -> None:
+        # Hand the exact values back to the budget and count from here on
+        # with a HyperLogLog, fed the same strings as the value counts.
+        logger.info(
+            "Column '%s' has %s distinct values so far; estimating the rest",
+            self.name,
+            len(self.distinct),
+        )
+        self.distinct_budget.remaining += len(self.distinct)
+        self.hll = HyperLogLog(precision=self.hll_precision)
+        self.hll.update(np.array([str(value) for value in self.distinct], dtype=object))
+        self.distinct = None
+
+    def type_inference(self) -> Dict[str, Any]:
+        if self.inference is not None:
+            return self.inference
+
+        if self.kind == "object":
+            self.inference = infer_column_type_details(
+                pd.Series(self.reservoir.items, dtype=object),
+                self.name,
+                population=self.reservoir.seen,
+            )
+            return self.inference
+
+        col_type = "numeric"
+        if self.kind == "numeric":
+            try:
+                normalized = {int(v) for v in self.binary_values or ()}
+            except Exception:
+                normalized = set()
+            if normalized and normalized.issubset({0, 1}):
+                col_type = "boolean"
+        self.inference = _inference(col_type, 1.0, self.moments.count, "full")
+        return self.inference
+
+    @property
+    def column_type(self) -> str:
+        return self.type_inference()["type"]
+
+    def wants_histogram(self) -> bool:
+        return self.column_type == "numeric" and self.moments.count > 0
+
+    def start_histogram(self) -> None:
+        self.edges = histogram_edges(self.moments.min, self.moments.max)
+        self.hist_counts = np.zeros(HISTOGRAM_BINS, dtype="int64")
+
+    def update_histogram(self, series: pd.Series) -> None:
+        values = pd.to_numeric(series, errors="coerce").to_numpy(
+            dtype="float64", na_value=np.nan
+        )
+        values = values[~np.isnan(values)]
+        if values.size:
+            self.hist_counts += bin_counts(values, self.edges)
+
+    def _describe_numeric(self) -> Dict[str, Any]:
+        q25, q50, q75 = self.quantiles.quantiles(DESCRIBE_PERCENTILES)
+        nan = float("nan")
+        return {
+            "count": float(self.moments.count),
+            "mean": self.moments.mean if self.moments.count else nan,
+            "std": self.moments.std,
+            "min": self.moments.min if self.moments.count else nan,
+            "25%": q25,
+            "50%": q50,
+            "75%": q75,
+            "max": self.moments.max if self.moments.count else nan,
+        }
+
+    def _describe_object(self) -> Dict[str, Any]:
+        if self.count == 0:
+            return {"count": 0, "unique": 0, "top": float("nan"), "freq": float("nan")}
+
+        top_key, top_count = next(
+            (
+                (key, count)
+                for key, count in self.top.top(self.top_capacity)
+                if not (key == "nan" and self.missing)
+            ),
+            (None, 0),
+        )
+        if self.is_bool:
+            top_key = {"True": True, "False": False}.get(top_key, top_key)
+
+        unique = (
+            len(self.distinct)
+            if self.distinct is not None
+            else round(self.hll.estimate())
+        )
+        return {
+            "count": int(self.count),
+            "unique": int(unique),
+            "top": top_key,
+            "freq": int(top_count),
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        col_type = self.column_type
+        col_summary: Dict[str, Any] = {
+            "type": col_type,
+            "type_inference": _type_inference_summary(self.type_inference()),
+        }
+
+        if self.kind == "object":
+            col_summary["describe"] = self._describe_object()
+        else:
+            col_summary["describe"] = self._describe_numeric()
+
+        if self.hist_counts is not None:
+            col_summary["histogram"] = histogram_rows(self.edges, self.hist_counts)
+
+        if col_type in ("categorical", "boolean"):
+            if self.kind == "numeric":
+                top = sorted(
+                    self.binary_counts.items(), key=lambda item: item[1], reverse=True
+                )[:TOP_VALUES]
+            else:
+                top = self.top.top(TOP_VALUES)
+            col_summary["value_counts"] = [
+                {"value": str(value), "count": int(count)} for value, count in top
+            ]
+
+        return col_summary
+
+
+class _SketchColumn(_StreamingColumn):
+    """
+    Single-pass, fixed-memory column statistics for approximate profiling:
+    KLL quantiles (the histogram is read off the same sketch, so there is
+    no second pass), HyperLogLog distinct counts and Misra-Gries top
+    values. Count, missing, mean, std, min and max stay exact. Every sketch
+    is mergeable and serializable (``to_dict`` / ``from_dict``), so
+    partitions or appended data can be combined without rereading rows.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        top_capacity: int,
+        sketch_k: int,
+        hll_precision: int,
+    ) -> None:
+        super().__init__(name, top_capacity, None, sketch_k, hll_precision)
+        self.distinct = None
+        self.hll = HyperLogLog(precision=hll_precision)
+
+    def _update_object(self, series: pd.Series, missing: int) -> None:
+        self.count += len(series) - missing
+
+        vc = _str_value_counts(series)
+        self.top.update(vc.index, vc.to_numpy())
+        self.reservoir.update(series.dropna().to_numpy(dtype=object))
+        self.hll.update(_present_keys(vc, missing))
+
+    def wants_histogram(self) -> bool:
+        return False
+
+    def _histogram(self) -> Optional[List[Dict[str, Any]]]:
+        if self.column_type != "numeric" or self.moments.count == 0:
+            return None
+        edges = histogram_edges(self.moments.min, self.moments.max)
+        at_most = self.quantiles.counts_at_most(edges)
+        counts = np.rint(np.diff(at_most)).astype("int64")
+        return histogram_rows(edges, counts)
+
+    def _describe_object(self) -> Dict[str, Any]:
+        describe = super()._describe_object()
+        if self.count:
+            describe["unique"] = int(round(self.hll.estimate()))
+        return describe
+
+    def error_bounds(self) -> Dict[str, Any]:
+        """
+        How far each approximate statistic may be off: quantile answers by
+        ``rank_error`` (as a fraction of the count), histogram bins by
+        ``count_error`` rows, ``unique`` by ``relative_error`` (standard
+        error) and top-value counts by at most ``count_error`` (they are
+        lower bounds).
+        """
+        if self.kind == "numeric":
+            rank_error = self.quantiles.rank_error
+            return {
+                "quantiles": {"rank_error": rank_error},
+                "histogram": {
+                    "count_error": int(math.ceil(2 * rank_error * self.quantiles.n))
+                },
+            }
+        if self.kind == "object":
+            return {
+                "unique": {"relative_error": self.hll.relative_error},
+                "top_values": {"count_error": int(self.top.error)},
+            }
+        return {}
+
+    def summary(self) -> Dict[str, Any]:
+        col_summary = super().summary()
+        histogram = self._histogram()
+        if histogram is not None:
+            col_summary["histogram"] = histogram
+        col_summary["error_bounds"] = self.error_bounds()
+        return col_summary
+
+    def merge(self, other: "_SketchColumn") -> None:
+        if other.kind is None:
+            self.missing += other.missing
+            return
+        if self.kind is None:
+            self.kind, self.is_bool = other.kind, other.is_bool
+        self.missing += other.missing
+        self.count += other.count
+        self.coerced += other.coerced
+        self.inference = None
+
+        self.moments.merge(other.moments)
+        self.quantiles.merge(other.quantiles)
+        if self.binary_values is not None and other.binary_values is not None:
+            self.binary_values.update(other.binary_values)
+            for key, count in other.binary_counts.items():
+                self.binary_counts[key] = self.binary_counts.get(key, 0) + count
+            if len(self.binary_values) > 2:
+                self.binary_values, self.binary_counts = None, {}
+        else:
+            self.binary_values, self.binary_counts = None, {}
+        self.top.merge(other.top)
+        self.hll.merge(other.hll)
+        self.reservoir.merge(other.reservoir)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "is_bool": self.is_bool,
+            "missing": self.missing,
+            "count": self.count,
+            "coerced": self.coerced,
+            "binary_values": (
+                sorted(self.binary_values) if self.binary_values is not None else None
+            ),
+            "binary_counts": self.binary_counts,
+            "moments": self.moments.to_dict(),
+            "quantiles": self.quantiles.to_dict(),
+            "top": self.top.to_dict(),
+            "hll": self.hll.to_dict(),
+            "reservoir": self.reservoir.to_dict(limit=SKETCH_RESERVOIR_ITEMS),
+        }
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict[str, Any]) -> "_SketchColumn":
+        column = cls(
+            name,
+            top_capacity=int(data["top"]["capacity"]),
+            sketch_k=int(data["quantiles"]["k"]),
+            hll_precision=int(data["hll"]["precision"]),
+        )
+        column.kind = data["kind"]
+        column.is_bool = bool(data["is_bool"])
+        column.missing = int(data["missing"])
+        column.count = int(data["count"])
+        column.coerced = int(data["coerced"])
+        binary_values = data["binary_values"]
+        column.binary_values = set(binary_values) if binary_values is not None else None
+        column.binary_counts = {
+            key: int(count) for key, count in data["binary_counts"].items()
+        }
+        column.moments = RunningMoments.from_dict(data["moments"])
+        column.quantiles = KLLSketch.from_dict(data["quantiles"])
+        column.top = MisraGries.from_dict(data["top"])
+        column.hll = HyperLogLog.from_dict(data["hll"])
+        column.reservoir = ReservoirSample.from_dict(data["reservoir"])
+        return column
+
+
+def _column_summaries(
+    columns: Dict[str, _StreamingColumn], timer: Optional[ColumnTimer]
+) -> Dict[str, Dict[str, Any]]:
+    summaries = {}
+    for name, state in columns.items():
+        with _timed(timer, name, "summary"):
+            summaries[name] = state.summary()
+    return summaries
+
+
+class SketchProfiler:
+    """
+    Approximate counterpart to :class:`StreamingProfiler`: one pass, fixed
+    memory per column, and a result that carries per-statistic
+    ``error_bounds``. ``to_dict`` serializes the sketches so a later
+    ``merge`` (another partition, appended rows) costs only the new data.
+    """
+
+    def __init__(
+        self,
+        top_capacity: int = 1024,
+        sketch_k: int = 200,
+        hll_precision: int = 12,
+    ) -> None:
+        self.top_capacity = top_capacity
+        self.sketch_k = sketch_k
+        self.hll_precision = hll_precision
+        self.row_count = 0
+        self.columns: Dict[str, _SketchColumn] = {}
+
+    def _column(self, name: str) -> _SketchColumn:
+        if name not in self.columns:
+            self.columns[name] = _SketchColumn(
+                name, self.top_capacity, self.sketch_k, self.hll_precision
+            )
+        return self.columns[name]
+
+    def update(self, chunk: pd.DataFrame, timer: Optional[ColumnTimer] = None) -> None:
+        self.row_count += int(len(chunk))
+        for name in chunk.columns:
+            with _timed(timer, name, "describe"):
+                self._column(name).update(chunk[name])
+
+    def merge(self, other: "SketchProfiler") -> None:
+        """
+        Fold in another profile of the same columns over different rows.
+        """
+        self.row_count += other.row_count
+        for name, column in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(column)
+            else:
+                self.columns[name] = column
+
+    def result(self, timer: Optional[ColumnTimer] = None) -> Dict[str, Any]:
+        return {
+            "row_count": int(self.row_count),
+            "column_count": int(len(self.columns)),
+            "columns": _column_summaries(self.columns, timer),
+            "missing_values": {
+                name: int(state.missing) for name, state in self.columns.items()
+            },
+            "approximate": True,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "row_count": self.row_count,
+            "columns": {name: state.to_dict() for name, state in self.columns.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SketchProfiler":
+        profiler = cls()
+        profiler.row_count = int(data["row_count"])
+        profiler.columns = {
+            name: _SketchColumn.from_dict(name, column)
+            for name, column in data["columns"].items()
+        }
+        return profiler
+
+
+class StreamingProfiler:
+    """
+    Chunked counterpart to :func:`profile_dataframe`.
+
+    Only one chunk is resident at a time; each column keeps mergeable
+    partial statistics (counts, nulls, min/max, running moments, a KLL
+    quantile sketch and Misra-Gries heavy hitters). Histograms need the final
+    min/max, so they are filled by a second pass over the numeric columns
+    only. Quantiles, ``unique`` and value counts are exact for small inputs
+    and approximate once the sketches start compacting; ``unique`` is exact
+    while the columns together hold at most ``distinct_budget`` distinct
+    values, and estimated by HyperLogLog for the columns that overflow it.
+    """
+
+    def __init__(
+        self,
+        top_capacity: int = 1024,
+        distinct_budget: int = 500_000,
+        sketch_k: int = 200,
+        hll_precision: int = 12,
+    ) -> None:
+        self.top_capacity = top_capacity
+        self.distinct_budget = _DistinctBudget(distinct_budget)
+        self.sketch_k = sketch_k
+        self.hll_precision = hll_precision
+        self.row_count = 0
+        self.columns: Dict[str, _StreamingColumn] = {}
+
+    def update(self, chunk: pd.DataFrame, timer: Optional[ColumnTimer] = None) -> None:
+        if not self.columns:
+            for name in chunk.columns:
+                self.columns[name] = _StreamingColumn(
+                    name,
+                    self.top_capacity,
+                    self.distinct_budget,
+                    self.sketch_k,
+                    self.hll_precision,
+                )
+
+        self.row_count += int(len(chunk))
+        for name, state in self.columns.items():
+            with _timed(timer, name, "describe"):
+                state.update(chunk[name])
+
+    def histogram_columns(self) -> List[str]:
+        names = []
+        for name, state in self.columns.items():
+            if state.wants_histogram():
+                state.start_histogram()
+                names.append(name)
+        return names
+
+    def update_histograms(
+        self, chunk: pd.DataFrame, timer: Optional[ColumnTimer] = None
+    ) -> None:
+        for name in chunk.columns:
+            state = self.columns.get(name)
+            if state is not None and state.hist_counts is not None:
+                with _timed(timer, name, "histogram"):
+                    state.update_histogram(chunk[name])
+
+    def result(self, timer: Optional[ColumnTimer] = None) -> Dict[str, Any]:
+        return {
+            "row_count": int(self.row_count),
+            "column_count": int(len(self.columns)),
+            "columns": _column_summaries(self.columns, timer),
+            "missing_values": {
+                name: int(state.missing) for name, state in self.columns.items()
+            },
+        }
+
+
+def profile_streaming(
+    read_chunks: ChunkReader,
+    dataset_id: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    timer: Optional[ColumnTimer] = None,
+    **profiler_options: Any,
+) -> Dict[str, Any]:
+    """
+    Build the ``summary_json`` payload without holding the dataset in memory.
+
+    ``read_chunks`` is called once for all columns and, if any numeric column
+    needs a histogram, once more for just those columns.
+    """
+    profiler = StreamingProfiler(**profiler_options)
+
+    chunk_count = 0
+    for chunk in read_chunks(None):
+        profiler.update(chunk, timer)
+        chunk_count += 1
+        logger.debug(
+            "Profiled chunk %s for dataset %s (%s rows so far)",
+            chunk_count,
+            dataset_id,
+            profiler.row_count,
+        )
+        if progress is not None:
+            progress({"type": "chunk", "pass": 1, "rows": profiler.row_count})
+
+    histogram_columns = profiler.histogram_columns()
+    if histogram_columns:
+        rows = 0
+        for chunk in read_chunks(histogram_columns):
+            profiler.update_histograms(chunk, timer)
+            rows += len(chunk)
+            if progress is not None:
+                progress({"type": "chunk", "pass": 2, "rows": rows})
+
+    result = profiler.result(timer)
+    if progress is not None:
+        for name, col_summary in result["columns"].items():
+            progress({"type": "column", "column": name, "summary": col_summary})
+    return result
+
+
+def profile_approximate(
+    read_chunks: ChunkReader,
+    dataset_id: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    timer: Optional[ColumnTimer] = None,
+    **profiler_options: Any,
+) -> Dict[str, Any]:
+    """
+    Build an approximate ``summary_json`` payload from sketches in a single
+    pass over ``read_chunks(None)``. The serialized sketches are returned
+    under ``"sketches"`` for the caller to store next to the summary.
+    """
+    profiler = SketchProfiler(**profiler_options)
+
+    chunk_count = 0
+    for chunk in read_chunks(None):
+        profiler.update(chunk, timer)
+        chunk_count += 1
+        logger.debug(
+            "Sketched chunk %s for dataset %s (%s rows so far)",
+            chunk_count,
+            dataset_id,
+            profiler.row_count,
+        )
+        if progress is not None:
+            progress({"type": "chunk", "pass": 1, "rows": profiler.row_count})
+
+    result = profiler.result(timer)
+    if progress is not None:
+        for name, col_summary in result["columns"].items():
+            progress({"type": "column", "column": name, "summary": col_summary})
+    result["sketches"] = profiler.to_dict()
+    return result
@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import redis
+import redis.asyncio
+from django.conf import settings
+
+from .models import AnalysisResult
+
+logger = logging.getLogger(__name__)
+
+# Analysis stages in the order run_analysis_task goes through them.
+STAGES = ("queued", "columnar_cache", "profiling", "quality_index", "saving")
+TERMINAL_STATUSES = ("COMPLETED", "FAILED")
+# How often the stream checks the database when Redis is unavailable.
+FALLBACK_POLL_SECONDS = 2
+
+
+def progress_channel(dataset_id: int) -> str:
+    return f"analysis-progress:{dataset_id}"
+
+
+def progress_state_key(dataset_id: int) -> str:
+    # Hash of the latest stage / status / total_columns.
+    return f"analysis-progress:{dataset_id}:state"
+
+
+def progress_columns_key(dataset_id: int) -> str:
+    # Hash of column name -> finished column summary (JSON).
+    return f"analysis-progress:{dataset_id}:columns"
+
+
+@lru_cache(maxsize=1)
+def redis_client() -> redis.Redis:
+    return redis.Redis.from_url(
+        settings.ANALYSIS_PROGRESS_REDIS_URL,
+        socket_timeout=1,
+        socket_connect_timeout=1,
+    )
+
+
+def json_safe(value: Any) -> Any:
+    """
+    Replace NaN / inf (which summaries use for undefined statistics) with
+    None so events parse as strict JSON in the browser.
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {str(key): json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(item) for item in value]
+    return value
+
+
+def encode_event(event: Dict[str, Any]) -> str:
+    return json.dumps(json_safe(event), default=str)
+
+
+class ProgressPublisher:
+    """
+    Publishes analysis progress for one dataset to Redis pub/sub and keeps
+    the latest state (and every finished column) in Redis hashes, so a
+    client that connects mid-analysis can catch up.
+
+    Progress is best effort: after the first Redis error the publisher
+    disables itself and the analysis carries on. Instances are also usable
+    as a ``profiling.ProgressCallback``. ``heartbeat``, if given, is called
+    on every event, with or without Redis.
+    """
+
+    def __init__(
+        self, dataset_id: int, heartbeat: Optional[Callable[[], None]] = None
+    ) -> None:
+        self.dataset_id = dataset_id
+        self.heartbeat = heartbeat
+        self.channel = progress_channel(dataset_id)
+        self.state_key = progress_state_key(dataset_id)
+        self.columns_key = progress_columns_key(dataset_id)
+        self.enabled = True
+        self.client = redis_client()
+
+    def _send(self, event: Dict[str, Any], state: Optional[Dict[str, Any]] = None):
+        if self.heartbeat is not None:
+            self.heartbeat()
+        if not self.enabled:
+            return
+        try:
+            pipe = self.client.pipeline()
+            if state:
+                pipe.hset(self.state_key, mapping=state)
+                pipe.expire(self.state_key, settings.ANALYSIS_PROGRESS_TTL_SECONDS)
+            pipe.publish(self.channel, encode_event(event))
+            pipe.execute()
+        except redis.RedisError as exc:
+            self.enabled = False
+            logger.warning(
+                "Disabling progress events for dataset %s: %s", self.dataset_id, exc
+            )
+
+    def start(self) -> None:
+        """
+        Clear progress left over from an earlier run of this dataset.
+        """
+        if not self.enabled:
+            return
+        try:
+            self.client.delete(self.state_key, self.columns_key)
+        except redis.RedisError as exc:
+            self.enabled = False
+            logger.warning(
+                "Disabling progress events for dataset %s: %s", self.dataset_id, exc
+            )
+            return
+        self.stage("queued")
+
+    def stage(self, stage: str, **extra: Any) -> None:
+        event = {"type": "stage", "stage": stage, **extra}
+        self._send(event, state={"stage": stage, **extra})
+
+    def column(self, name: str, summary: Dict[str, Any]) -> None:
+        if self.heartbeat is not None:
+            self.heartbeat()
+        if not self.enabled:
+            return
+        try:
+            pipe = self.client.pipeline()
+            pipe.hset(self.columns_key, name, encode_event(summary))
+            pipe.expire(self.columns_key, settings.ANALYSIS_PROGRESS_TTL_SECONDS)
+            pipe.hlen(self.columns_key)
+            pipe.hget(self.state_key, "total_columns")
+            _, _, done, total = pipe.execute()
+        except redis.RedisError as exc:
+            self.enabled = False
+            logger.warning(
+                "Disabling progress events for dataset %s: %s", self.dataset_id, exc
+            )
+            return
+        self._send(
+            {
+                "type": "column",
+                "column": name,
+                "done": int(done),
+                "total": int(total) if total else None,
+                "summary": summary,
+            }
+        )
+
+    def finish(self, status: str, error: Optional[str] = None) -> None:
+        event = {"type": "status", "status": status}
+        if error:
+            event["error"] = error
+        self._send(event, state={"stage": status.lower(), "status": status})
+
+    def __call__(self, event: Dict[str, Any]) -> None:
+        if event.get("type") == "column":
+            self.column(str(event["column"]), event["summary"])
+        else:
+            self._send(event)
+
+
+def _sse(data: str) -> str:
+    return f"data: {data}\n\n"
+
+
+def _analysis_status_query(dataset_id: int):
+    return AnalysisResult.objects.filter(dataset_id=dataset_id).values_list(
+        "status", "error_message"
+    )
+
+
+def _terminal_event(
+    status: Optional[str], error_message: Optional[str]
+) -> Optional[str]:
+    """
+    The terminal status event if the analysis has already finished.
+    """
+    if status not in TERMINAL_STATUSES:
+        return None
+    event: Dict[str, Any] = {"type": "status", "status": status}
+    if status == "FAILED" and error_message:
+        event["error"] = error_message.strip().splitlines()[-1]
+    return _sse(encode_event(event))
+
+
+async def _status_event(dataset_id: int) -> Optional[str]:
+    row = await _analysis_status_query(dataset_id).afirst()
+    return _terminal_event(*(row or (None, None)))
+
+
+def _status_event_sync(dataset_id: int) -> Optional[str]:
+    row = _analysis_status_query(dataset_id).first()
+    return _terminal_event(*(row or (None, None)))
+
+
+async def _poll_status(dataset_id: int) -> AsyncIterator[str]:
+    while True:
+        event = await _status_event(dataset_id)
+        if event is not None:
+            yield event
+            return
+        yield ": waiting\n\n"
+        await asyncio.sleep(FALLBACK_POLL_SECONDS)
+
+
+def _poll_status_sync(dataset_id: int) -> Iterator[str]:
+    while True:
+        event = _status_event_sync(dataset_id)
+        if event is not None:
+            yield event
+            return
+        yield ": waiting\n\n"
+        time.sleep(FALLBACK_POLL_SECONDS)
+
+
+def _snapshot_events(
+    state: Dict[bytes, bytes], columns: Dict[bytes, bytes]
+) -> Iterator[str]:
+    """
+    Catch-up events for a client connecting mid-analysis: the current stage
+    and every column finished so far.
+    """
+    state = {key.decode(): value.decode() for key, value in state.items()}
+    if "stage" in state:
+        snapshot = {"type": "stage", **state}
+        if "total_columns" in snapshot:
+            snapshot["total_columns"] = int(snapshot["total_columns"])
+        yield _sse(encode_event(snapshot))
+    total = int(state["total_columns"]) if "total_columns" in state else None
+    for done, (name, summary) in enumerate(columns.items(), start=1):
+        yield _sse(
+            json.dumps(
+                {
+                    "type": "column",
+                    "column": name.decode(),
+                    "done": done,
+                    "total": total,
+                    "summary": json.loads(summary),
+                }
+            )
+        )
+
+
+async def progress_event_stream(dataset_id: int) -> AsyncIterator[str]:
+    """
+    Server-Sent Events for one analysis: a snapshot of the current stage
+    and every column finished so far, then live events until a ``status``
+    event (COMPLETED or FAILED) ends the stream. Without Redis the stream
+    degrades to the final status event only.
+    """
+    event = await _status_event(dataset_id)
+    if event is not None:
+        yield event
+        return
+
+    client = redis.asyncio.Redis.from_url(
+        settings.ANALYSIS_PROGRESS_REDIS_URL, socket_connect_timeout=1
+    )
+    pubsub = client.pubsub()
+    try:
+        try:
+            # Subscribe before reading the snapshot so nothing published in
+            # between is lost; replayed columns are idempotent on the client.
+            await pubsub.subscribe(progress_channel(dataset_id))
+            state = await client.hgetall(progress_state_key(dataset_id))
+            columns = await client.hgetall(progress_columns_key(dataset_id))
+        except redis.RedisError as exc:
+            logger.warning(
+                "Progress stream for dataset %s without Redis: %s", dataset_id, exc
+            )
+            async for chunk in _poll_status(dataset_id):
+                yield chunk
+            return
+
+        for chunk in _snapshot_events(state, columns):
+            yield chunk
+
+        while True:
+            try:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=settings.ANALYSIS_PROGRESS_KEEPALIVE_SECONDS,
+                )
+            except redis.RedisError as exc:
+                logger.warning(
+                    "Progress stream for dataset %s lost Redis: %s", dataset_id, exc
+                )
+                async for chunk in _poll_status(dataset_id):
+                    yield chunk
+                return
+
+            if message is None:
+                # Quiet period: make sure the final event was not missed,
+                # then keep the connection alive through proxies.
+                event = await _status_event(dataset_id)
+                if event is not None:
+                    yield event
+                    return
+                yield ": keepalive\n\n"
+                continue
+
+            data = message["data"].decode()
+            yield _sse(data)
+            if json.loads(data).get("type") == "status":
+                return
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
+
+
+def iter_progress_events(dataset_id: int) -> Iterator[str]:
+    """
+    Blocking counterpart of ``progress_event_stream`` for WSGI servers,
+    which cannot stream an async iterator (Django would buffer it until
+    the analysis ends). Each open stream holds a worker thread for up to
+    the analysis' duration, so serve many clients through ASGI instead.
+    """
+    event = _status_event_sync(dataset_id)
+    if event is not None:
+        yield event
+        return
+
+    client = redis.Redis.from_url(
+        settings.ANALYSIS_PROGRESS_REDIS_URL, socket_connect_timeout=1
+    )
+    pubsub = client.pubsub()
+    try:
+        try:
+            pubsub.subscribe(progress_channel(dataset_id))
+            state = client.hgetall(progress_state_key(dataset_id))
+            columns = client.hgetall(progress_columns_key(dataset_id))
+        except redis.RedisError as exc:
+            logger.warning(
+                "Progress stream for dataset %s without Redis: %s", dataset_id, exc
+            )
+            yield from _poll_status_sync(dataset_id)
+            return
+
+        yield from _snapshot_events(state, columns)
+
+        while True:
+            try:
+                message = pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=settings.ANALYSIS_PROGRESS_KEEPALIVE_SECONDS,
+                )
+            except redis.RedisError as exc:
+                logger.warning(
+                    "Progress stream for dataset %s lost Redis: %s", dataset_id, exc
+                )
+                yield from _poll_status_sync(dataset_id)
+                return
+
+            if message is None:
+                event = _status_event_sync(dataset_id)
+                if event is not None:
+                    yield event
+                    return
+                yield ": keepalive\n\n"
+                continue
+
+            data = message["data"].decode()
+            yield _sse(data)
+            if json.loads(data).get("type") == "status":
+                return
+    finally:
+        pubsub.close()
+        client.close()
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import logging
+import warnings
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+logger = logging.getLogger(__name__)
+
+ISSUE_KINDS = ("missing", "coercion", "outlier")
+# Tukey fences: values beyond Q1 - k*IQR or Q3 + k*IQR are outliers.
+OUTLIER_IQR_FACTOR = 1.5
+# A text column whose first chunk parses as numbers at least this often is
+# treated as numeric, and the values that do not parse as coercion failures.
+NUMERIC_COERCION_RATIO = 0.9
+
+
+def _issue_key(kind: str, position: int) -> str:
+    return f"{kind}_{position}"
+
+
+def _outlier_fences(col_summary: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    if col_summary.get("type") != "numeric":
+        return None
+    describe = col_summary.get("describe") or {}
+    q1, q3 = describe.get("25%"), describe.get("75%")
+    if q1 is None or q3 is None or np.isnan(q1) or np.isnan(q3):
+        return None
+    iqr = q3 - q1
+    if iqr <= 0:
+        return None
+    return q1 - OUTLIER_IQR_FACTOR * iqr, q3 + OUTLIER_IQR_FACTOR * iqr
+
+
+class QualityIndexBuilder:
+    """
+    Collects, chunk by chunk, the row numbers of missing values, values that
+    fail to coerce to the column's inferred type, and numeric outliers.
+
+    Outlier fences and datetime columns come from the finished profile's
+    column summaries (the ``columns`` of the profiling result), so the index
+    costs one extra pass over the data.
+    """
+
+    def __init__(
+        self, column_summaries: Dict[str, Dict[str, Any]], row_offset: int = 0
+    ) -> None:
+        self.columns: List[str] = list(column_summaries)
+        self._positions = {name: i for i, name in enumerate(self.columns)}
+        self.fences = {
+            name: _outlier_fences(summary) for name, summary in column_summaries.items()
+        }
+        self.datetime_columns = {
+            name
+            for name, summary in column_summaries.items()
+            if summary.get("type") == "datetime"
+        }
+        # Decided on the first chunk for text columns.
+        self.numeric_text_columns: Optional[set] = None
+        # Row numbers start here, e.g. for rows appended to a dataset.
+        self.row_count = row_offset
+        self._rows: Dict[str, List[np.ndarray]] = {}
+
+    def _add(self, kind: str, name: str, mask: np.ndarray) -> None:
+        rows = np.flatnonzero(mask)
+        if rows.size:
+            key = _issue_key(kind, self._positions[name])
+            self._rows.setdefault(key, []).append(rows + self.row_count)
+
+    def _numeric_text_columns(self, chunk: pd.DataFrame) -> set:
+        columns = set()
+        for name in self.columns:
+            series = chunk[name]
+            if name in self.datetime_columns or series.dtype != object:
+                continue
+            non_null = series.dropna()
+            if non_null.empty:
+                continue
+            parsed = pd.to_numeric(non_null, errors="coerce")
+            if parsed.notna().mean() >= NUMERIC_COERCION_RATIO:
+                columns.add(name)
+        return columns
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        if self.numeric_text_columns is None:
+            self.numeric_text_columns = self._numeric_text_columns(chunk)
+
+        for name in self.columns:
+            series = chunk[name]
+            missing = series.isna().to_numpy()
+            self._add("missing", name, missing)
+
+            if name in self.datetime_columns and not is_numeric_dtype(series):
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", category=UserWarning)
+                    parsed = pd.to_datetime(series, errors="coerce", utc=False)
+                self._add("coercion", name, parsed.isna().to_numpy() & ~missing)
+            elif name in self.numeric_text_columns:
+                parsed = pd.to_numeric(series, errors="coerce")
+                self._add("coercion", name, parsed.isna().to_numpy() & ~missing)
+
+            fences = self.fences.get(name)
+            if (
+                fences is not None
+                and is_numeric_dtype(series)
+                and not is_bool_dtype(series)
+            ):
+                values = series.to_numpy(dtype="float64", na_value=np.nan)
+                with np.errstate(invalid="ignore"):
+                    self._add(
+                        "outlier", name, (values < fences[0]) | (values > fences[1])
+                    )
+
+        self.row_count += len(chunk)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Sorted row-number arrays keyed ``<kind>_<column position>``, plus
+        ``columns`` (the names) and ``any`` (every row with an issue).
+        """
+        dtype = "uint32" if self.row_count < 2**32 else "int64"
+        arrays: Dict[str, np.ndarray] = {
+            key: np.concatenate(parts).astype(dtype)
+            for key, parts in self._rows.items()
+        }
+        arrays["any"] = (
+            np.unique(np.concatenate(list(arrays.values())))
+            if arrays
+            else np.empty(0, dtype=dtype)
+        )
+        arrays["columns"] = np.array(self.columns, dtype=str)
+        return arrays
+
+    def issue_counts(self) -> Dict[str, Dict[str, int]]:
+        """
+        Per-column issue counts (only non-zero ones) for summary_json.
+        """
+        counts: Dict[str, Dict[str, int]] = {}
+        for key, parts in self._rows.items():
+            kind, position = key.rsplit("_", 1)
+            counts.setdefault(self.columns[int(position)], {})[kind] = int(
+                sum(part.size for part in parts)
+            )
+        return counts
+
+
+def build_quality_index(
+    chunks: Iterable[pd.DataFrame],
+    column_summaries: Dict[str, Dict[str, Any]],
+    row_offset: int = 0,
+) -> QualityIndexBuilder:
+    builder = QualityIndexBuilder(column_summaries, row_offset=row_offset)
+    for chunk in chunks:
+        builder.update(chunk)
+    return builder
+
+
+def write_quality_index(path: str, builder: QualityIndexBuilder) -> None:
+    # np.savez adds ".npz" to bare paths, so write through a file object.
+    with open(path, "wb") as fh:
+        np.savez_compressed(fh, **builder.arrays())
+
+
+def quality_index_columns(path: str) -> List[str]:
+    with np.load(path) as index:
+        return [str(name) for name in index["columns"]]
+
+
+def read_quality_rows(
+    path: str,
+    column: Optional[str] = None,
+    kind: Optional[str] = None,
+) -> np.ndarray:
+    """
+    Sorted row numbers with an issue, optionally limited to one column
+    and/or one issue kind. Only the arrays asked for are decompressed.
+    """
+    with np.load(path) as index:
+        if column is None and kind is None:
+            return index["any"].astype("int64")
+
+        columns = [str(name) for name in index["columns"]]
+        positions = (
+            [columns.index(column)] if column is not None else range(len(columns))
+        )
+        kinds = [kind] if kind is not None else ISSUE_KINDS
+        keys = [
+            _issue_key(issue, position)
+            for position in positions
+            for issue in kinds
+            if _issue_key(issue, position) in index.files
+        ]
+        if not keys:
+            return np.empty(0, dtype="int64")
+        if len(keys) == 1:
+            return index[keys[0]].astype("int64")
+        return np.unique(np.concatenate([index[key] for key in keys])).astype("int64")
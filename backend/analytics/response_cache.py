@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import uuid
+from typing import Any, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import AnalysisResult, Dataset, SemanticAggregate
+
+logger = logging.getLogger(__name__)
+
+# Rendered dataset detail / summary responses live in the shared cache
+# under the dataset's current response version, a random token replaced
+# on every write that can change them. Replacing it (rather than deleting
+# entries) makes all earlier entries unreachable at once; they expire
+# after DATASET_RESPONSE_CACHE_TTL_SECONDS.
+_VERSION_KEY = "dataset-responses:{dataset_id}:version"
+_ENTRY_KEY = "dataset-responses:{dataset_id}:{version}:{variant}"
+
+
+def _entry_key(dataset_id: int, version: str, variant: str) -> str:
+    # Variants carry request input (e.g. summary sections), so are hashed.
+    digest = hashlib.sha256(variant.encode("utf-8")).hexdigest()[:16]
+    return _ENTRY_KEY.format(dataset_id=dataset_id, version=version, variant=digest)
+
+
+class CachedResponse(NamedTuple):
+    owner_id: int
+    etag: str
+    # The rendered JSON body.
+    content: bytes
+
+
+def response_version(dataset_id: int) -> Optional[str]:
+    """
+    The dataset's current response version, or None when the shared cache
+    is unavailable (callers then serve uncached).
+    """
+    key = _VERSION_KEY.format(dataset_id=dataset_id)
+    try:
+        version = cache.get(key)
+        if version is None:
+            # add() so concurrent first readers agree on one token.
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            version = cache.get(key)
+        return version
+    except Exception as exc:
+        logger.debug("Response cache unavailable for dataset %s: %s", dataset_id, exc)
+        return None
+
+
+def response_etag(dataset_id: int, version: str, variant: str) -> str:
+    raw = f"{dataset_id}:{version}:{variant}"
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def content_etag(content: bytes) -> str:
+    # Without the cache there is no version; the body itself identifies it.
+    return '"' + hashlib.sha256(content).hexdigest()[:32] + '"'
+
+
+def get_cached_response(
+    dataset_id: int, version: str, variant: str
+) -> Optional[CachedResponse]:
+    key = _entry_key(dataset_id, version, variant)
+    try:
+        return cache.get(key)
+    except Exception as exc:
+        logger.debug("Response cache unavailable for %s: %s", key, exc)
+        return None
+
+
+def set_cached_response(
+    dataset_id: int, version: str, variant: str, entry: CachedResponse
+) -> None:
+    key = _entry_key(dataset_id, version, variant)
+    try:
+        cache.set(key, entry, settings.DATASET_RESPONSE_CACHE_TTL_SECONDS)
+    except Exception as exc:
+        logger.debug("Response cache unavailable for %s: %s", key, exc)
+
+
+def invalidate_dataset_responses(dataset_id: int) -> None:
+    """
+    Drop the cached responses of a dataset. Runs once the current
+    transaction commits, so a reader cannot cache the old rows again
+    under the new version. Queryset ``update()`` calls send no signals
+    and must call this themselves.
+    """
+
+    def replace_version() -> None:
+        key = _VERSION_KEY.format(dataset_id=dataset_id)
+        try:
+            cache.set(key, uuid.uuid4().hex, timeout=None)
+        except Exception as exc:
+            logger.warning(
+                "Could not invalidate cached responses of dataset %s: %s",
+                dataset_id,
+                exc,
+            )
+
+    transaction.on_commit(replace_version)
+
+
+@receiver(post_save, sender=Dataset)
+@receiver(post_delete, sender=Dataset)
+def _dataset_changed(sender, instance: Dataset, **kwargs: Any) -> None:
+    invalidate_dataset_responses(instance.id)
+
+
+@receiver(post_save, sender=AnalysisResult)
+@receiver(post_save, sender=SemanticAggregate)
+def _analysis_changed(sender, instance, **kwargs: Any) -> None:
+    # AnalysisSection rows are only written together with their
+    # AnalysisResult or through save_summary_section, which invalidates.
+    invalidate_dataset_responses(instance.dataset_id)
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import logging
+import time
+from datetime import timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import redis
+from celery.signals import before_task_publish, task_prerun
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from .formats import detect_format, estimated_data_size, read_column_names
+from .models import AnalysisResult, Dataset
+from .metrics import observe
+from .progress import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Celery queues for analysis work; run a worker per queue so a large file
+# never sits in front of small ones (see the CELERY_* settings).
+SMALL_QUEUE = "analysis_small"
+LARGE_QUEUE = "analysis_large"
+RECOMPUTE_QUEUE = "analysis_recompute"
+QUEUES = (SMALL_QUEUE, LARGE_QUEUE, RECOMPUTE_QUEUE)
+
+# Recent pickup delays (seconds) kept per queue for queue_metrics().
+WAIT_SAMPLES = 500
+_ENQUEUED_AT_HEADER = "enqueued_at"
+
+
+def queue_waits_key(queue: str) -> str:
+    return f"analysis-queue:{queue}:waits"
+
+
+def estimate_analysis_cost(dataset: Dataset) -> int:
+    """
+    Rough cost of profiling a dataset, in bytes of decoded input plus
+    ANALYSIS_COST_BYTES_PER_COLUMN for each column (every column gets its
+    own statistics and charts, however short the file). Only the file
+    size and header are read.
+    """
+    path = dataset.original_file.path
+    try:
+        input_format = detect_format(path)
+        size = estimated_data_size(path, input_format)
+    except OSError:
+        return 0
+    try:
+        columns = len(read_column_names(path, input_format))
+    except Exception:
+        logger.warning("Could not read the columns of dataset %s", dataset.id)
+        columns = 0
+    return size + columns * settings.ANALYSIS_COST_BYTES_PER_COLUMN
+
+
+def analysis_queue(cost: int) -> str:
+    if cost <= settings.ANALYSIS_SMALL_JOB_MAX_COST:
+        return SMALL_QUEUE
+    return LARGE_QUEUE
+
+
+def claim_analysis_slot(analysis: AnalysisResult, enforce_limit: bool = True) -> bool:
+    """
+    Mark an analysis RUNNING unless its owner already has
+    ANALYSIS_OWNER_CONCURRENCY[queue] analyses running in the same queue,
+    so one user's burst of uploads cannot take every worker. Runs that
+    have not been updated for ANALYSIS_SLOT_STALE_SECONDS (e.g. a killed
+    worker; live runs keep theirs fresh through AnalysisHeartbeat) no
+    longer hold a slot, and neither do analyses marked RUNNING while an
+    appended batch is merged, which run on the recompute queue.
+    """
+    limit = (
+        settings.ANALYSIS_OWNER_CONCURRENCY.get(analysis.queue)
+        if enforce_limit
+        else None
+    )
+    owner_id = analysis.dataset.owner_id
+    with transaction.atomic():
+        # Serializes the check-and-claim per owner.
+        get_user_model().objects.select_for_update().filter(id=owner_id).first()
+        if limit is not None:
+            stale = timezone.now() - timedelta(
+                seconds=settings.ANALYSIS_SLOT_STALE_SECONDS
+            )
+            running = (
+                AnalysisResult.objects.filter(
+                    dataset__owner_id=owner_id,
+                    queue=analysis.queue,
+                    status="RUNNING",
+                    updated_at__gte=stale,
+                )
+                .exclude(id=analysis.id)
+                .exclude(dataset__batches__status__in=["PENDING", "RUNNING"])
+                .count()
+            )
+            if running >= limit:
+                return False
+        analysis.status = "RUNNING"
+        analysis.save(update_fields=["status", "updated_at"])
+    return True
+
+
+class AnalysisHeartbeat:
+    """
+    Called on each progress event of a running analysis; refreshes its
+    ``updated_at`` at most every ANALYSIS_HEARTBEAT_SECONDS so a long run
+    keeps its slot (see claim_analysis_slot).
+    """
+
+    def __init__(self, dataset_id: int) -> None:
+        self.dataset_id = dataset_id
+        self.last = time.monotonic()
+
+    def __call__(self) -> None:
+        now = time.monotonic()
+        if now - self.last < settings.ANALYSIS_HEARTBEAT_SECONDS:
+            return
+        self.last = now
+        AnalysisResult.objects.filter(
+            dataset_id=self.dataset_id, status="RUNNING"
+        ).update(updated_at=timezone.now())
+
+
+@before_task_publish.connect
+def _stamp_enqueued_at(headers: Optional[Dict[str, Any]] = None, **kwargs) -> None:
+    if headers is not None:
+        headers[_ENQUEUED_AT_HEADER] = time.time()
+
+
+@task_prerun.connect
+def _record_queue_wait(task=None, **kwargs) -> None:
+    # Time from publishing (or re-publishing, for deferred runs) to pickup.
+    if task is None:
+        return
+    enqueued_at = getattr(task.request, _ENQUEUED_AT_HEADER, None)
+    queue = (task.request.delivery_info or {}).get("routing_key")
+    if enqueued_at is None or queue not in QUEUES:
+        return
+    wait = max(time.time() - float(enqueued_at), 0.0)
+    try:
+        pipe = redis_client().pipeline()
+        pipe.lpush(queue_waits_key(queue), wait)
+        pipe.ltrim(queue_waits_key(queue), 0, WAIT_SAMPLES - 1)
+        pipe.execute()
+    except redis.RedisError as exc:
+        logger.debug("Could not record the wait for %s: %s", queue, exc)
+    observe("analysis_queue_wait_seconds", wait, queue=queue)
+
+
+@lru_cache(maxsize=1)
+def _broker_client() -> redis.Redis:
+    return redis.Redis.from_url(
+        settings.CELERY_BROKER_URL, socket_timeout=1, socket_connect_timeout=1
+    )
+
+
+def _queue_depths() -> Dict[str, Optional[int]]:
+    # The Redis transport keeps each queue's messages in a list of that name.
+    try:
+        pipe = _broker_client().pipeline()
+        for queue in QUEUES:
+            pipe.llen(queue)
+        return dict(zip(QUEUES, pipe.execute()))
+    except redis.RedisError as exc:
+        logger.warning("Could not read queue depths: %s", exc)
+        return {queue: None for queue in QUEUES}
+
+
+def _queue_waits() -> Dict[str, List[float]]:
+    try:
+        pipe = redis_client().pipeline()
+        for queue in QUEUES:
+            pipe.lrange(queue_waits_key(queue), 0, -1)
+        samples = pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning("Could not read queue wait times: %s", exc)
+        return {queue: [] for queue in QUEUES}
+    return {
+        queue: [float(value) for value in values]
+        for queue, values in zip(QUEUES, samples)
+    }
+
+
+def queue_metrics() -> Dict[str, Dict[str, Any]]:
+    """
+    Per queue: messages waiting in the broker (``depth``, None when the
+    broker is unreachable), analyses queued or running there according to
+    the database, and the pickup delay over the last WAIT_SAMPLES tasks.
+    """
+    depths = _queue_depths()
+    waits = _queue_waits()
+    metrics: Dict[str, Dict[str, Any]] = {}
+    for queue in QUEUES:
+        analyses = AnalysisResult.objects.filter(queue=queue)
+        samples = np.asarray(waits[queue], dtype="float64")
+        metrics[queue] = {
+            "depth": depths[queue],
+            "pending_analyses": analyses.filter(status="PENDING").count(),
+            "running_analyses": analyses.filter(status="RUNNING").count(),
+            "wait_seconds": {
+                "samples": int(samples.size),
+                "p50": float(np.percentile(samples, 50)) if samples.size else None,
+                "p95": float(np.percentile(samples, 95)) if samples.size else None,
+                "max": float(samples.max()) if samples.size else None,
+            },
+        }
+    return metrics
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
+from django.conf import settings
 from pandas.api.types import is_numeric_dtype
 
 logger = logging.getLogger(__name__)
@@ -48,145 +51,412 @@ def _compute_target_distribution(
     return rows
 
 
+# Per-group quantiles reported by metrics_by_target, as (field, q).
+GROUP_QUANTILES = (("p25", 0.25), ("median", 0.5), ("p75", 0.75))
+# Float64 cells gathered into group order at once for quantiles (256 MB).
+GROUP_SORT_BLOCK_CELLS = 32_000_000
+
+
+def _metric_arrays(df: pd.DataFrame, metric_cols: List[str]) -> Dict[str, np.ndarray]:
+    # Numeric metrics as float64 with NaN for missing (a view for float64).
+    arrays: Dict[str, np.ndarray] = {}
+    for metric in metric_cols:
+        if metric in arrays or metric not in df.columns:
+            continue
+        series = df[metric]
+        if not is_numeric_dtype(series):
+            continue
+        arrays[metric] = series.to_numpy(dtype="float64", na_value=np.nan)
+    return arrays
+
+
+def _group_quantiles(
+    codes: np.ndarray,
+    n_groups: int,
+    columns: Dict[str, np.ndarray],
+    stats: Dict[str, Dict[str, np.ndarray]],
+) -> None:
+    # Rows are put in group order once (a radix sort for up to 65536
+    # groups), then each group's slice is sorted for a block of metrics at
+    # a time; NaN sorts last, so the first ``count`` values of a slice are
+    # the group's values in order.
+    rows = np.flatnonzero(codes >= 0)
+    group_codes = codes[rows]
+    rows = rows[
+        np.argsort(
+            group_codes.astype(np.min_scalar_type(max(n_groups - 1, 0))),
+            kind="stable",
+        )
+    ]
+    sizes = np.bincount(group_codes, minlength=n_groups)
+    starts = np.cumsum(sizes) - sizes
+    sorted_groups = np.flatnonzero(sizes > 1)
+
+    names = list(columns)
+    block = max(1, GROUP_SORT_BLOCK_CELLS // max(rows.size, 1))
+    for first in range(0, len(names), block):
+        chunk = names[first : first + block]
+        grouped = np.stack([columns[name][rows] for name in chunk])
+        for group in sorted_groups:
+            grouped[:, starts[group] : starts[group] + sizes[group]].sort(axis=1)
+
+        for values, name in zip(grouped, chunk):
+            count = stats[name]["count"]
+            empty = count == 0
+            for field, q in GROUP_QUANTILES:
+                position = starts + q * np.maximum(count - 1, 0)
+                low = np.floor(position).astype("int64")
+                fraction = position - low
+                low = np.minimum(low, max(rows.size - 1, 0))
+                high = np.minimum(low + 1, max(rows.size - 1, 0))
+                if rows.size:
+                    below, above = values[low], values[high]
+                    with np.errstate(invalid="ignore"):
+                        quantile = np.where(
+                            fraction > 0, below + (above - below) * fraction, below
+                        )
+                else:
+                    quantile = np.full(n_groups, np.nan)
+                quantile[empty] = np.nan
+                stats[name][field] = quantile
+
+
+def aggregate_groups(
+    codes: np.ndarray,
+    n_groups: int,
+    columns: Dict[str, np.ndarray],
+    quantiles: bool = False,
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Per-group statistics of several float64 columns sharing one grouping,
+    e.g. the codes of a single ``pd.factorize`` of the key (0..n_groups-1,
+    -1 for rows outside every group), so the key is not factorized again
+    per column.
+
+    Returns, per column, arrays of length n_groups: count, mean, std
+    (ddof=1), min and max, plus the GROUP_QUANTILES (linear interpolation,
+    as pandas) with ``quantiles``. NaN values are skipped; a group without
+    values has count 0 and NaN elsewhere.
+    """
+    grouped = codes >= 0
+    stats: Dict[str, Dict[str, np.ndarray]] = {}
+    for name, values in columns.items():
+        present = grouped & ~np.isnan(values)
+        group, values = codes[present], values[present]
+        count = np.bincount(group, minlength=n_groups)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.bincount(group, weights=values, minlength=n_groups) / count
+            squares = np.bincount(
+                group, weights=(values - mean[group]) ** 2, minlength=n_groups
+            )
+            std = np.sqrt(squares / (count - 1))
+        std[count < 2] = np.nan
+        low = np.full(n_groups, np.inf)
+        np.minimum.at(low, group, values)
+        high = np.full(n_groups, -np.inf)
+        np.maximum.at(high, group, values)
+        low[count == 0] = np.nan
+        high[count == 0] = np.nan
+        stats[name] = {"count": count, "mean": mean, "std": std, "min": low, "max": high}
+
+    if quantiles and columns:
+        _group_quantiles(codes, n_groups, columns, stats)
+    return stats
+
+
+def _json_floats(values: np.ndarray) -> List[Optional[float]]:
+    out = values.astype(object)
+    out[np.isnan(values)] = None
+    return out.tolist()
+
+
+def _group_records(
+    key: str,
+    labels: List[str],
+    stats: Dict[str, np.ndarray],
+    fields: List[str],
+    groups: np.ndarray,
+) -> List[Dict[str, Any]]:
+    # One dict per group in ``groups``, built column-wise from the arrays.
+    columns: List[List[Any]] = [[labels[i] for i in groups]]
+    for field in fields:
+        values = stats[field][groups]
+        columns.append(
+            values.tolist() if field == "count" else _json_floats(values)
+        )
+    names = [key, *fields]
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
 def _compute_metrics_by_target(
     df: pd.DataFrame,
     target_col: Optional[str],
     metric_cols: List[str],
 ) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Per-target mean, median, count, std, min, max and quartiles of each
+    numeric metric. The target is factorized once and all metrics are
+    aggregated against the same codes.
+    """
     result: Dict[str, List[Dict[str, Any]]] = {}
     if not target_col:
         return result
     if target_col not in df.columns:
         return result
 
-    for metric in metric_cols:
-        if metric not in df.columns:
-            continue
-        series = df[metric]
-        if not is_numeric_dtype(series):
-            continue
-
-        try:
-            grouped = (
-                df[[target_col, metric]]
-                .dropna(subset=[target_col])
-                .groupby(target_col)[metric]
-                .agg(["mean", "median", "count"])
-            )
-        except Exception:
-            logger.exception("Failed computing metrics_by_target for %s", metric)
-            continue
-
-        rows: List[Dict[str, Any]] = []
-        for idx, row in grouped.iterrows():
-            rows.append(
-                {
-                    "target": str(idx),
-                    "mean": float(row.get("mean"))
-                    if row.get("mean") is not None
-                    else None,
-                    "median": float(row.get("median"))
-                    if row.get("median") is not None
-                    else None,
-                    "count": int(row.get("count"))
-                    if row.get("count") is not None
-                    else 0,
-                }
-            )
-        result[metric] = rows
-
+    columns = _metric_arrays(df, metric_cols)
+    if not columns:
+        return result
+    codes, uniques = pd.factorize(df[target_col], sort=True)
+    labels = [str(value) for value in uniques]
+    stats = aggregate_groups(codes, len(labels), columns, quantiles=True)
+
+    groups = np.arange(len(labels))
+    fields = ["mean", "median", "count", "std", "min", "max", "p25", "p75"]
+    for metric, metric_stats in stats.items():
+        result[metric] = _group_records("target", labels, metric_stats, fields, groups)
     return result
 
 
-def _bucket_time_column(series: pd.Series) -> Optional[pd.Series]:
-    if series.isna().all():
-        return None
+def time_bucket_freq(span_days: int) -> str:
+    """
+    Bucket size for a time column spanning ``span_days``: days up to a
+    month, weeks up to a year, months beyond.
+    """
+    if span_days <= 31:
+        return "D"
+    if span_days <= 365:
+        return "W"
+    return "M"
+
+
+_DAY_NS = 86_400 * 10**9
+# 1970-01-01 was a Thursday; shifting by 3 days makes weeks start on Monday
+# like pandas' "W" (W-SUN) periods.
+_WEEK_SHIFT_DAYS = 3
+_NAT = np.iinfo("int64").min
+
+# Parsed time columns kept per (scope, column), e.g. scope = (dataset id,
+# analysis version), so re-bucketing after a config change does not parse
+# the column again. Each entry is one int64 per row; the cache is bounded
+# by SEMANTIC_TIME_CACHE_BYTES in total, least recently used out first. It
+# is per process: Celery workers and web processes each keep their own.
+_time_epoch_cache: "OrderedDict[Tuple[Hashable, str], np.ndarray]" = OrderedDict()
+
+
+def cached_time_epochs(scope: Hashable, column: str) -> Optional[np.ndarray]:
+    epochs = _time_epoch_cache.get((scope, column))
+    if epochs is not None:
+        _time_epoch_cache.move_to_end((scope, column))
+    return epochs
+
+
+def _cache_time_epochs(scope: Hashable, column: str, epochs: np.ndarray) -> None:
+    # Columns above SEMANTIC_TIME_CACHE_MAX_ENTRY_BYTES are parsed each time.
+    if epochs.nbytes > settings.SEMANTIC_TIME_CACHE_MAX_ENTRY_BYTES:
+        return
+    _time_epoch_cache[(scope, column)] = epochs
+    _time_epoch_cache.move_to_end((scope, column))
+    total = sum(cached.nbytes for cached in _time_epoch_cache.values())
+    while total > settings.SEMANTIC_TIME_CACHE_BYTES:
+        _, evicted = _time_epoch_cache.popitem(last=False)
+        total -= evicted.nbytes
+
+
+def parse_time_epochs(series: pd.Series) -> np.ndarray:
+    """
+    Parse a time column once into UTC nanoseconds since the epoch (int64;
+    unparseable and missing values are NaT's integer value).
+    """
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        parsed = series.dt.tz_convert("UTC")
+    else:
+        parsed = pd.to_datetime(series, errors="coerce", utc=True)
+    return pd.DatetimeIndex(parsed).as_unit("ns").asi8
 
-    try:
-        dt = pd.to_datetime(series, errors="coerce", utc=True)
-    except Exception:
-        logger.exception("Failed to parse time column to datetime")
-        return None
 
-    dt = dt.dropna()
-    if dt.empty:
+def _time_bucket_keys(
+    epochs: np.ndarray, freq: Optional[str] = None
+) -> Optional[Tuple[np.ndarray, np.ndarray, str]]:
+    """
+    Integer bucket keys for the valid timestamps: days, Monday-based weeks
+    or months since the epoch. Returns (keys, valid mask, freq), or None
+    when nothing parses.
+    """
+    valid = epochs != _NAT
+    if not valid.any():
         return None
+    values = epochs[valid]
 
-    span = dt.max() - dt.min()
-    span_days = span.days if hasattr(span, "days") else 0
+    if freq is None:
+        span_days = int((values.max() - values.min()) // _DAY_NS)
+        freq = time_bucket_freq(span_days)
 
-    if span_days <= 31:
-        freq = "D"
-        fmt = "%Y-%m-%d"
-    elif span_days <= 365:
-        freq = "W"
-        fmt = "%Y-%m-%d"
+    days = values // _DAY_NS
+    if freq == "D":
+        keys = days
+    elif freq == "W":
+        keys = (days + _WEEK_SHIFT_DAYS) // 7
     else:
-        freq = "M"
-        fmt = "%Y-%m"
+        keys = days.astype("datetime64[D]").astype("datetime64[M]").astype("int64")
+    return keys, valid, freq
+
 
-    bucket = pd.to_datetime(series, errors="coerce", utc=True)
+def _dense_keys(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Like ``np.unique(keys, return_inverse=True)`` without sorting: the
+    bucket choice keeps key ranges small (at most 32 days or 53 weeks, or
+    the months between the first and last time), so keys are offset from
+    the smallest one; unused keys in the range stay in ``unique``.
+    """
+    low = keys.min()
+    return np.arange(low, keys.max() + 1), keys - low
+
+
+def _time_bucket_labels(keys: np.ndarray, freq: str) -> List[str]:
+    # Same text as strftime("%Y-%m-%d") / Period("W" or "M").astype(str).
     if freq == "D":
-        return bucket.dt.strftime(fmt)
+        return list(np.datetime_as_string(keys.astype("datetime64[D]"), unit="D"))
     if freq == "W":
-        return bucket.dt.to_period("W").astype(str)
-    return bucket.dt.to_period("M").astype(str)
+        starts = (keys * 7 - _WEEK_SHIFT_DAYS).astype("datetime64[D]")
+        first = np.datetime_as_string(starts, unit="D")
+        last = np.datetime_as_string(starts + np.timedelta64(6, "D"), unit="D")
+        return [f"{a}/{b}" for a, b in zip(first, last)]
+    return list(np.datetime_as_string(keys.astype("datetime64[M]"), unit="M"))
+
+
+def _bucket_time_column(
+    series: pd.Series, freq: Optional[str] = None
+) -> Optional[pd.Series]:
+    """
+    Bucket label per row (None where the time does not parse). Kept for
+    callers that want labels; the metrics path groups on integer keys.
+    """
+    bucketed = _time_bucket_keys(parse_time_epochs(series), freq)
+    if bucketed is None:
+        return None
+    keys, valid, freq = bucketed
+    unique, inverse = _dense_keys(keys)
+    labels = np.empty(len(series), dtype=object)
+    labels[valid] = np.asarray(_time_bucket_labels(unique, freq), dtype=object)[
+        inverse
+    ]
+    return pd.Series(labels, index=series.index)
 
 
 def _compute_metrics_over_time(
     df: pd.DataFrame,
     time_col: Optional[str],
     metric_cols: List[str],
+    freq: Optional[str] = None,
+    epochs: Optional[np.ndarray] = None,
 ) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Per-bucket mean, count, std, min and max of each numeric metric. The
+    time column is parsed once (or taken from ``epochs``), bucketed with
+    integer arithmetic and grouped with bincount; labels are only built
+    for the buckets that occur.
+    """
     result: Dict[str, List[Dict[str, Any]]] = {}
     if not time_col:
         return result
-    if time_col not in df.columns:
-        return result
+    if epochs is None:
+        if time_col not in df.columns:
+            return result
+        epochs = parse_time_epochs(df[time_col])
 
-    time_series = df[time_col]
-    bucket_series = _bucket_time_column(time_series)
-    if bucket_series is None:
+    bucketed = _time_bucket_keys(epochs, freq)
+    if bucketed is None:
+        return result
+    keys, valid, freq = bucketed
+    columns = _metric_arrays(df, metric_cols)
+    if not columns:
         return result
+    unique, inverse = _dense_keys(keys)
+    codes = np.full(len(valid), -1, dtype="int64")
+    codes[valid] = inverse
+    stats = aggregate_groups(codes, unique.size, columns)
+
+    labels = _time_bucket_labels(unique, freq)
+    fields = ["mean", "count", "std", "min", "max"]
+    for metric, metric_stats in stats.items():
+        groups = np.flatnonzero(metric_stats["count"])
+        result[metric] = _group_records("bucket", labels, metric_stats, fields, groups)
+    return result
 
-    work = df.copy()
-    work["_time_bucket"] = bucket_series
-    work = work.dropna(subset=["_time_bucket"])
 
-    for metric in metric_cols:
-        if metric not in work.columns:
-            continue
-        series = work[metric]
-        if not is_numeric_dtype(series):
-            continue
+def semantic_columns(semantic_config: Dict[str, Any]) -> List[str]:
+    """
+    Columns read by compute_semantic_aggregates for this config, so callers
+    can load just those from the columnar cache.
+    """
+    config = semantic_config or {}
+    columns: List[str] = []
+    for name in [
+        config.get("target_column"),
+        config.get("time_column"),
+        *(config.get("metric_columns") or []),
+    ]:
+        if name and name not in columns:
+            columns.append(name)
+    return columns
+
+
+def compute_semantic_aggregate_parts(
+    df: pd.DataFrame,
+    parts: List[Dict[str, Any]],
+    time_freqs: Optional[Dict[str, str]] = None,
+    cache_scope: Optional[Hashable] = None,
+) -> List[Any]:
+    """
+    Compute individual pieces of semantic_aggregates, in the order given.
 
-        try:
-            grouped = (
-                work[["_time_bucket", metric]]
-                .dropna(subset=[metric])
-                .groupby("_time_bucket")[metric]
-                .agg(["mean", "count"])
-            )
-        except Exception:
-            logger.exception("Failed computing metrics_over_time for %s", metric)
-            continue
+    Each part is ``{"kind", "target_column", "time_column", "metric"}``
+    where kind is one of target_distribution, metrics_by_target or
+    metrics_over_time. Metrics sharing a target (or time) column are
+    grouped so the time column is bucketed once. A part that does not
+    apply (e.g. a non-numeric metric) comes back as None.
+
+    ``time_freqs`` fixes the bucket size ("D", "W" or "M") per time column
+    instead of picking it from the column's span, so buckets line up with
+    ones computed earlier over other rows.
 
-        rows: List[Dict[str, Any]] = []
-        for idx, row in grouped.iterrows():
-            rows.append(
-                {
-                    "bucket": str(idx),
-                    "mean": float(row.get("mean"))
-                    if row.get("mean") is not None
-                    else None,
-                    "count": int(row.get("count"))
-                    if row.get("count") is not None
-                    else 0,
-                }
+    With a ``cache_scope`` (e.g. dataset id and analysis version) parsed
+    time columns are reused from, and kept in, a small per-process cache;
+    a time column found there need not be in ``df``.
+    """
+    results: List[Any] = [None] * len(parts)
+    groups: Dict[tuple, List[int]] = {}
+
+    for i, part in enumerate(parts):
+        kind = part["kind"]
+        if kind == "target_distribution":
+            results[i] = _compute_target_distribution(df, part["target_column"])
+        elif kind == "metrics_by_target":
+            groups.setdefault((kind, part["target_column"]), []).append(i)
+        elif kind == "metrics_over_time":
+            groups.setdefault((kind, part["time_column"]), []).append(i)
+
+    for (kind, column), indices in groups.items():
+        metrics = [parts[i]["metric"] for i in indices]
+        if kind == "metrics_by_target":
+            computed = _compute_metrics_by_target(df, column, metrics)
+        else:
+            epochs = None
+            if cache_scope is not None:
+                epochs = cached_time_epochs(cache_scope, column)
+                if epochs is not None and len(epochs) != len(df):
+                    epochs = None
+                if epochs is None and column in df.columns:
+                    epochs = parse_time_epochs(df[column])
+                    _cache_time_epochs(cache_scope, column, epochs)
+            computed = _compute_metrics_over_time(
+                df, column, metrics, (time_freqs or {}).get(column), epochs
             )
-        result[metric] = rows
+        for i in indices:
+            results[i] = computed.get(parts[i]["metric"])
 
-    return result
+    return results
 
 
 def compute_semantic_aggregates(
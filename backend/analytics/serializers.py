@@ -1,12 +1,33 @@
+from django.conf import settings
 from rest_framework import serializers
 
-from .models import AnalysisResult, Dataset
+from .aggregates import assemble_semantic_aggregates
+from .models import AnalysisResult, Dataset, DatasetBatch, UploadSession
+from .summaries import load_summary
+from .uploads import received_parts
 
 
 class AnalysisResultSerializer(serializers.ModelSerializer):
+    # Reassembled from the analysis' AnalysisSection rows.
+    summary_json = serializers.SerializerMethodField()
+
     class Meta:
         model = AnalysisResult
-        fields = ["status", "summary_json", "created_at", "error_message"]
+        fields = [
+            "status",
+            "summary_json",
+            "created_at",
+            "error_message",
+            "diagnostics",
+        ]
+
+    def get_summary_json(self, instance):
+        summary = load_summary(instance)
+        # Detail views ask for the cached semantic aggregates; list views skip
+        # the extra query.
+        if self.context.get("include_semantic_aggregates") and summary:
+            summary["semantic_aggregates"] = assemble_semantic_aggregates(instance)
+        return summary
 
 
 class DatasetSerializer(serializers.ModelSerializer):
@@ -14,5 +35,86 @@ class DatasetSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Dataset
-        fields = ["id", "name", "original_file", "uploaded_at", "is_active", "analysis"]
+        fields = [
+            "id",
+            "name",
+            "original_file",
+            "uploaded_at",
+            "is_active",
+            "profiling_mode",
+            "analysis",
+        ]
         read_only_fields = ["id", "uploaded_at", "is_active", "analysis"]
+
+
+class AnalysisCardSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AnalysisResult
+        fields = ["status", "card", "created_at", "error_message"]
+
+
+class DatasetCardSerializer(serializers.ModelSerializer):
+    """
+    List-view shape: the analysis card instead of the full summary_json.
+    """
+
+    analysis = AnalysisCardSerializer(read_only=True)
+
+    class Meta:
+        model = Dataset
+        fields = [
+            "id",
+            "name",
+            "original_file",
+            "uploaded_at",
+            "is_active",
+            "profiling_mode",
+            "analysis",
+        ]
+        read_only_fields = fields
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    # Parts already stored, so an interrupted upload can resume.
+    parts = serializers.SerializerMethodField()
+    part_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            "id",
+            "filename",
+            "name",
+            "profiling_mode",
+            "total_size",
+            "status",
+            "dataset",
+            "created_at",
+            "part_size",
+            "parts",
+        ]
+        read_only_fields = fields
+
+    def get_parts(self, instance):
+        if instance.status != "OPEN":
+            return []
+        return received_parts(instance)
+
+    def get_part_size(self, instance):
+        return settings.UPLOAD_PART_SIZE_BYTES
+
+
+class DatasetBatchSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DatasetBatch
+        fields = [
+            "id",
+            "number",
+            "original_file",
+            "row_offset",
+            "row_count",
+            "status",
+            "error_message",
+            "created_at",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,451 @@
+from __future__ import annotations
+
+import base64
+import math
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def _encode_array(values: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(values).tobytes()).decode("ascii")
+
+
+def _decode_array(data: str, dtype: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=dtype).copy()
+
+
+class RunningMoments:
+    """
+    Count / mean / variance / min / max accumulator.
+
+    Each batch is reduced with NumPy and folded into the running state with
+    Chan et al.'s pairwise form of Welford's update, so partial results from
+    separate chunks (or separate workers) can be merged without losing
+    precision.
+    """
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        mean = float(values.mean())
+        m2 = float(np.square(values - mean).sum())
+        self._combine(
+            int(values.size), mean, m2, float(values.min()), float(values.max())
+        )
+
+    def merge(self, other: "RunningMoments") -> None:
+        if other.count == 0:
+            return
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+
+    def _combine(
+        self,
+        count: int,
+        mean: float,
+        m2: float,
+        min_value: Optional[float],
+        max_value: Optional[float],
+    ) -> None:
+        if self.count == 0:
+            self.count = count
+            self.mean = mean
+            self.m2 = m2
+            self.min = min_value
+            self.max = max_value
+            return
+
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, min_value)
+        self.max = max(self.max, max_value)
+
+    @property
+    def variance(self) -> float:
+        if self.count < 2:
+            return float("nan")
+        return self.m2 / (self.count - 1)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance) if self.count >= 2 else float("nan")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunningMoments":
+        moments = cls()
+        moments.count = int(data["count"])
+        moments.mean = float(data["mean"])
+        moments.m2 = float(data["m2"])
+        moments.min = data["min"]
+        moments.max = data["max"]
+        return moments
+
+
+class KLLSketch:
+    """
+    Mergeable quantile sketch (Karnin, Lang & Liberty).
+
+    Items live in a stack of compactors; an item at level ``h`` stands for
+    ``2 ** h`` inputs. When a level overflows it is sorted and every other
+    item is promoted, so memory stays at roughly ``3 * k`` floats regardless
+    of stream length. While the stream fits in level 0 the quantiles are
+    exact and match pandas' linear interpolation.
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = 0) -> None:
+        self.k = k
+        self.n = 0
+        self.compactors: List[np.ndarray] = [np.empty(0, dtype="float64")]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.compactors) - level - 1
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.n += int(values.size)
+        self.compactors[0] = np.concatenate([self.compactors[0], values])
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append(np.empty(0, dtype="float64"))
+        for level, items in enumerate(other.compactors):
+            if items.size:
+                self.compactors[level] = np.concatenate([self.compactors[level], items])
+        self.n += other.n
+        self._compress()
+
+    def _compress(self) -> None:
+        while True:
+            overflowing = [
+                level
+                for level, items in enumerate(self.compactors)
+                if items.size > self._capacity(level)
+            ]
+            if not overflowing:
+                return
+            level = overflowing[0]
+            if level + 1 == len(self.compactors):
+                self.compactors.append(np.empty(0, dtype="float64"))
+
+            items = np.sort(self.compactors[level])
+            keep = items[-1:] if items.size % 2 else items[:0]
+            if items.size % 2:
+                items = items[:-1]
+            offset = int(self._rng.integers(2))
+            self.compactors[level] = keep
+            self.compactors[level + 1] = np.concatenate(
+                [self.compactors[level + 1], items[offset::2]]
+            )
+
+    def _weighted_items(self) -> Tuple[np.ndarray, np.ndarray]:
+        values = np.concatenate(self.compactors)
+        weights = np.concatenate(
+            [
+                np.full(items.size, 2**level, dtype="float64")
+                for level, items in enumerate(self.compactors)
+            ]
+        )
+        order = np.argsort(values, kind="stable")
+        return values[order], weights[order]
+
+    def quantiles(self, qs: Iterable[float]) -> List[float]:
+        qs = list(qs)
+        if self.n == 0:
+            return [float("nan")] * len(qs)
+
+        values, weights = self._weighted_items()
+        total = float(weights.sum())
+        # Each item covers a run of ``weight`` ranks; place it at the centre of
+        # that run so level-0 items land on integer ranks 0..n-1.
+        ranks = np.cumsum(weights) - weights + (weights - 1.0) / 2.0
+        positions = np.asarray(qs, dtype="float64") * (total - 1.0)
+        return [float(v) for v in np.interp(positions, ranks, values)]
+
+    @property
+    def is_exact(self) -> bool:
+        # Nothing has been compacted yet, so every input is still held.
+        return len(self.compactors) == 1
+
+    @property
+    def rank_error(self) -> float:
+        """
+        Normalized rank error of quantile / rank answers: the true rank of
+        a returned quantile is within ``rank_error * n`` of the requested
+        one with ~99% confidence (the DataSketches KLL bound for ``k``).
+        Zero while the sketch is exact.
+        """
+        if self.is_exact:
+            return 0.0
+        return 2.296 / self.k**0.9723
+
+    def counts_at_most(self, points: np.ndarray) -> np.ndarray:
+        """
+        Estimated number of inputs ``<= point`` for each point; exact while
+        the sketch is exact.
+        """
+        points = np.asarray(points, dtype="float64")
+        if self.n == 0:
+            return np.zeros(points.shape, dtype="float64")
+        values, weights = self._weighted_items()
+        cumulative = np.concatenate([[0.0], np.cumsum(weights)])
+        return cumulative[np.searchsorted(values, points, side="right")]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "k": self.k,
+            "n": self.n,
+            "compactors": [_encode_array(items) for items in self.compactors],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KLLSketch":
+        sketch = cls(k=int(data["k"]))
+        sketch.n = int(data["n"])
+        sketch.compactors = [
+            _decode_array(items, "float64") for items in data["compactors"]
+        ]
+        return sketch
+
+
+class MisraGries:
+    """
+    Mergeable heavy-hitters summary holding at most ``capacity`` counters.
+
+    Counts are lower bounds; ``error`` is the largest amount any counter may
+    have been under-reported by. Batches are expected pre-aggregated (e.g.
+    from ``value_counts``) and are pruned before being merged, which keeps
+    per-chunk Python work proportional to ``capacity``.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self.capacity = capacity
+        self.counts: Dict[Hashable, int] = {}
+        self.n = 0
+        self.error = 0
+
+    def update(self, keys: Iterable[Hashable], counts: Iterable[int]) -> None:
+        keys = list(keys)
+        counts = np.asarray(list(counts), dtype="int64")
+        self.n += int(counts.sum())
+
+        if len(keys) > self.capacity:
+            cutoff = int(
+                np.partition(counts, -(self.capacity + 1))[-(self.capacity + 1)]
+            )
+            self.error += cutoff
+            counts = counts - cutoff
+            keep = counts > 0
+            keys = [key for key, flag in zip(keys, keep) if flag]
+            counts = counts[keep]
+
+        for key, count in zip(keys, counts.tolist()):
+            self.counts[key] = self.counts.get(key, 0) + count
+        self._prune()
+
+    def merge(self, other: "MisraGries") -> None:
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.n += other.n
+        self.error += other.error
+        self._prune()
+
+    def _prune(self) -> None:
+        if len(self.counts) <= self.capacity:
+            return
+        values = np.fromiter(
+            self.counts.values(), dtype="int64", count=len(self.counts)
+        )
+        cutoff = int(np.partition(values, -(self.capacity + 1))[-(self.capacity + 1)])
+        self.error += cutoff
+        self.counts = {
+            key: count - cutoff for key, count in self.counts.items() if count > cutoff
+        }
+
+    def top(self, k: int) -> List[Tuple[Hashable, int]]:
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Keys are stored as strings, which is how profiling feeds them in.
+        return {
+            "capacity": self.capacity,
+            "n": self.n,
+            "error": self.error,
+            "counts": [[str(key), int(count)] for key, count in self.counts.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MisraGries":
+        summary = cls(capacity=int(data["capacity"]))
+        summary.n = int(data["n"])
+        summary.error = int(data["error"])
+        summary.counts = {key: int(count) for key, count in data["counts"]}
+        return summary
+
+
+class HyperLogLog:
+    """
+    Mergeable distinct-count sketch (Flajolet et al., with the linear
+    counting correction for small cardinalities) over ``2 ** precision``
+    one-byte registers. Values are hashed with pandas' vectorised 64-bit
+    hash, so numbers and strings must be fed consistently per sketch.
+    """
+
+    def __init__(self, precision: int = 12) -> None:
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype="uint8")
+
+    @property
+    def relative_error(self) -> float:
+        # Standard error of the estimate relative to the true count.
+        return 1.04 / math.sqrt(self.registers.size)
+
+    def update(self, values: np.ndarray) -> None:
+        if len(values) == 0:
+            return
+        hashes = pd.util.hash_array(np.asarray(values)).astype("uint64")
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype("int64")
+        rest = hashes & np.uint64((1 << (64 - p)) - 1)
+        # Position of the leftmost 1-bit in the remaining 64 - p bits. The
+        # bit length is taken from the two 32-bit halves, which float64
+        # holds exactly.
+        high = (rest >> np.uint64(32)).astype("float64")
+        low = (rest & np.uint64(0xFFFFFFFF)).astype("float64")
+        bit_length = np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+        rank = (64 - p) - bit_length + 1
+        np.maximum.at(self.registers, index, rank.astype("uint8"))
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        m = float(self.registers.size)
+        alpha = 0.7213 / (1.0 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.exp2(-self.registers.astype("float64"))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)
+        return raw
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"precision": self.precision, "registers": _encode_array(self.registers)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HyperLogLog":
+        sketch = cls(precision=int(data["precision"]))
+        sketch.registers = _decode_array(data["registers"], "uint8")
+        return sketch
+
+
+class ReservoirSample:
+    """
+    Uniform fixed-size sample over a stream (Vitter's Algorithm R, applied
+    to a whole batch at a time).
+    """
+
+    def __init__(self, capacity: int = 10_000, seed: Optional[int] = 0) -> None:
+        self.capacity = capacity
+        self.seen = 0
+        self.items = np.empty(0, dtype=object)
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=object)
+
+        room = self.capacity - self.items.size
+        if room > 0:
+            head = values[:room]
+            self.items = np.concatenate([self.items, head])
+            self.seen += head.size
+            values = values[room:]
+        if values.size == 0:
+            return
+
+        # Item number ``seen + i`` replaces a random slot with probability
+        # capacity / (seen + i + 1); for repeated slots the later item wins,
+        # as in the serial algorithm.
+        positions = self.seen + np.arange(values.size)
+        slots = (self._rng.random(values.size) * (positions + 1)).astype("int64")
+        accepted = slots < self.capacity
+        self.items[slots[accepted]] = values[accepted]
+        self.seen += values.size
+
+    def merge(self, other: "ReservoirSample") -> None:
+        """
+        Combine two samples into a uniform sample of both streams: each
+        kept item stands for ``seen / len(items)`` inputs of its side.
+        """
+        if other.items.size == 0:
+            self.seen += other.seen
+            return
+        items = np.concatenate([self.items, other.items])
+        weights = np.concatenate(
+            [
+                np.full(self.items.size, self.seen / max(self.items.size, 1)),
+                np.full(other.items.size, other.seen / other.items.size),
+            ]
+        )
+        self.seen += other.seen
+        if items.size > self.capacity:
+            keep = self._rng.choice(
+                items.size, size=self.capacity, replace=False, p=weights / weights.sum()
+            )
+            items = items[np.sort(keep)]
+        self.items = items
+
+    def to_dict(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        At most ``limit`` items (a uniform subset) are kept, so serialized
+        samples stay small.
+        """
+        items = self.items
+        if limit is not None and items.size > limit:
+            items = items[np.sort(self._rng.choice(items.size, limit, replace=False))]
+        return {
+            "capacity": self.capacity,
+            "seen": self.seen,
+            # Items are written as strings, as read from a CSV; a bool
+            # column's sample is kept as bools.
+            "items": [
+                bool(item) if isinstance(item, (bool, np.bool_)) else str(item)
+                for item in items.tolist()
+            ],
+            "sampled": int(items.size),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ReservoirSample":
+        sample = cls(capacity=int(data["capacity"]))
+        sample.seen = int(data["seen"])
+        sample.items = np.array(data["items"], dtype=object)
+        return sample
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.fields.json import KeyTextTransform, KeyTransform
+from django.utils import timezone
+
+from .models import AnalysisResult, AnalysisSection
+from .response_cache import invalidate_dataset_responses
+
+# The columns section is stored as rows "columns:0", "columns:1", ... of at
+# most this many columns each, so one changed column rewrites one row.
+COLUMNS_PER_SECTION = 100
+_COLUMN_CHUNK = "columns:"
+
+
+def card_semantic(semantic_config: Dict[str, Any]) -> Dict[str, Any]:
+    config = semantic_config or {}
+    return {
+        "target_column": config.get("target_column"),
+        "time_column": config.get("time_column"),
+        "metric_columns": list(config.get("metric_columns") or []),
+    }
+
+
+def analysis_card(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The few numbers the dataset list shows, taken from a full summary so
+    listing never has to load summary_json.
+    """
+    summary = summary or {}
+    columns = summary.get("columns") or {}
+
+    type_counts: Dict[str, int] = {}
+    for col_summary in columns.values():
+        col_type = col_summary.get("type") or "unknown"
+        type_counts[col_type] = type_counts.get(col_type, 0) + 1
+
+    missing_cells = sum(
+        int(value)
+        for value in (summary.get("missing_values") or {}).values()
+        if isinstance(value, (int, float)) and value == value
+    )
+
+    return {
+        "row_count": summary.get("row_count") or 0,
+        "column_count": summary.get("column_count") or len(columns),
+        "type_counts": type_counts,
+        "missing_cells": missing_cells,
+        "semantic": card_semantic(summary.get("semantic_config")),
+    }
+
+
+def _digest(payload: Any) -> str:
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _summary_rows(summary: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    # (row name, payload) in key order, the columns section in chunks.
+    rows: List[Tuple[str, Any]] = []
+    for name, payload in summary.items():
+        if name != "columns" or not isinstance(payload, dict):
+            rows.append((name, payload))
+            continue
+        items = list(payload.items())
+        for start in range(0, max(len(items), 1), COLUMNS_PER_SECTION):
+            chunk = dict(items[start : start + COLUMNS_PER_SECTION])
+            rows.append((f"{_COLUMN_CHUNK}{start // COLUMNS_PER_SECTION}", chunk))
+    return rows
+
+
+def save_summary(analysis: AnalysisResult, summary: Dict[str, Any]) -> None:
+    """
+    Replace an analysis' summary, storing each top-level key as its own
+    AnalysisSection row (the columns in several). Only rows whose payload
+    or position changed are written, e.g. after an append that leaves the
+    semantic config alone; rows of keys no longer present are deleted.
+    """
+    rows = _summary_rows(summary)
+    with transaction.atomic():
+        existing = {
+            name: (row_id, position, digest)
+            for row_id, name, position, digest in analysis.sections.values_list(
+                "id", "name", "position", "digest"
+            )
+        }
+        created = []
+        for position, (name, payload) in enumerate(rows):
+            digest = _digest(payload)
+            current = existing.pop(name, None)
+            if current is None:
+                created.append(
+                    AnalysisSection(
+                        analysis=analysis,
+                        name=name,
+                        position=position,
+                        payload=payload,
+                        digest=digest,
+                    )
+                )
+            elif current[1:] != (position, digest):
+                AnalysisSection.objects.filter(id=current[0]).update(
+                    position=position,
+                    payload=payload,
+                    digest=digest,
+                    updated_at=timezone.now(),
+                )
+        if existing:
+            AnalysisSection.objects.filter(
+                id__in=[row_id for row_id, _, _ in existing.values()]
+            ).delete()
+        AnalysisSection.objects.bulk_create(created)
+
+
+def save_summary_section(analysis: AnalysisResult, name: str, payload: Any) -> None:
+    """
+    Write a single section (e.g. semantic_config) without touching the rest.
+    """
+    updated = AnalysisSection.objects.filter(analysis=analysis, name=name).update(
+        payload=payload, digest=_digest(payload), updated_at=timezone.now()
+    )
+    if not updated:
+        AnalysisSection.objects.create(
+            analysis=analysis,
+            name=name,
+            position=analysis.sections.count(),
+            payload=payload,
+            digest=_digest(payload),
+        )
+    invalidate_dataset_responses(analysis.dataset_id)
+
+
+def load_summary(
+    analysis: AnalysisResult, sections: Optional[Iterable[str]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Reassemble the summary (or just ``sections`` of it) in its original key
+    order. Returns None when nothing has been stored yet. Uses
+    ``prefetch_related("sections")`` results when present.
+    """
+    if sections is None:
+        rows = analysis.sections.all()
+    else:
+        sections = list(sections)
+        query = Q(name__in=sections)
+        if "columns" in sections:
+            query |= Q(name__startswith=_COLUMN_CHUNK)
+        rows = analysis.sections.filter(query)
+    summary: Dict[str, Any] = {}
+    for row in rows:
+        if row.name.startswith(_COLUMN_CHUNK):
+            summary.setdefault("columns", {}).update(row.payload or {})
+        else:
+            summary[row.name] = row.payload
+    return summary or None
+
+
+def load_summary_section(
+    analysis: AnalysisResult, name: str, default: Any = None
+) -> Any:
+    payload = (
+        AnalysisSection.objects.filter(analysis=analysis, name=name)
+        .values_list("payload", flat=True)
+        .first()
+    )
+    return default if payload is None else payload
+
+
+def load_column_type(analysis: AnalysisResult, column: str) -> Optional[str]:
+    """
+    ``columns[column]["type"]`` read inside the database, so the (possibly
+    very large) columns section is not loaded for one value.
+    """
+    return (
+        AnalysisSection.objects.filter(
+            Q(name="columns") | Q(name__startswith=_COLUMN_CHUNK),
+            analysis=analysis,
+            payload__has_key=column,
+        )
+        .annotate(column_type=KeyTextTransform("type", KeyTransform(column, "payload")))
+        .values_list("column_type", flat=True)
+        .first()
+    )
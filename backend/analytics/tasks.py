@@ -1,119 +1,236 @@
 import logging
+import math
 import traceback
+from typing import List, Optional
 
 import pandas as pd
-from celery import shared_task
-from pandas.api.types import (
-    is_bool_dtype,
-    is_datetime64_any_dtype,
-    is_numeric_dtype,
+from celery import chord, shared_task
+from django.conf import settings
+from django.db import transaction
+
+from .aggregates import aggregate_part
+from .appends import apply_batch
+from .diagnostics import Diagnostics
+from .formats import estimated_data_size
+from .ingest import (
+    build_columnar_cache,
+    build_dataset_quality_index,
+    dataset_columns,
+    has_columnar_cache,
+    iter_dataset_chunks,
+    load_dataset_frame,
+    write_dataset_sketches,
 )
-
-from .models import AnalysisResult
+from .metrics import record_analysis
+from .models import AnalysisResult, Dataset, DatasetBatch, SemanticAggregate
+from .profiling import (
+    ProgressCallback,
+    infer_column_type,  # noqa: F401 - kept importable here
+    profile_approximate,
+    profile_dataframe,
+    profile_streaming,
+)
+from .progress import ProgressPublisher
+from .response_cache import invalidate_dataset_responses
+from .scheduling import (
+    AnalysisHeartbeat,
+    analysis_queue,
+    claim_analysis_slot,
+    estimate_analysis_cost,
+)
+from .semantic_utils import cached_time_epochs, compute_semantic_aggregate_parts
+from .summaries import analysis_card, save_summary
+from .utils import store_wordnet_antonym
 
 logger = logging.getLogger(__name__)
 
 
-def infer_column_type(series: pd.Series, name: str) -> str:
+def resolve_profiling_mode(dataset: Dataset, file_path: str) -> str:
     """
-    Infer a semantic column type with extra logic for:
-    - boolean-like numeric (0/1)
-    - boolean-like strings (true/false, yes/no, etc.)
-    - datetime in object columns via to_datetime sampling
+    Pick the profiling engine for a dataset: an explicit per-dataset choice
+    wins, otherwise files above ``ANALYSIS_STREAMING_THRESHOLD_BYTES`` are
+    streamed in chunks instead of loaded whole, and files above
+    ``ANALYSIS_APPROXIMATE_THRESHOLD_BYTES`` are summarized with sketches.
+    Compressed and Parquet uploads are scaled up to an estimate of their
+    decoded size.
     """
+    if dataset.profiling_mode != "AUTO":
+        return dataset.profiling_mode
+
     try:
-        dtype_str = str(series.dtype)
-        logger.debug("Inferring type for column '%s' with dtype '%s'", name, dtype_str)
-
-        # 1) Explicit boolean dtype
-        if is_bool_dtype(series):
-            logger.debug("Column '%s' detected as boolean (native bool dtype)", name)
-            return "boolean"
-
-        # 2) Numeric with possible 0/1 boolean-like values
-        if is_numeric_dtype(series):
-            non_null = series.dropna()
-            unique_non_null = pd.unique(non_null)
-            # If only 0/1 (or subset), treat as boolean
-            if len(unique_non_null) <= 2:
-                try:
-                    normalized = {int(v) for v in unique_non_null if pd.notna(v)}
-                except Exception:
-                    normalized = set()
-                if normalized and normalized.issubset({0, 1}):
-                    logger.debug(
-                        "Column '%s' numeric but binary {0,1} -> treating as boolean",
-                        name,
-                    )
-                    return "boolean"
-            logger.debug("Column '%s' detected as numeric", name)
-            return "numeric"
-
-        # 3) Native datetime dtype
-        if is_datetime64_any_dtype(series):
-            logger.debug("Column '%s' detected as datetime (native datetime64)", name)
-            return "datetime"
-
-        # 4) Object-like: try boolean-like strings first
-        if series.dtype == "object":
-            sample = series.dropna()
-            if not sample.empty:
-                # Sample at most 50 distinct values
-                sample_unique = pd.Series(sample.unique())
-                if len(sample_unique) > 50:
-                    sample_unique = sample_unique.sample(50, random_state=0)
-
-                tokens = {str(v).strip().lower() for v in sample_unique}
-                bool_pairs = [
-                    {"true", "false"},
-                    {"yes", "no"},
-                    {"y", "n"},
-                    {"t", "f"},
-                    {"0", "1"},
-                ]
-                for pair in bool_pairs:
-                    if tokens.issubset(pair):
-                        logger.debug(
-                            "Column '%s' object but boolean-like strings %s -> boolean",
-                            name,
-                            pair,
-                        )
-                        return "boolean"
-
-            # 5) Try datetime coercion on object columns
-            if not sample.empty:
-                try:
-                    parsed = pd.to_datetime(
-                        sample, errors="coerce", utc=False, infer_datetime_format=True
-                    )
-                    non_null_ratio = float(parsed.notna().mean())
-                    logger.debug(
-                        "Column '%s' datetime coercion non-null ratio = %.3f",
-                        name,
-                        non_null_ratio,
-                    )
-                    if non_null_ratio >= 0.8:
-                        logger.debug(
-                            "Column '%s' treated as datetime (object -> datetime)",
-                            name,
-                        )
-                        return "datetime"
-                except Exception:
-                    logger.debug(
-                        "Column '%s' datetime coercion failed, leaving as categorical",
-                        name,
-                    )
-
-            logger.debug("Column '%s' treated as categorical (object)", name)
-            return "categorical"
-
-        # 6) Fallback: other dtypes
-        logger.debug("Column '%s' treated as 'other' (dtype=%s)", name, dtype_str)
-        return "other"
+        size = estimated_data_size(file_path)
+    except OSError:
+        return "IN_MEMORY"
 
-    except Exception:
-        logger.exception("Failed to infer type for column '%s'", name)
-        return "other"
+    if size > settings.ANALYSIS_APPROXIMATE_THRESHOLD_BYTES:
+        return "APPROXIMATE"
+    if size > settings.ANALYSIS_STREAMING_THRESHOLD_BYTES:
+        return "STREAMING"
+    return "IN_MEMORY"
+
+
+def plan_column_shards(columns: List[str]) -> List[List[str]]:
+    """
+    Split columns into contiguous, evenly sized shards for parallel
+    profiling. Narrow datasets stay in a single shard.
+    """
+    if len(columns) < settings.ANALYSIS_PARALLEL_MIN_COLUMNS:
+        return [columns]
+
+    shard_count = min(
+        settings.ANALYSIS_PARALLEL_MAX_SHARDS,
+        math.ceil(len(columns) / settings.ANALYSIS_PARALLEL_COLUMNS_PER_SHARD),
+    )
+    if shard_count <= 1:
+        return [columns]
+
+    size = math.ceil(len(columns) / shard_count)
+    return [columns[i : i + size] for i in range(0, len(columns), size)]
+
+
+def _profile_columns(
+    dataset: Dataset,
+    mode: str,
+    columns: Optional[List[str]] = None,
+    progress: Optional[ProgressCallback] = None,
+    diagnostics: Optional[Diagnostics] = None,
+) -> dict:
+    """
+    Profile ``columns`` (default: all) of a dataset with the chosen engine,
+    recording the load and profile stages in ``diagnostics``.
+    """
+    diagnostics = diagnostics or Diagnostics()
+    if mode in ("STREAMING", "APPROXIMATE"):
+
+        def read_chunks(subset):
+            return iter_dataset_chunks(dataset, columns=subset or columns)
+
+        profile = profile_approximate if mode == "APPROXIMATE" else profile_streaming
+        # Chunks are read while profiling, so there is no separate load.
+        with diagnostics.stage("profile") as stage:
+            result = profile(
+                read_chunks,
+                dataset_id=dataset.id,
+                progress=progress,
+                timer=diagnostics.time_column,
+            )
+            stage["rows"] = result["row_count"]
+        return result
+
+    with diagnostics.stage("load") as stage:
+        df = load_dataset_frame(dataset, columns=columns, compact=True)
+        stage["rows"] = len(df)
+    logger.debug(
+        "Loaded dataset %s into DataFrame with shape %s",
+        dataset.id,
+        df.shape,
+    )
+    logger.debug("DataFrame dtypes:\n%s", df.dtypes)
+    with diagnostics.stage("profile", rows=len(df)):
+        return profile_dataframe(
+            df,
+            dataset_id=dataset.id,
+            progress=progress,
+            timer=diagnostics.time_column,
+        )
+
+
+def _data_bytes(analysis: AnalysisResult) -> Optional[int]:
+    try:
+        return estimated_data_size(analysis.dataset.original_file.path)
+    except (OSError, ValueError):
+        return None
+
+
+def _record_metrics(
+    analysis: AnalysisResult,
+    diagnostics: Diagnostics,
+    rows: Optional[int] = None,
+) -> None:
+    record_analysis(
+        queue=analysis.queue,
+        mode=diagnostics.mode,
+        status=analysis.status,
+        seconds=diagnostics.elapsed,
+        stage_seconds=diagnostics.stage_seconds(),
+        rows=rows,
+        data_bytes=_data_bytes(analysis) if analysis.status == "COMPLETED" else None,
+    )
+
+
+def _complete_analysis(
+    analysis: AnalysisResult, result: dict, diagnostics: Diagnostics
+) -> None:
+    dataset_id = analysis.dataset_id
+    progress = ProgressPublisher(dataset_id)
+
+    # At this point, all columns have been processed
+    # Log a small, safe summary rather than full result.
+    type_counts: dict[str, int] = {}
+    for col_name, col_summary in result["columns"].items():
+        t = col_summary.get("type", "unknown")
+        type_counts[t] = type_counts.get(t, 0) + 1
+
+    logger.info(
+        "Completed column analysis for dataset %s: %s",
+        dataset_id,
+        type_counts,
+    )
+    logger.debug(
+        "Analysis result snapshot for dataset %s: row_count=%s, column_count=%s",
+        dataset_id,
+        result.get("row_count"),
+        result.get("column_count"),
+    )
+
+    sketches = result.pop("sketches", None)
+    if sketches is not None:
+        with diagnostics.stage("sketches"):
+            write_dataset_sketches(analysis.dataset, sketches)
+
+    progress.stage("quality_index")
+    with diagnostics.stage("quality_index", rows=result["row_count"]):
+        quality = build_dataset_quality_index(analysis.dataset, result["columns"])
+    if quality is not None:
+        result["quality_issues"] = quality.issue_counts()
+
+    progress.stage("saving")
+    analysis.card = analysis_card(result)
+    analysis.status = "COMPLETED"
+    analysis.error_message = None
+    analysis.version += 1
+    with transaction.atomic():
+        with diagnostics.stage("save"):
+            save_summary(analysis, result)
+        analysis.diagnostics = diagnostics.to_dict()
+        analysis.save()
+    progress.finish("COMPLETED")
+    _record_metrics(analysis, diagnostics, rows=result["row_count"])
+
+    logger.info(
+        "Analysis task COMPLETED for dataset %s (id=%s)",
+        analysis.dataset.name,
+        dataset_id,
+    )
+
+
+def _fail_analysis(
+    analysis: AnalysisResult, error_message: str, diagnostics: Diagnostics
+) -> None:
+    analysis.status = "FAILED"
+    analysis.error_message = error_message
+    # Stages that finished before the error, to show where it happened.
+    analysis.diagnostics = diagnostics.to_dict()
+    analysis.save()
+    # The last traceback line is the exception itself.
+    ProgressPublisher(analysis.dataset_id).finish(
+        "FAILED", error=error_message.strip().splitlines()[-1]
+    )
+    _record_metrics(analysis, diagnostics)
+
+
+def _queue_options(analysis: AnalysisResult) -> dict:
+    return {"queue": analysis.queue} if analysis.queue else {}
 
 
 @shared_task
@@ -122,11 +239,60 @@ def test_task(x, y):
     return x + y
 
 
-@shared_task
-def run_analysis_task(dataset_id: int):
-    analysis = AnalysisResult.objects.get(dataset_id=dataset_id)
-    analysis.status = "RUNNING"
-    analysis.save()
+def enqueue_analysis(dataset: Dataset) -> None:
+    """
+    Send a dataset's analysis to the queue its estimated cost calls for,
+    recording both on the AnalysisResult.
+    """
+    cost = estimate_analysis_cost(dataset)
+    queue = analysis_queue(cost)
+    AnalysisResult.objects.filter(dataset=dataset).update(
+        status="PENDING", queue=queue, estimated_cost=cost
+    )
+    invalidate_dataset_responses(dataset.id)
+    logger.info(
+        "Queueing analysis of dataset %s on %s (estimated cost %s)",
+        dataset.id,
+        queue,
+        cost,
+    )
+    run_analysis_task.apply_async((dataset.id,), queue=queue)
+
+
+@shared_task(bind=True, max_retries=None)
+def run_analysis_task(self, dataset_id: int):
+    analysis = AnalysisResult.objects.select_related("dataset").get(
+        dataset_id=dataset_id
+    )
+    # Eager (in-process) runs have no queue to go back to.
+    if not claim_analysis_slot(analysis, enforce_limit=not self.request.is_eager):
+        deferred = self.request.retries * settings.ANALYSIS_DEFER_SECONDS
+        if deferred >= settings.ANALYSIS_MAX_DEFER_SECONDS:
+            logger.warning(
+                "Giving up on analysis of dataset %s after deferring it %ss",
+                dataset_id,
+                deferred,
+            )
+            _fail_analysis(
+                analysis,
+                f"Analysis did not start: the owner's other analyses kept every "
+                f"{analysis.queue} slot busy for {deferred // 60} minutes. "
+                "Try again once they have finished.",
+                Diagnostics(),
+            )
+            return
+        logger.info(
+            "Deferring analysis of dataset %s: owner is at the %s limit",
+            dataset_id,
+            analysis.queue,
+        )
+        raise self.retry(
+            countdown=settings.ANALYSIS_DEFER_SECONDS, **_queue_options(analysis)
+        )
+
+    progress = ProgressPublisher(dataset_id, heartbeat=AnalysisHeartbeat(dataset_id))
+    progress.start()
+    diagnostics = Diagnostics()
 
     try:
         dataset = analysis.dataset
@@ -139,128 +305,233 @@ def run_analysis_task(dataset_id: int):
             file_path,
         )
 
-        df = pd.read_csv(file_path)
-        logger.debug(
-            "Loaded CSV for dataset %s into DataFrame with shape %s",
-            dataset_id,
-            df.shape,
-        )
-        logger.debug("DataFrame dtypes:\n%s", df.dtypes)
-
-        result: dict = {
-            "row_count": int(len(df)),
-            "column_count": int(len(df.columns)),
-            "columns": {},
-            "missing_values": df.isnull().sum().to_dict(),
-        }
-
-        for col in df.columns:
-            series = df[col]
-            col_summary: dict = {}
-
-            # Column type detection with enhanced logic
-            col_type = infer_column_type(series, col)
-            col_summary["type"] = col_type
-
-            # Descriptive stats
-            try:
-                desc = series.describe(include="all")
-                if hasattr(desc, "to_dict"):
-                    col_summary["describe"] = desc.to_dict()
-                else:
-                    col_summary["describe"] = {}
-            except Exception:
-                logger.exception(
-                    "Failed to compute describe() for column '%s' in dataset %s",
-                    col,
+        progress.stage("columnar_cache")
+        with diagnostics.stage("columnar_cache"):
+            build_columnar_cache(dataset)
+
+        mode = resolve_profiling_mode(dataset, file_path)
+        diagnostics.mode = mode
+        logger.info("Profiling dataset %s with %s engine", dataset_id, mode)
+        columns = dataset_columns(dataset)
+        progress.stage("profiling", mode=mode, total_columns=len(columns))
+
+        # Shards read their own columns from the columnar cache, so only fan
+        # out when there is one; otherwise every shard would re-parse the CSV.
+        if has_columnar_cache(dataset):
+            shards = plan_column_shards(columns)
+            if len(shards) > 1:
+                logger.info(
+                    "Profiling dataset %s in %s parallel column shards",
                     dataset_id,
+                    len(shards),
                 )
-                col_summary["describe"] = {}
-
-            # Numeric histogram
-            if col_type == "numeric":
-                try:
-                    numeric_series = series.dropna()
-                    if not numeric_series.empty:
-                        vc = numeric_series.value_counts(bins=10).sort_index()
-                        bins_list = []
-                        for interval, count in vc.items():
-                            try:
-                                label = (
-                                    f"{float(interval.left):.2f}–"
-                                    f"{float(interval.right):.2f}"
-                                )
-                            except Exception:
-                                label = str(interval)
-                            bins_list.append(
-                                {
-                                    "bin": label,
-                                    "count": int(count),
-                                }
-                            )
-                        col_summary["histogram"] = bins_list
-                except Exception:
-                    logger.exception(
-                        "Failed to build histogram for numeric column '%s' "
-                        "in dataset %s",
-                        col,
-                        dataset_id,
-                    )
-
-            # Categorical / boolean value counts
-            if col_type in ("categorical", "boolean"):
-                try:
-                    vc = series.astype(str).value_counts().head(10)
-                    col_summary["value_counts"] = [
-                        {"value": idx, "count": int(count)} for idx, count in vc.items()
-                    ]
-                except Exception:
-                    logger.exception(
-                        "Failed to build value_counts for column '%s' in dataset %s",
-                        col,
-                        dataset_id,
-                    )
-
-            result["columns"][col] = col_summary
-            logger.debug(
-                "Column '%s' summary stored with type '%s' (keys=%s)",
-                col,
-                col_type,
-                list(col_summary.keys()),
-            )
+                # The callback picks the run's diagnostics up from here.
+                analysis.diagnostics = diagnostics.to_dict()
+                analysis.save(update_fields=["diagnostics", "updated_at"])
+                # Shards stay on the queue the job was sized for.
+                options = _queue_options(analysis)
+                chord(
+                    profile_columns_task.s(dataset_id, shard, mode).set(**options)
+                    for shard in shards
+                )(finalize_analysis_task.s(dataset_id).set(**options))
+                return
+
+        result = _profile_columns(
+            dataset, mode, progress=progress, diagnostics=diagnostics
+        )
+        _complete_analysis(analysis, result, diagnostics)
+
+    except Exception:
+        _fail_analysis(analysis, traceback.format_exc(), diagnostics)
+        logger.exception("Analysis task failed for dataset %s", dataset_id)
 
-        # At this point, all columns have been processed
-        # Log a small, safe summary rather than full result.
-        type_counts: dict[str, int] = {}
-        for col_name, col_summary in result["columns"].items():
-            t = col_summary.get("type", "unknown")
-            type_counts[t] = type_counts.get(t, 0) + 1
 
-        logger.info(
-            "Completed column analysis for dataset %s: %s",
-            dataset_id,
-            type_counts,
+@shared_task
+def profile_columns_task(dataset_id: int, columns: List[str], mode: str) -> dict:
+    """
+    Profile one column shard of a dataset. Errors are returned rather than
+    raised so the chord callback still runs and can mark the analysis
+    FAILED. The shard's own diagnostics travel back under "diagnostics".
+    """
+    diagnostics = Diagnostics()
+    try:
+        dataset = Dataset.objects.get(id=dataset_id)
+        result = _profile_columns(
+            dataset,
+            mode,
+            columns=columns,
+            progress=ProgressPublisher(
+                dataset_id, heartbeat=AnalysisHeartbeat(dataset_id)
+            ),
+            diagnostics=diagnostics,
         )
-        logger.debug(
-            "Analysis result snapshot for dataset %s: row_count=%s, column_count=%s",
+        result["diagnostics"] = diagnostics.to_dict()
+        return result
+    except Exception:
+        logger.exception(
+            "Column shard failed for dataset %s (%s columns)",
             dataset_id,
-            result.get("row_count"),
-            result.get("column_count"),
+            len(columns),
         )
+        return {"error": traceback.format_exc(), "diagnostics": diagnostics.to_dict()}
 
-        analysis.summary_json = result
-        analysis.status = "COMPLETED"
-        analysis.error_message = None
-        analysis.save()
 
-        logger.info(
-            "Analysis task COMPLETED for dataset %s (id=%s)",
-            dataset.name,
+@shared_task
+def finalize_analysis_task(partials: List[dict], dataset_id: int):
+    """
+    Merge column-shard results (in shard order) into one summary.
+    """
+    analysis = AnalysisResult.objects.get(dataset_id=dataset_id)
+    diagnostics = Diagnostics.from_dict(analysis.diagnostics)
+    for shard, partial in enumerate(partials):
+        diagnostics.merge(partial.pop("diagnostics", {}), shard)
+
+    errors = [partial["error"] for partial in partials if "error" in partial]
+    if errors:
+        _fail_analysis(analysis, errors[0], diagnostics)
+        logger.error(
+            "Analysis task failed for dataset %s: %s of %s shards failed",
             dataset_id,
+            len(errors),
+            len(partials),
+        )
+        return
+
+    result: dict = {
+        "row_count": partials[0]["row_count"] if partials else 0,
+        "column_count": 0,
+        "columns": {},
+        "missing_values": {},
+    }
+    sketches = None
+    for partial in partials:
+        result["column_count"] += partial["column_count"]
+        result["columns"].update(partial["columns"])
+        result["missing_values"].update(partial["missing_values"])
+        if "sketches" in partial:
+            # Shards cover disjoint columns of the same rows.
+            sketches = sketches or {"row_count": result["row_count"], "columns": {}}
+            sketches["columns"].update(partial["sketches"]["columns"])
+    if sketches is not None:
+        result["approximate"] = True
+        result["sketches"] = sketches
+
+    _complete_analysis(analysis, result, diagnostics)
+
+
+@shared_task
+def append_batch_task(batch_id: int):
+    """
+    Merge an appended batch into its dataset's analysis. A failed batch is
+    marked FAILED and the analysis goes back to its previous (completed)
+    state, since the rows before the batch are unchanged.
+    """
+    batch = DatasetBatch.objects.select_related("dataset__analysis").get(id=batch_id)
+    analysis = batch.dataset.analysis
+    batch.status = "RUNNING"
+    batch.save(update_fields=["status", "updated_at"])
+
+    progress = ProgressPublisher(batch.dataset_id)
+    progress.start()
+    progress.stage("appending", batch=batch.number)
+
+    try:
+        pending_keys = apply_batch(batch, progress=progress)
+    except Exception as exc:
+        logger.exception(
+            "Appending batch %s to dataset %s failed", batch.number, batch.dataset_id
+        )
+        batch.status = "FAILED"
+        batch.error_message = (
+            str(exc) if isinstance(exc, ValueError) else traceback.format_exc()
         )
+        batch.save(update_fields=["status", "error_message", "updated_at"])
+        AnalysisResult.objects.filter(id=analysis.id).update(status="COMPLETED")
+        invalidate_dataset_responses(batch.dataset_id)
+        progress.finish("COMPLETED")
+        return
 
+    progress.finish("COMPLETED")
+    if pending_keys:
+        compute_semantic_aggregates_task.delay(batch.dataset_id, pending_keys)
+
+
+@shared_task
+def lookup_antonym_task(word: str):
+    """
+    Look up a boolean label word missing from the antonym table in WordNet
+    (if installed on the worker), for the next label built from it.
+    """
+    antonym = store_wordnet_antonym(word)
+    logger.info("WordNet antonym of %r: %s", word, antonym)
+
+
+@shared_task
+def compute_semantic_aggregates_task(dataset_id: int, cache_keys: List[str]):
+    """
+    Compute pending SemanticAggregate rows, loading only the columns they
+    read. Rows from an older analysis version are left alone.
+    """
+    analysis = AnalysisResult.objects.select_related("dataset").get(
+        dataset_id=dataset_id
+    )
+    rows = list(
+        SemanticAggregate.objects.filter(
+            dataset_id=dataset_id,
+            cache_key__in=cache_keys,
+            version=analysis.version,
+            status="PENDING",
+        )
+    )
+    if not rows:
+        return
+
+    parts = [aggregate_part(row) for row in rows]
+    # Time columns parsed for an earlier config of this version are reused
+    # and not loaded again. That cache lives in each worker process, so only
+    # a task that lands on the process that parsed them benefits.
+    scope = (dataset_id, analysis.version)
+    parsed_times = {
+        part["time_column"]
+        for part in parts
+        if part["time_column"]
+        and cached_time_epochs(scope, part["time_column"]) is not None
+    } - {name for part in parts for name in (part["target_column"], part["metric"])}
+    try:
+        dataset = analysis.dataset
+        available = set(dataset_columns(dataset)) - parsed_times
+        columns = []
+        for part in parts:
+            for name in (part["target_column"], part["time_column"], part["metric"]):
+                if name in available and name not in columns:
+                    columns.append(name)
+
+        if columns:
+            df = load_dataset_frame(dataset, columns=columns)
+        else:
+            # Nothing left to load (load_dataset_frame would read every
+            # column); the parsed time columns give the row count.
+            row_count = max(
+                (len(cached_time_epochs(scope, name)) for name in parsed_times),
+                default=0,
+            )
+            df = pd.DataFrame(index=pd.RangeIndex(row_count))
+        payloads = compute_semantic_aggregate_parts(df, parts, cache_scope=scope)
     except Exception:
-        analysis.status = "FAILED"
-        analysis.error_message = traceback.format_exc()
-        analysis.save()
-        logger.exception("Analysis task failed for dataset %s", dataset_id)
+        logger.exception(
+            "Failed computing %s semantic aggregates for dataset %s",
+            len(rows),
+            dataset_id,
+        )
+        SemanticAggregate.objects.filter(id__in=[row.id for row in rows]).update(
+            status="FAILED"
+        )
+        invalidate_dataset_responses(dataset_id)
+        return
+
+    for row, payload in zip(rows, payloads):
+        row.payload = payload
+        row.status = "COMPLETED"
+        row.save(update_fields=["payload", "status", "updated_at"])
+
+    logger.info("Computed %s semantic aggregates for dataset %s", len(rows), dataset_id)
@@ -1,3 +1,846 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from benchmarks.bench_profiling import legacy_profile_dataframe
+
+from .aggregates import merge_aggregate_payload
+from .appends import apply_batch, create_batch
+from .columnar import _write_csv_cache, read_columnar, write_columnar_cache
+from .csvplan import CsvPlan, sniff_csv
+from .ingest import load_dataset_sketches
+from .models import (
+    AnalysisResult,
+    Dataset,
+    DatasetBatch,
+    SemanticAggregate,
+    UploadSession,
+)
+from .profiling import SketchProfiler, StreamingProfiler, profile_dataframe
+from .quality import build_quality_index
+from .scheduling import AnalysisHeartbeat, claim_analysis_slot
+from .semantic_utils import _cache_time_epochs, _time_epoch_cache, parse_time_epochs
+from .sketches import HyperLogLog, KLLSketch, MisraGries
+from .summaries import load_column_type, load_summary, save_summary
+from .tasks import compute_semantic_aggregates_task, run_analysis_task
+from .utils import regular_verb_forms
+
+LOCAL_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def mixed_frame(rows: int = 2_000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "score": rng.normal(70, 10, rows).round(2),
+            "count": rng.integers(0, 50, rows),
+            "ratio": rng.random(rows),
+            "passed": rng.integers(0, 2, rows),
+            "flag": rng.choice([True, False], rows),
+            "group": rng.choice(["a", "b", "c", "d"], rows),
+            "city": rng.choice([f"city {i}" for i in range(40)], rows),
+            "when": pd.Timestamp("2024-01-01")
+            + pd.to_timedelta(rng.integers(0, 90 * 24, rows), unit="h"),
+        }
+    )
+    df["when"] = df["when"].astype(str)
+    df.loc[::7, "score"] = np.nan
+    df.loc[::13, "group"] = np.nan
+    return df
+
+
+class MediaRootTestCase(TestCase):
+    """
+    Stored files (uploads, columnar caches, sketches) go to a temporary
+    MEDIA_ROOT removed after the class; the shared cache is in-process.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(
+            MEDIA_ROOT=cls.media_root, CACHES=LOCAL_CACHE
+        )
+        cls.settings_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.settings_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("owner", password="p")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # No broker here: uploads are analysed by calling the task directly.
+        patcher = mock.patch("analytics.views.enqueue_analysis")
+        self.queue_analysis = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upload(self, df: pd.DataFrame, name: str = "data.csv", **extra):
+        content = df.to_csv(index=False).encode("utf-8")
+        return self.client.post(
+            "/api/datasets/upload/",
+            {"file": SimpleUploadedFile(name, content), **extra},
+            format="multipart",
+        )
+
+    def analyse(self, dataset_id: int) -> AnalysisResult:
+        run_analysis_task.apply(args=[dataset_id])
+        return AnalysisResult.objects.get(dataset_id=dataset_id)
+
+
+class ProfileDataFrameTests(TestCase):
+    def assertSummaryEqual(self, expected, actual, column):
+        self.assertEqual(expected["type"], actual["type"], column)
+        self.assertEqual(expected.get("histogram"), actual.get("histogram"), column)
+        self.assertEqual(
+            expected.get("value_counts"), actual.get("value_counts"), column
+        )
+        self.assertEqual(set(expected["describe"]), set(actual["describe"]), column)
+        for key, value in expected["describe"].items():
+            other = actual["describe"][key]
+            if isinstance(value, float) and math.isnan(value):
+                self.assertTrue(math.isnan(other), (column, key))
+            elif isinstance(value, (float, np.floating)):
+                self.assertAlmostEqual(value, other, places=9, msg=(column, key))
+            else:
+                self.assertEqual(value, other, (column, key))
+
+    def test_matches_per_column_loop(self):
+        df = mixed_frame()
+        expected = legacy_profile_dataframe(df)
+        actual = profile_dataframe(df)
+
+        self.assertEqual(expected["row_count"], actual["row_count"])
+        self.assertEqual(expected["column_count"], actual["column_count"])
+        self.assertEqual(expected["missing_values"], actual["missing_values"])
+        for column in df.columns:
+            self.assertSummaryEqual(
+                expected["columns"][column], actual["columns"][column], column
+            )
+
+    def test_only_binary_numeric_columns(self):
+        df = pd.DataFrame({"passed": [0, 1, 1, 0], "seen": [1.0, np.nan, 1.0, 1.0]})
+        expected = legacy_profile_dataframe(df)
+        actual = profile_dataframe(df)
+        for column in df.columns:
+            self.assertSummaryEqual(
+                expected["columns"][column], actual["columns"][column], column
+            )
+
+    def test_constant_and_empty_columns(self):
+        df = pd.DataFrame(
+            {
+                "constant": [3.0] * 50,
+                "empty": [np.nan] * 50,
+                "text": ["x"] * 25 + [np.nan] * 25,
+            }
+        )
+        expected = legacy_profile_dataframe(df)
+        actual = profile_dataframe(df)
+        for column in df.columns:
+            self.assertSummaryEqual(
+                expected["columns"][column], actual["columns"][column], column
+            )
+
+
+class SketchTests(TestCase):
+    def test_kll_exact_while_small(self):
+        values = np.random.default_rng(1).normal(size=150)
+        sketch = KLLSketch(k=200)
+        sketch.update(values)
+        self.assertTrue(sketch.is_exact)
+        self.assertEqual(sketch.rank_error, 0.0)
+        expected = pd.Series(values).quantile([0.25, 0.5, 0.75]).tolist()
+        for got, want in zip(sketch.quantiles([0.25, 0.5, 0.75]), expected):
+            self.assertAlmostEqual(got, want)
+
+    def test_kll_merge_within_rank_error(self):
+        rng = np.random.default_rng(2)
+        parts = [rng.normal(size=20_000), rng.exponential(size=20_000)]
+        merged = KLLSketch(k=200)
+        for values in parts:
+            sketch = KLLSketch(k=200)
+            sketch.update(values)
+            merged.merge(KLLSketch.from_dict(json.loads(json.dumps(sketch.to_dict()))))
+
+        values = np.sort(np.concatenate(parts))
+        self.assertEqual(merged.n, values.size)
+        self.assertFalse(merged.is_exact)
+        for q, answer in zip((0.1, 0.5, 0.9), merged.quantiles([0.1, 0.5, 0.9])):
+            rank = np.searchsorted(values, answer) / values.size
+            self.assertLessEqual(abs(rank - q), merged.rank_error)
+
+    def test_kll_round_trip(self):
+        sketch = KLLSketch(k=50)
+        sketch.update(np.arange(10_000, dtype="float64"))
+        restored = KLLSketch.from_dict(sketch.to_dict())
+        self.assertEqual(restored.n, sketch.n)
+        self.assertEqual(
+            restored.quantiles([0.1, 0.5, 0.9]), sketch.quantiles([0.1, 0.5, 0.9])
+        )
+
+    def test_misra_gries_merge_bounds_counts(self):
+        rng = np.random.default_rng(3)
+        keys = rng.zipf(1.5, 50_000) % 500
+        merged = MisraGries(capacity=32)
+        for part in np.array_split(keys, 4):
+            vc = pd.Series(part).astype(str).value_counts()
+            summary = MisraGries(capacity=32)
+            summary.update(vc.index, vc.to_numpy())
+            merged.merge(MisraGries.from_dict(summary.to_dict()))
+
+        true_counts = pd.Series(keys).astype(str).value_counts()
+        self.assertEqual(merged.n, keys.size)
+        self.assertLessEqual(len(merged.counts), 32)
+        for key, count in merged.top(5):
+            self.assertLessEqual(count, true_counts[key])
+            self.assertLessEqual(true_counts[key] - count, merged.error)
+        self.assertEqual(merged.top(1)[0][0], true_counts.index[0])
+
+    def test_hyperloglog_merge_matches_union(self):
+        left, right = HyperLogLog(), HyperLogLog()
+        left.update(np.arange(0, 30_000))
+        right.update(np.arange(20_000, 50_000))
+        left.merge(HyperLogLog.from_dict(right.to_dict()))
+        self.assertLess(abs(left.estimate() - 50_000) / 50_000, 4 * left.relative_error)
+
+    def test_sketch_profiler_merge_matches_single_pass(self):
+        df = mixed_frame(6_000, seed=5)
+        whole = SketchProfiler()
+        whole.update(df)
+
+        merged = SketchProfiler()
+        for part in np.array_split(np.arange(len(df)), 3):
+            profiler = SketchProfiler()
+            profiler.update(df.iloc[part])
+            merged.merge(SketchProfiler.from_dict(profiler.to_dict()))
+
+        expected, actual = whole.result(), merged.result()
+        self.assertEqual(actual["row_count"], len(df))
+        self.assertEqual(expected["missing_values"], actual["missing_values"])
+        exact = profile_dataframe(df)["columns"]
+        for column in ("score", "ratio", "count"):
+            describe = actual["columns"][column]["describe"]
+            self.assertEqual(describe["count"], exact[column]["describe"]["count"])
+            self.assertAlmostEqual(describe["mean"], exact[column]["describe"]["mean"])
+            self.assertAlmostEqual(describe["std"], exact[column]["describe"]["std"])
+            self.assertEqual(describe["min"], exact[column]["describe"]["min"])
+            self.assertEqual(describe["max"], exact[column]["describe"]["max"])
+            self.assertIn(
+                "rank_error", actual["columns"][column]["error_bounds"]["quantiles"]
+            )
+        describe = actual["columns"]["group"]["describe"]
+        self.assertEqual(describe["unique"], exact["group"]["describe"]["unique"])
+        self.assertEqual(describe["top"], exact["group"]["describe"]["top"])
+
+
+class StreamingProfilerTests(TestCase):
+    def profile(self, df, **kwargs):
+        profiler = StreamingProfiler(**kwargs)
+        for start in range(0, len(df), 1_000):
+            profiler.update(df.iloc[start : start + 1_000])
+        return profiler.result()["columns"]
+
+    def test_unique_exact_within_distinct_budget(self):
+        df = mixed_frame(5_000, seed=6)
+        exact = profile_dataframe(df)["columns"]
+        columns = self.profile(df)
+        for column in ("group", "city", "when"):
+            self.assertEqual(
+                columns[column]["describe"]["unique"],
+                exact[column]["describe"]["unique"],
+            )
+
+    def test_unique_estimated_past_distinct_budget(self):
+        rng = np.random.default_rng(7)
+        df = pd.DataFrame(
+            {
+                "id": [f"id-{i}" for i in range(20_000)],
+                "group": rng.choice(["a", "b", "c"], 20_000),
+            }
+        )
+        columns = self.profile(df, distinct_budget=5_000)
+        self.assertEqual(columns["group"]["describe"]["unique"], 3)
+        estimate = columns["id"]["describe"]["unique"]
+        self.assertLess(abs(estimate - 20_000) / 20_000, 0.1)
+
+
+class QualityIndexTests(TestCase):
+    def test_counts_missing_coercion_and_outliers(self):
+        df = pd.DataFrame(
+            {
+                "value": [
+                    1.0,
+                    2.0,
+                    3.0,
+                    np.nan,
+                    2.5,
+                    100.0,
+                    2.0,
+                    3.0,
+                    1.0,
+                    2.0,
+                    3.0,
+                    2.0,
+                ]
+                * 5,
+                "amount": ["1", "2", "x", "3", None, "4", "5", "6", "7", "8", "9", "10"]
+                * 5,
+                "when": (
+                    ["2024-01-01", "bad", None]
+                    + [f"2024-01-{day:02d}" for day in range(2, 11)]
+                )
+                * 5,
+            }
+        )
+        summaries = profile_dataframe(df)["columns"]
+        summaries["when"]["type"] = "datetime"
+        chunks = [df.iloc[:25], df.iloc[25:]]
+        builder = build_quality_index(chunks, summaries)
+
+        counts = builder.issue_counts()
+        self.assertEqual(counts["value"], {"missing": 5, "outlier": 5})
+        self.assertEqual(counts["amount"], {"missing": 5, "coercion": 5})
+        self.assertEqual(counts["when"], {"missing": 5, "coercion": 5})
+
+        arrays = builder.arrays()
+        self.assertEqual(list(arrays["outlier_0"][:2]), [5, 17])
+        self.assertEqual(list(arrays["missing_0"][:2]), [3, 15])
+        self.assertEqual(list(arrays["columns"]), ["value", "amount", "when"])
+        self.assertEqual(list(arrays["any"][:5]), [1, 2, 3, 4, 5])
+
+    def test_row_offset(self):
+        df = pd.DataFrame({"value": [1.0, np.nan]})
+        builder = build_quality_index([df], profile_dataframe(df)["columns"], 10)
+        self.assertEqual(list(builder.arrays()["missing_0"]), [11])
+
+
+class CsvCacheTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.tmp, name)
+
+    def assertFrameEqual(self, expected, actual):
+        pd.testing.assert_frame_equal(expected, actual, check_dtype=True)
+
+    def test_sniffs_semicolons_and_decimal_comma(self):
+        plan = sniff_csv(b"name;price\na;1,5\nb;2,25\nc;3\n", complete=True)
+        self.assertEqual(plan.delimiter, ";")
+        self.assertEqual(plan.decimal, ",")
+        self.assertTrue(plan.header)
+
+    def test_widens_planned_types(self):
+        source = self.path("wide.csv")
+        rows = ["x,flag,label"] + [f"{i},true,{i}" for i in range(2_000)]
+        rows += ["1.5,maybe,text"]
+        with open(source, "w") as fh:
+            fh.write("\n".join(rows) + "\n")
+        plan = CsvPlan(column_types={"x": "int64", "flag": "bool", "label": "int64"})
+        expected = pd.read_csv(source)
+
+        for read_all in (True, False):
+            dest = self.path(f"wide-{read_all}.parquet")
+            rows_written = _write_csv_cache(source, None, dest, plan, read_all)
+            self.assertEqual(rows_written, len(expected))
+            self.assertFrameEqual(expected, read_columnar(dest))
+
+    def test_gzip_csv_matches_read_csv(self):
+        df = mixed_frame(500, seed=8)
+        source = self.path("data.csv.gz")
+        with gzip.open(source, "wt") as fh:
+            df.to_csv(fh, index=False)
+        dest = self.path("data.parquet")
+        self.assertEqual(write_columnar_cache(source, dest), len(df))
+        self.assertFrameEqual(pd.read_csv(source), read_columnar(dest))
+
+
+class UploadTests(MediaRootTestCase):
+    def test_reupload_reuses_completed_analysis(self):
+        df = mixed_frame(300)
+        first = self.upload(df, profiling_mode="IN_MEMORY")
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(self.analyse(first.data["id"]).status, "COMPLETED")
+        self.queue_analysis.reset_mock()
+
+        second = self.upload(df, name="again.csv")
+        self.assertEqual(second.status_code, 201)
+        self.assertNotEqual(second.data["id"], first.data["id"])
+        self.queue_analysis.assert_not_called()
+        source = Dataset.objects.get(id=first.data["id"])
+        clone = Dataset.objects.get(id=second.data["id"])
+        self.assertEqual(clone.original_file.name, source.original_file.name)
+        self.assertEqual(clone.columnar_file.name, source.columnar_file.name)
+        self.assertEqual(clone.analysis.status, "COMPLETED")
+        self.assertEqual(clone.analysis.card, source.analysis.card)
+
+    def test_reupload_before_analysis_completes_is_analysed(self):
+        df = mixed_frame(300)
+        first = self.upload(df)
+        second = self.upload(df)
+        self.assertEqual(self.queue_analysis.call_count, 2)
+        self.assertNotEqual(
+            Dataset.objects.get(id=first.data["id"]).original_file.name,
+            Dataset.objects.get(id=second.data["id"]).original_file.name,
+        )
+
+    def test_quality_rows_total(self):
+        response = self.upload(mixed_frame(300), profiling_mode="IN_MEMORY")
+        dataset_id = response.data["id"]
+        self.analyse(dataset_id)
+        response = self.client.get(
+            f"/api/datasets/{dataset_id}/quality-rows/?column=score&limit=5"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["rows"]), 5)
+        # Every 7th score is missing.
+        self.assertEqual(response.data["total_rows"], 43)
+        self.assertEqual(
+            response.data["total_rows_with_missing"], response.data["total_rows"]
+        )
+
+    def put_part(self, upload_id, number, data):
+        return self.client.put(
+            f"/api/uploads/{upload_id}/parts/{number}/",
+            data,
+            content_type="application/octet-stream",
+        )
+
+    def test_chunked_upload_assembles_parts(self):
+        content = mixed_frame(500).to_csv(index=False).encode("utf-8")
+        size = len(content) // 3 + 1
+        parts = [content[i : i + size] for i in range(0, len(content), size)]
+
+        response = self.client.post(
+            "/api/uploads/",
+            {"filename": "../parts.csv", "size": len(content)},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.data["id"]
+
+        # Out of order, part 2 sent twice.
+        for number in (2, 1, 2):
+            response = self.put_part(upload_id, number, parts[number - 1])
+            self.assertEqual(response.data["size"], len(parts[number - 1]))
+
+        response = self.client.post(
+            f"/api/uploads/{upload_id}/complete/", {"parts": 3}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        session = UploadSession.objects.get(id=upload_id)
+        self.assertEqual(session.status, "OPEN")
+        self.assertEqual(
+            [
+                part["number"]
+                for part in self.client.get(f"/api/uploads/{upload_id}/").data["parts"]
+            ],
+            [1, 2],
+        )
+
+        self.put_part(upload_id, 3, parts[2])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f"/api/uploads/{upload_id}/complete/", {}, format="json"
+            )
+        self.assertEqual(response.status_code, 201)
+        dataset = Dataset.objects.get(id=response.data["id"])
+        with open(dataset.original_file.path, "rb") as fh:
+            self.assertEqual(fh.read(), content)
+        self.assertEqual(dataset.content_hash, hashlib.sha256(content).hexdigest())
+        self.assertEqual(os.path.basename(dataset.original_file.name), "parts.csv")
+        self.queue_analysis.assert_called_once()
+
+        session.refresh_from_db()
+        self.assertEqual(session.status, "COMPLETED")
+        self.assertEqual(session.dataset_id, dataset.id)
+        response = self.client.post(
+            f"/api/uploads/{upload_id}/complete/", {}, format="json"
+        )
+        self.assertEqual(response.status_code, 409)
+
+    def test_stale_assembling_upload_completes_again(self):
+        content = b"a,b\n1,2\n"
+        response = self.client.post(
+            "/api/uploads/", {"filename": "x.csv", "size": len(content)}, format="json"
+        )
+        upload_id = response.data["id"]
+        self.put_part(upload_id, 1, content)
+        UploadSession.objects.filter(id=upload_id).update(status="ASSEMBLING")
+        response = self.client.post(
+            f"/api/uploads/{upload_id}/complete/", {}, format="json"
+        )
+        self.assertEqual(response.status_code, 409)
+
+        UploadSession.objects.filter(id=upload_id).update(
+            updated_at=timezone.now() - timedelta(days=1)
+        )
+        response = self.client.post(
+            f"/api/uploads/{upload_id}/complete/", {}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(UploadSession.objects.get(id=upload_id).status, "COMPLETED")
+
+    def test_chunked_upload_rejects_wrong_size(self):
+        response = self.client.post(
+            "/api/uploads/", {"filename": "x.csv", "size": 100}, format="json"
+        )
+        upload_id = response.data["id"]
+        self.put_part(upload_id, 1, b"a,b\n1,2\n")
+        response = self.client.post(
+            f"/api/uploads/{upload_id}/complete/", {}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UploadSession.objects.get(id=upload_id).status, "OPEN")
+
+
+class ProgressStreamTests(MediaRootTestCase):
+    def test_wsgi_stream_is_synchronous(self):
+        response = self.upload(mixed_frame(200), profiling_mode="IN_MEMORY")
+        dataset_id = response.data["id"]
+        self.analyse(dataset_id)
+        token = RefreshToken.for_user(self.user).access_token
+
+        response = self.client.get(
+            f"/api/datasets/{dataset_id}/progress/",
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.is_async)
+        events = b"".join(response.streaming_content).decode()
+        self.assertEqual(
+            json.loads(events.removeprefix("data: ")),
+            {"type": "status", "status": "COMPLETED"},
+        )
+
+
+class AppendTests(MediaRootTestCase):
+    def setUp(self):
+        super().setUp()
+        self.base = mixed_frame(3_000, seed=9)
+        self.added = mixed_frame(1_000, seed=10)
+        self.added.loc[5, "score"] = 500.0
+        response = self.upload(self.base, profiling_mode="IN_MEMORY")
+        self.dataset = Dataset.objects.get(id=response.data["id"])
+        self.analyse(self.dataset.id)
+
+    def append(self, df):
+        content = df.to_csv(index=False).encode("utf-8")
+        return create_batch(
+            self.dataset,
+            SimpleUploadedFile("batch.csv", content),
+            hashlib.sha256(content).hexdigest(),
+        )
+
+    def test_apply_batch_merges_statistics(self):
+        batch = self.append(self.added[list(reversed(self.added.columns))])
+        apply_batch(batch)
+
+        self.dataset.refresh_from_db()
+        analysis = self.dataset.analysis
+        summary = self.client.get(f"/api/datasets/{self.dataset.id}/").json()[
+            "analysis"
+        ]["summary_json"]
+        full = pd.concat([self.base, self.added], ignore_index=True)
+        expected = profile_dataframe(full)
+
+        self.assertEqual(analysis.status, "COMPLETED")
+        self.assertEqual(analysis.version, 2)
+        self.assertEqual(self.dataset.profiling_mode, "APPROXIMATE")
+        self.assertIsNotNone(load_dataset_sketches(self.dataset))
+        self.assertTrue(summary["approximate"])
+        self.assertEqual(summary["row_count"], len(full))
+        self.assertEqual(summary["missing_values"], expected["missing_values"])
+        for column in ("score", "count", "ratio"):
+            describe = summary["columns"][column]["describe"]
+            want = expected["columns"][column]["describe"]
+            self.assertEqual(describe["count"], want["count"])
+            self.assertAlmostEqual(describe["mean"], want["mean"])
+            self.assertAlmostEqual(describe["std"], want["std"])
+            self.assertEqual(describe["max"], want["max"])
+        for column in ("group", "city"):
+            describe = summary["columns"][column]["describe"]
+            self.assertEqual(
+                describe["unique"], expected["columns"][column]["describe"]["unique"]
+            )
+            self.assertEqual(
+                describe["top"], expected["columns"][column]["describe"]["top"]
+            )
+        self.assertEqual(summary["quality_issues"]["score"]["missing"], 572)
+
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, "COMPLETED")
+        self.assertEqual(batch.row_offset, len(self.base))
+        self.assertEqual(batch.row_count, len(self.added))
+
+    def test_append_response_reports_rescan(self):
+        content = self.added.to_csv(index=False).encode("utf-8")
+        response = self.client.post(
+            f"/api/datasets/{self.dataset.id}/batches/",
+            {"file": SimpleUploadedFile("batch.csv", content)},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(response.data["rescans_dataset"])
+        self.assertEqual(
+            response.data["profiling_mode_change"],
+            {"from": "IN_MEMORY", "to": "APPROXIMATE"},
+        )
+
+    def test_merged_quantiles_are_flagged(self):
+        base = [{"target": "a", "count": 2, "mean": 1.0, "median": 1.0}]
+        delta = [
+            {"target": "a", "count": 2, "mean": 3.0, "median": 3.0},
+            {"target": "b", "count": 1, "mean": 5.0, "median": 5.0},
+        ]
+        merged = {
+            row["target"]: row
+            for row in merge_aggregate_payload("metrics_by_target", base, delta)
+        }
+        self.assertEqual(merged["a"]["median"], 2.0)
+        self.assertTrue(merged["a"]["quantiles_approximate"])
+        self.assertNotIn("quantiles_approximate", merged["b"])
+
+    def test_sketches_are_swapped_with_the_merge(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_batch(self.append(self.added))
+        self.dataset.refresh_from_db()
+        first = self.dataset.stats_sketches.path
+        self.assertEqual(load_dataset_sketches(self.dataset)["row_count"], 4_000)
+
+        batch = self.append(self.added.iloc[:10])
+        with mock.patch(
+            "analytics.appends.store_dataset_sketches", side_effect=OSError("full")
+        ):
+            with self.assertRaises(OSError):
+                apply_batch(batch)
+        self.dataset.refresh_from_db()
+        self.assertEqual(self.dataset.analysis.version, 2)
+        self.assertEqual(self.dataset.stats_sketches.path, first)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_batch(batch)
+        self.dataset.refresh_from_db()
+        self.assertEqual(load_dataset_sketches(self.dataset)["row_count"], 4_010)
+        self.assertFalse(os.path.exists(first))
+
+    def test_apply_batch_rejects_other_columns(self):
+        batch = self.append(pd.DataFrame({"x": [1, 2]}))
+        with self.assertRaises(ValueError):
+            apply_batch(batch)
+        self.assertEqual(self.dataset.analysis.version, 1)
+
+
+class SemanticAggregateTaskTests(MediaRootTestCase):
+    def test_nothing_loaded_when_time_column_is_parsed(self):
+        df = mixed_frame(300)
+        response = self.upload(df, profiling_mode="IN_MEMORY")
+        analysis = self.analyse(response.data["id"])
+        scope = (analysis.dataset_id, analysis.version)
+        _cache_time_epochs(scope, "when", parse_time_epochs(df["when"]))
+        aggregate = SemanticAggregate.objects.create(
+            dataset_id=analysis.dataset_id,
+            cache_key="k",
+            version=analysis.version,
+            kind="metrics_over_time",
+            time_column="when",
+            metric="dropped",
+        )
+        self.addCleanup(_time_epoch_cache.clear)
+
+        with mock.patch("analytics.tasks.load_dataset_frame") as load:
+            compute_semantic_aggregates_task(analysis.dataset_id, ["k"])
+        load.assert_not_called()
+        aggregate.refresh_from_db()
+        self.assertEqual(aggregate.status, "COMPLETED")
+
+
+class SummarySectionTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user("owner", password="p")
+        dataset = Dataset.objects.create(
+            owner=user, name="data.csv", original_file="data.csv"
+        )
+        self.analysis = AnalysisResult.objects.create(dataset=dataset)
+        self.summary = {
+            "row_count": 10,
+            "columns": {
+                f"c{i}": {"type": "numeric", "describe": {"mean": float(i)}}
+                for i in range(250)
+            },
+            "semantic_config": {"target_column": "c1"},
+        }
+
+    def test_round_trip_in_column_chunks(self):
+        save_summary(self.analysis, self.summary)
+        self.assertEqual(
+            list(self.analysis.sections.values_list("name", flat=True)),
+            ["row_count", "columns:0", "columns:1", "columns:2", "semantic_config"],
+        )
+        loaded = load_summary(self.analysis)
+        self.assertEqual(loaded, self.summary)
+        self.assertEqual(list(loaded), list(self.summary))
+        self.assertEqual(list(loaded["columns"]), list(self.summary["columns"]))
+        self.assertEqual(
+            load_summary(self.analysis, ["columns"])["columns"],
+            self.summary["columns"],
+        )
+        self.assertEqual(load_column_type(self.analysis, "c240"), "numeric")
+
+    def test_only_changed_sections_are_written(self):
+        save_summary(self.analysis, self.summary)
+        self.analysis.sections.update(updated_at=timezone.now() - timedelta(days=1))
+        self.summary["row_count"] = 11
+        self.summary["columns"]["c120"]["describe"]["mean"] = -1.0
+        del self.summary["semantic_config"]
+        save_summary(self.analysis, self.summary)
+
+        recent = timezone.now() - timedelta(hours=1)
+        self.assertEqual(
+            sorted(
+                self.analysis.sections.filter(updated_at__gte=recent).values_list(
+                    "name", flat=True
+                )
+            ),
+            ["columns:1", "row_count"],
+        )
+        self.assertEqual(load_summary(self.analysis), self.summary)
+
+
+class ResponseCacheTests(MediaRootTestCase):
+    def test_etag_and_invalidation(self):
+        response = self.upload(mixed_frame(200), profiling_mode="IN_MEMORY")
+        dataset_id = response.data["id"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.analyse(dataset_id)
+        url = f"/api/datasets/{dataset_id}/"
+
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+        with self.assertNumQueries(0):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Dataset.objects.filter(id=dataset_id).first().save()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+
+    def test_cached_response_is_per_owner(self):
+        response = self.upload(mixed_frame(200))
+        url = f"/api/datasets/{response.data['id']}/"
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        other = get_user_model().objects.create_user("other", password="p")
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class AntonymTableTests(TestCase):
+    def test_regular_verb_forms(self):
+        cases = {
+            "abbreviate": ["abbreviated", "abbreviating"],
+            "agree": ["agreed", "agreeing"],
+            "pass": ["passed", "passing"],
+            "stop": ["stopped", "stopping"],
+            "visit": ["visited", "visiting"],
+            "carry": ["carried", "carrying"],
+            "panic": ["panicked", "panicking"],
+            "give_up": [],
+        }
+        for verb, forms in cases.items():
+            self.assertEqual(regular_verb_forms(verb), forms, verb)
+
+    def test_shipped_table_has_no_misspelled_forms(self):
+        with open(settings.ANTONYM_TABLE_PATH, encoding="utf-8") as fh:
+            table = json.load(fh)
+        self.assertEqual(table["passed"], "fail")
+        self.assertEqual(table["abbreviated"], "expand")
+        self.assertNotIn("abbreviateed", table)
+        self.assertNotIn("abbreviateing", table)
+
+
+@override_settings(ANALYSIS_OWNER_CONCURRENCY={"analysis_large": 1})
+class AnalysisSlotTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("owner", password="p")
+
+    def analysis(self, status="PENDING", owner=None):
+        dataset = Dataset.objects.create(
+            owner=owner or self.user, name="data.csv", original_file="data.csv"
+        )
+        return AnalysisResult.objects.create(
+            dataset=dataset, status=status, queue="analysis_large"
+        )
+
+    def test_owner_limit_per_queue(self):
+        self.analysis("RUNNING")
+        waiting = self.analysis()
+        self.assertFalse(claim_analysis_slot(waiting))
+        waiting.refresh_from_db()
+        self.assertEqual(waiting.status, "PENDING")
+
+        self.assertTrue(claim_analysis_slot(waiting, enforce_limit=False))
+        waiting.refresh_from_db()
+        self.assertEqual(waiting.status, "RUNNING")
+
+    def test_other_owners_and_stale_runs_do_not_count(self):
+        other = get_user_model().objects.create_user("other", password="p")
+        self.analysis("RUNNING", owner=other)
+        self.assertTrue(claim_analysis_slot(self.analysis()))
+
+        stale = self.analysis("RUNNING", owner=other)
+        AnalysisResult.objects.filter(id=stale.id).update(
+            updated_at=timezone.now() - timedelta(days=1)
+        )
+        AnalysisResult.objects.filter(dataset__owner=other).exclude(id=stale.id).update(
+            status="COMPLETED"
+        )
+        self.assertTrue(claim_analysis_slot(self.analysis(owner=other)))
+
+    def test_appends_do_not_count(self):
+        appending = self.analysis("RUNNING")
+        DatasetBatch.objects.create(
+            dataset=appending.dataset, number=1, original_file="batch.csv"
+        )
+        self.assertTrue(claim_analysis_slot(self.analysis()))
+
+    @override_settings(ANALYSIS_HEARTBEAT_SECONDS=0)
+    def test_heartbeat_keeps_slot(self):
+        running = self.analysis("RUNNING")
+        AnalysisResult.objects.filter(id=running.id).update(
+            updated_at=timezone.now() - timedelta(days=1)
+        )
+        AnalysisHeartbeat(running.dataset_id)()
+        self.assertFalse(claim_analysis_slot(self.analysis()))
+
+    def test_unlimited_queue(self):
+        for _ in range(3):
+            analysis = self.analysis()
+            AnalysisResult.objects.filter(id=analysis.id).update(queue="analysis_small")
+            analysis.refresh_from_db()
+            self.assertTrue(claim_analysis_slot(analysis))
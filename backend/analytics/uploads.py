@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tempfile
+from datetime import timedelta
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    AnalysisResult,
+    AnalysisSection,
+    Dataset,
+    SemanticAggregate,
+    UploadSession,
+)
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_BYTES = 1024 * 1024
+# Parts are numbered 1..MAX_UPLOAD_PARTS.
+MAX_UPLOAD_PARTS = 10_000
+_PART_NAME = re.compile(r"^part-(\d{5})$")
+
+
+class HashingFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Streams every upload to a temporary file in chunks (as Django's
+    TemporaryFileUploadHandler does) while computing its SHA-256, stored
+    on the uploaded file as ``content_hash``. Saving the file afterwards
+    moves the temporary file into storage instead of copying it.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.content_hash = self.hasher.hexdigest()
+        return file
+
+
+def upload_content_hash(file: UploadedFile) -> str:
+    """
+    SHA-256 of an uploaded file: the one computed while it streamed in, or
+    (for uploads received by another handler) one more read over it.
+    """
+    content_hash = getattr(file, "content_hash", None)
+    if content_hash:
+        return content_hash
+
+    hasher = hashlib.sha256()
+    for chunk in file.chunks(HASH_CHUNK_BYTES):
+        hasher.update(chunk)
+    file.seek(0)
+    return hasher.hexdigest()
+
+
+def find_duplicate_dataset(owner, content_hash: str) -> Optional[Dataset]:
+    """
+    The owner's most recent dataset with the same content and a completed
+    analysis, if any. Uploads whose analysis is still running (or failed),
+    and datasets that have since had rows appended, are not reused.
+    """
+    return (
+        Dataset.objects.filter(
+            owner=owner,
+            content_hash=content_hash,
+            analysis__status="COMPLETED",
+        )
+        .exclude(batches__status="COMPLETED")
+        .select_related("analysis")
+        .order_by("-uploaded_at", "-id")
+        .first()
+    )
+
+
+def clone_dataset(source: Dataset, name: str, profiling_mode: str) -> Dataset:
+    """
+    A new dataset for a re-upload of ``source``'s file: it points at the
+    same stored files (original, columnar cache, quality index, sketches)
+    and gets a copy of the completed analysis, so nothing is written to
+    storage and no analysis is queued. Shared files are only deleted with their last
+    dataset (see ingest.delete_dataset_files).
+    """
+    source_analysis = source.analysis
+
+    with transaction.atomic():
+        dataset = Dataset.objects.create(
+            owner=source.owner,
+            name=name,
+            original_file=source.original_file.name,
+            columnar_file=source.columnar_file.name or None,
+            quality_index=source.quality_index.name or None,
+            stats_sketches=source.stats_sketches.name or None,
+            parse_plan=source.parse_plan,
+            content_hash=source.content_hash,
+            profiling_mode=profiling_mode,
+        )
+        analysis = AnalysisResult.objects.create(
+            dataset=dataset,
+            status=source_analysis.status,
+            version=source_analysis.version,
+            card=source_analysis.card,
+        )
+        AnalysisSection.objects.bulk_create(
+            [
+                AnalysisSection(
+                    analysis=analysis,
+                    name=section.name,
+                    position=section.position,
+                    payload=section.payload,
+                )
+                for section in source_analysis.sections.all()
+            ]
+        )
+        # Aggregates are keyed by analysis version + config part, both of
+        # which carry over, so finished ones stay valid.
+        SemanticAggregate.objects.bulk_create(
+            [
+                SemanticAggregate(
+                    dataset=dataset,
+                    cache_key=row.cache_key,
+                    version=row.version,
+                    kind=row.kind,
+                    target_column=row.target_column,
+                    time_column=row.time_column,
+                    metric=row.metric,
+                    status=row.status,
+                    payload=row.payload,
+                )
+                for row in source.semantic_aggregates.filter(status="COMPLETED")
+            ]
+        )
+
+    logger.info(
+        "Upload for dataset %s duplicates dataset %s; reused its files and analysis",
+        dataset.id,
+        source.id,
+    )
+    return dataset
+
+
+def _original_file_field():
+    return Dataset._meta.get_field("original_file")
+
+
+def upload_session_dir(session: UploadSession) -> str:
+    storage = _original_file_field().storage
+    return storage.path(os.path.join(settings.UPLOAD_SESSION_DIR, str(session.id)))
+
+
+def upload_part_path(session: UploadSession, number: int) -> str:
+    return os.path.join(upload_session_dir(session), f"part-{number:05d}")
+
+
+def received_parts(session: UploadSession) -> List[Dict[str, int]]:
+    """
+    ``[{"number", "size"}]`` for every part stored so far, in order, so a
+    client can resume by sending only the missing ones.
+    """
+    directory = upload_session_dir(session)
+    if not os.path.isdir(directory):
+        return []
+    parts = []
+    for entry in os.scandir(directory):
+        match = _PART_NAME.match(entry.name)
+        if match:
+            parts.append({"number": int(match.group(1)), "size": entry.stat().st_size})
+    return sorted(parts, key=lambda part: part["number"])
+
+
+def assembly_is_stale(session: UploadSession) -> bool:
+    """
+    Whether a session has been ASSEMBLING for longer than joining its parts
+    can take, i.e. the request doing it died; completing it again retries.
+    """
+    cutoff = timezone.now() - timedelta(
+        seconds=settings.UPLOAD_ASSEMBLY_TIMEOUT_SECONDS
+    )
+    return session.status == "ASSEMBLING" and session.updated_at < cutoff
+
+
+def write_upload_part(
+    session: UploadSession,
+    number: int,
+    stream: BinaryIO,
+    expected_size: Optional[int],
+) -> int:
+    """
+    Copy one part from the request stream to disk in HASH_CHUNK_BYTES
+    pieces. The part is written to a temporary file of its own and renamed
+    into place, so a retried or interrupted part never leaves a truncated
+    file behind, and concurrent PUTs of the same part cannot interleave.
+    Raises ValueError when fewer bytes arrive than Content-Length promised
+    or the part exceeds UPLOAD_MAX_PART_BYTES.
+    """
+    directory = upload_session_dir(session)
+    os.makedirs(directory, exist_ok=True)
+    path = upload_part_path(session, number)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp"
+    )
+
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            while True:
+                chunk = stream.read(HASH_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > settings.UPLOAD_MAX_PART_BYTES:
+                    raise ValueError(
+                        f"Parts may be at most {settings.UPLOAD_MAX_PART_BYTES} bytes."
+                    )
+                fh.write(chunk)
+        if expected_size is not None and size != expected_size:
+            raise ValueError(f"Expected {expected_size} bytes, received {size}.")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return size
+
+
+def assemble_upload(session: UploadSession, part_count: int) -> Tuple[str, str]:
+    """
+    Join parts 1..part_count, streaming them one after another into a new
+    file in the datasets storage directory while hashing the content.
+    Returns the stored file name and its SHA-256; the parts are removed.
+    Raises ValueError when parts are missing or the size differs from the
+    one declared at initiation.
+    """
+    parts = {part["number"]: part["size"] for part in received_parts(session)}
+    missing = [number for number in range(1, part_count + 1) if number not in parts]
+    if missing:
+        raise ValueError(f"Missing parts: {missing[:20]}")
+    total = sum(parts[number] for number in range(1, part_count + 1))
+    if session.total_size is not None and total != session.total_size:
+        raise ValueError(
+            f"Parts add up to {total} bytes, expected {session.total_size}."
+        )
+
+    field = _original_file_field()
+    storage = field.storage
+    name = storage.get_available_name(field.generate_filename(None, session.filename))
+    dest_path = storage.path(name)
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+
+    hasher = hashlib.sha256()
+    try:
+        with open(dest_path, "wb") as dest:
+            for number in range(1, part_count + 1):
+                with open(upload_part_path(session, number), "rb") as part:
+                    while True:
+                        chunk = part.read(HASH_CHUNK_BYTES)
+                        if not chunk:
+                            break
+                        hasher.update(chunk)
+                        dest.write(chunk)
+    except Exception:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+
+    discard_upload_parts(session)
+    return name, hasher.hexdigest()
+
+
+def discard_upload_parts(session: UploadSession) -> None:
+    shutil.rmtree(upload_session_dir(session), ignore_errors=True)
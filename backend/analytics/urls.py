@@ -37,15 +37,58 @@ from . import views
 urlpatterns = [
     path("health/", views.health_check, name="analytics-health"),
     path("tasks/test/", views.run_test_task, name="analytics-test-task"),
+    path("queues/", views.analysis_queues, name="analytics-queues"),
+    path("metrics/", views.metrics, name="analytics-metrics"),
     path("auth/token/", TokenObtainPairView.as_view()),
     path("auth/token/refresh/", TokenRefreshView.as_view()),
     path("auth/me/", views.me, name="analytics-me"),
     path("datasets/", views.list_datasets, name="analytics-datasets"),
     path("datasets/upload/", views.upload_dataset, name="analytics-upload-dataset"),
     path("datasets/<int:dataset_id>/", views.get_dataset, name="analytics-get-dataset"),
+    path("uploads/", views.initiate_upload, name="analytics-initiate-upload"),
+    path(
+        "uploads/<uuid:upload_id>/",
+        views.upload_session,
+        name="analytics-upload-session",
+    ),
+    path(
+        "uploads/<uuid:upload_id>/parts/<int:part_number>/",
+        views.upload_part,
+        name="analytics-upload-part",
+    ),
+    path(
+        "uploads/<uuid:upload_id>/complete/",
+        views.complete_upload,
+        name="analytics-complete-upload",
+    ),
+    path(
+        "datasets/<int:dataset_id>/batches/",
+        views.dataset_batches,
+        name="analytics-dataset-batches",
+    ),
+    path(
+        "datasets/<int:dataset_id>/summary/",
+        views.dataset_summary,
+        name="analytics-dataset-summary",
+    ),
+    path(
+        "datasets/<int:dataset_id>/progress/",
+        views.analysis_progress,
+        name="analytics-analysis-progress",
+    ),
     path(
         "datasets/<int:dataset_id>/semantic-config/",
         views.update_semantic_config,
         name="analytics-update-semantic-config",
     ),
+    path(
+        "datasets/<int:dataset_id>/preview/",
+        views.dataset_preview,
+        name="analytics-dataset-preview",
+    ),
+    path(
+        "datasets/<int:dataset_id>/quality-rows/",
+        views.dataset_quality_rows,
+        name="analytics-dataset-quality-rows",
+    ),
 ]
@@ -1,82 +1,231 @@
 from __future__ import annotations
 
+import json
 import logging
-from typing import Optional
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-logger = logging.getLogger(__name__)
+from django.conf import settings
+from django.core.cache import cache
 
+logger = logging.getLogger(__name__)
 
-try:
-    import nltk
-    from nltk.corpus import wordnet as wn
-except Exception:  # pragma: no cover - optional dependency
-    nltk = None  # type: ignore[assignment]
-    wn = None  # type: ignore[assignment]
+ANTONYM_CACHE_PREFIX = "antonym:"
+# Stored in the shared cache for words without an antonym, so misses are
+# memoized too.
+NO_ANTONYM = ""
 
 
-def _ensure_wordnet_loaded() -> None:
-    """
-    Best-effort loader for the WordNet corpus.
+def _normalize(word: str) -> str:
+    return (word or "").strip().lower()
 
 
-    If NLTK or WordNet is not available, we log and fall back gracefully.
+@lru_cache(maxsize=1)
+def _antonym_table() -> Dict[str, str]:
     """
-    if wn is None or nltk is None:
-        logger.debug("NLTK / WordNet not available; skipping antonym lookup.")
-        return
-
+    The precomputed word -> antonym table shipped at ANTONYM_TABLE_PATH,
+    read on first use.
+    """
+    path = settings.ANTONYM_TABLE_PATH
     try:
-        wn.ensure_loaded()
-    except LookupError:
-        try:
-            nltk.download("wordnet", quiet=True)
-            wn.ensure_loaded()
-        except Exception as exc:  # pragma: no cover
-            logger.warning("Failed to download/load WordNet: %s", exc)
+        with open(path, encoding="utf-8") as fh:
+            table = json.load(fh)
+    except (OSError, ValueError) as exc:
+        # Labels then fall back to "Not <word>" until the table is restored.
+        logger.error("Could not read antonym table %s: %s", path, exc)
+        return {}
+    return {_normalize(word): antonym for word, antonym in table.items()}
 
 
-def get_antonym(word: str) -> Optional[str]:
-    """
-    Return a single "best guess" antonym for the given word, if any.
+def _best_antonym(word_lower: str, candidates: Iterable[str]) -> Optional[str]:
+    names = {name for name in candidates if name}
+    if not names:
+        return None
+
+    # Prefer the shortest non-identical candidate
+    best = min(names, key=lambda name: (len(name), name))
+    if best.lower() == word_lower:
+        return None
+    return best
 
 
-    Uses NLTK WordNet when available. Falls back to None if:
-    - NLTK/WordNet is not installed, or
-    - No reasonable antonym is found.
+def _wordnet():
     """
-    if not word:
+    WordNet if NLTK and the corpus are already installed locally, else None.
+    Never downloads anything.
+    """
+    try:
+        from nltk.corpus import wordnet as wn
+    except Exception:  # pragma: no cover - optional dependency
         return None
-
-    if wn is None or nltk is None:
+    try:
+        wn.ensure_loaded()
+    except LookupError:
         return None
+    return wn
 
-    _ensure_wordnet_loaded()
 
-    word_lower = word.strip().lower()
+def wordnet_antonym(word: str, wn=None) -> Optional[str]:
+    """
+    Look the antonym up in WordNet directly (slow; loads the corpus).
+    """
+    word_lower = _normalize(word)
     if not word_lower:
         return None
 
-    candidates: set[str] = set()
+    wn = wn or _wordnet()
+    if wn is None:
+        return None
 
+    candidates = []
     try:
         for syn in wn.synsets(word_lower):
             for lemma in syn.lemmas():
                 for ant in lemma.antonyms():
-                    name = ant.name().replace("_", " ").strip()
-                    if name:
-                        candidates.add(name)
+                    candidates.append(ant.name().replace("_", " ").strip())
     except Exception as exc:  # pragma: no cover
         logger.debug("Antonym lookup failed for %r: %s", word, exc)
         return None
 
-    if not candidates:
+    return _best_antonym(word_lower, candidates)
+
+
+_VOWELS = set("aeiou")
+
+
+def regular_verb_forms(verb: str) -> List[str]:
+    """
+    Past tense and -ing form of a regular verb, so column names like
+    "passed", "enabled" or "stopped" are in the antonym table too: a final
+    "e" takes "d" and is dropped before "ing" (but not in "ee", "ye", "oe"),
+    consonant + "y" becomes "ied", and one-syllable verbs ending in
+    consonant-vowel-consonant double the consonant. Longer verbs double it
+    only when the last syllable is stressed ("admitted" but "visited"),
+    which spelling does not show; WordNet lists those forms itself (see
+    wordnet_antonym_pairs). Multi-word lemmas are left out.
+    """
+    if not verb.isalpha() or len(verb) < 2:
+        return []
+    if verb.endswith("e"):
+        ing = verb + "ing" if verb[-2] in "eyo" else verb[:-1] + "ing"
+        return [verb + "d", ing]
+    if verb.endswith("y") and verb[-2] not in _VOWELS:
+        return [verb[:-1] + "ied", verb + "ing"]
+    if verb.endswith("c"):
+        # panicked, mimicking
+        return [verb + "ked", verb + "king"]
+    if (
+        len(verb) >= 3
+        and verb[-1] not in _VOWELS | set("wxy")
+        and verb[-2] in _VOWELS
+        and verb[-3] not in _VOWELS
+        and len(re.findall(r"[aeiouy]+", verb)) == 1
+    ):
+        return [verb + verb[-1] + "ed", verb + verb[-1] + "ing"]
+    return [verb + "ed", verb + "ing"]
+
+
+def wordnet_antonym_pairs(wn) -> Iterator[Tuple[str, str]]:
+    """
+    (word, antonym) for every WordNet lemma name, and the inflected forms
+    of verb lemmas, that has an antonym. Where WordNet lists a verb's
+    past or -ing form itself (e.g. "won", "admitted", "stopping"), that
+    form replaces the regular one. Used to build the antonym table offline; gives exactly what
+    wordnet_antonym returns.
+    """
+    words = set(wn.all_lemma_names())
+    # Inflected form -> base forms, from WordNet's verb.exc.
+    exceptions = getattr(wn, "_exception_map", {}).get(wn.VERB, {})
+    listed_past, listed_ing = set(), set()
+    for form, bases in exceptions.items():
+        words.add(form)
+        (listed_ing if form.endswith("ing") else listed_past).update(bases)
+    for verb in wn.all_lemma_names(pos=wn.VERB):
+        past, ing = regular_verb_forms(verb) or (None, None)
+        if past and verb not in listed_past:
+            words.add(past)
+        if ing and verb not in listed_ing:
+            words.add(ing)
+
+    for word in sorted(words):
+        antonym = wordnet_antonym(word.replace("_", " "), wn)
+        if antonym:
+            yield word.replace("_", " "), antonym
+
+
+def _cache_get(key: str) -> Optional[str]:
+    try:
+        return cache.get(key)
+    except Exception as exc:
+        logger.debug("Shared cache unavailable for %s: %s", key, exc)
         return None
 
-    # Prefer the shortest non-identical candidate
-    best = min(candidates, key=len)
-    if best.lower() == word_lower:
+
+def _cache_set(key: str, value: str) -> None:
+    try:
+        cache.set(key, value, settings.ANTONYM_CACHE_TTL_SECONDS)
+    except Exception as exc:
+        logger.debug("Shared cache unavailable for %s: %s", key, exc)
+
+
+def _antonym_cache_key(word_lower: str) -> str:
+    return ANTONYM_CACHE_PREFIX + word_lower.replace(" ", "_")
+
+
+@lru_cache(maxsize=settings.ANTONYM_LRU_SIZE)
+def _lookup_antonym(word_lower: str) -> Optional[str]:
+    """
+    The antonym from the table or the shared cache. Raises KeyError when
+    neither knows the word, so that is not memoized here.
+    """
+    antonym = _antonym_table().get(word_lower)
+    if antonym:
+        return antonym
+
+    cached = _cache_get(_antonym_cache_key(word_lower))
+    if cached is None:
+        raise KeyError(word_lower)
+    return cached or None
+
+
+def store_wordnet_antonym(word: str) -> Optional[str]:
+    """
+    Look a word missing from the table up in WordNet and store the answer
+    (or that there is none) in the shared cache. Run by a background task,
+    never on a request.
+    """
+    word_lower = _normalize(word)
+    antonym = wordnet_antonym(word_lower)
+    _cache_set(_antonym_cache_key(word_lower), antonym or NO_ANTONYM)
+    return antonym
+
+
+def get_antonym(word: str) -> Optional[str]:
+    """
+    Return a single "best guess" antonym for the given word, if any.
+
+
+    Resolved, in order, from a per-process LRU, the precomputed antonym
+    table and the shared cache. Words none of them know give None; they
+    are looked up in WordNet by a background task, so a later call may
+    find them in the shared cache. The WordNet corpus is never loaded here.
+    """
+    word_lower = _normalize(word)
+    if not word_lower:
         return None
-    return best
+    try:
+        return _lookup_antonym(word_lower)
+    except KeyError:
+        pass
+
+    from .tasks import lookup_antonym_task
+
+    try:
+        lookup_antonym_task.delay(word_lower)
+    except Exception as exc:
+        logger.debug("Could not schedule antonym lookup for %r: %s", word, exc)
+    return None
 
 
 def build_boolean_labels(column_name: str) -> dict[str, str]:
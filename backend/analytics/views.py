@@ -1,23 +1,117 @@
+import hmac
 import logging
-
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
 from rest_framework import status
 from rest_framework.decorators import (
     api_view,
     parser_classes,
     permission_classes,
 )
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.parsers import FormParser, MultiPartParser
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-
-from .models import AnalysisResult, Dataset
-from .serializers import DatasetSerializer
-from .tasks import run_analysis_task, test_task
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .aggregates import sync_semantic_aggregates
+from .appends import append_effects, create_batch, find_appended_batch
+from .ingest import (
+    dataset_row_count,
+    delete_dataset_files,
+    has_quality_index,
+    load_dataset_rows,
+    load_dataset_rows_by_id,
+    quality_index_paths,
+)
+from .metrics import render_metrics
+from .models import AnalysisResult, Dataset, UploadSession
+from .quality import ISSUE_KINDS, quality_index_columns, read_quality_rows
+from .pagination import DatasetCursorPagination
+from .progress import iter_progress_events, progress_event_stream
+from .response_cache import (
+    CachedResponse,
+    content_etag,
+    get_cached_response,
+    response_etag,
+    response_version,
+    set_cached_response,
+)
+from .serializers import (
+    DatasetBatchSerializer,
+    DatasetCardSerializer,
+    DatasetSerializer,
+    UploadSessionSerializer,
+)
+from .summaries import (
+    card_semantic,
+    load_column_type,
+    load_summary,
+    load_summary_section,
+    save_summary_section,
+)
+from .scheduling import queue_metrics
+from .tasks import (
+    append_batch_task,
+    compute_semantic_aggregates_task,
+    enqueue_analysis,
+    test_task,
+)
+from .uploads import (
+    MAX_UPLOAD_PARTS,
+    assemble_upload,
+    assembly_is_stale,
+    clone_dataset,
+    discard_upload_parts,
+    find_duplicate_dataset,
+    received_parts,
+    upload_content_hash,
+    write_upload_part,
+)
 from .utils import build_boolean_labels
 
 logger = logging.getLogger(__name__)
 
+PREVIEW_DEFAULT_LIMIT = 100
+PREVIEW_MAX_LIMIT = 1000
+QUALITY_ROWS_DEFAULT_LIMIT = 50
+
+
+def _int_param(
+    request, name: str, default: int, maximum: Optional[int] = None
+) -> Tuple[Optional[int], Optional[Response]]:
+    raw = request.query_params.get(name)
+    if raw in (None, ""):
+        return default, None
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        value = -1
+    if value < 0 or (maximum is not None and value > maximum):
+        bound = f" and at most {maximum}" if maximum is not None else ""
+        return None, Response(
+            {"error": f"{name} must be an integer >= 0{bound}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return value, None
+
+
+def _frame_records(df: pd.DataFrame) -> List[dict]:
+    # object dtype turns numpy scalars into plain Python values; missing
+    # cells become None so the payload is valid JSON.
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
@@ -32,6 +126,50 @@ def run_test_task(request):
     return Response({"task_id": result.id})
 
 
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def analysis_queues(request):
+    """
+    Depth, pending / running analyses and recent pickup delays of each
+    analysis queue (see scheduling.queue_metrics).
+    """
+    return Response(queue_metrics())
+
+
+def _queue_gauges():
+    for queue, values in queue_metrics().items():
+        if values["depth"] is not None:
+            yield "analysis_queue_depth", {"queue": queue}, values["depth"]
+        for state in ("pending", "running"):
+            labels = {"queue": queue, "status": state}
+            yield "analysis_queue_analyses", labels, values[f"{state}_analyses"]
+
+
+@require_GET
+def metrics(request):
+    """
+    Prometheus scrape target: analysis durations, stage times, queue waits
+    and bytes / rows processed (see metrics.py) plus current queue gauges.
+    Plain Django view, as scrapers send a static METRICS_TOKEN rather than
+    a JWT. Hidden (404) when no token is configured, unless METRICS_PUBLIC.
+    """
+    token = settings.METRICS_TOKEN
+    if not token and not settings.METRICS_PUBLIC:
+        raise Http404
+    if token:
+        expected = f"Bearer {token}".encode()
+        supplied = request.headers.get("Authorization", "").encode()
+        if not hmac.compare_digest(supplied, expected):
+            return JsonResponse(
+                {"error": "Invalid metrics token."},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+    return HttpResponse(
+        render_metrics(_queue_gauges()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def me(request):
@@ -48,13 +186,56 @@ def me(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def list_datasets(request):
-    datasets = Dataset.objects.filter(owner=request.user).order_by(
-        "-uploaded_at",
+    """
+    ?view=card returns cursor-paginated datasets with the small analysis
+    card instead of each full summary_json; the summary sections are
+    available per dataset from the summary endpoint.
+    """
+    if request.query_params.get("view") == "card":
+        datasets = (
+            Dataset.objects.filter(owner=request.user)
+            .select_related("analysis")
+            .only(
+                *DatasetCardSerializer.Meta.fields[:-1],
+                "analysis__id",
+                "analysis__dataset_id",
+                "analysis__status",
+                "analysis__card",
+                "analysis__created_at",
+                "analysis__error_message",
+            )
+        )
+        paginator = DatasetCursorPagination()
+        page = paginator.paginate_queryset(datasets, request)
+        serializer = DatasetCardSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    datasets = (
+        Dataset.objects.filter(owner=request.user)
+        .select_related("analysis")
+        .prefetch_related("analysis__sections")
+        .order_by("-uploaded_at")
     )
     serializer = DatasetSerializer(datasets, many=True)
     return Response(serializer.data)
 
 
+def _create_dataset(owner, name, original_file, content_hash, profiling_mode):
+    dataset = Dataset.objects.create(
+        owner=owner,
+        name=name,
+        original_file=original_file,
+        content_hash=content_hash,
+        profiling_mode=profiling_mode,
+    )
+
+    AnalysisResult.objects.create(
+        dataset=dataset,
+        status="PENDING",
+    )
+    return dataset
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 @parser_classes([MultiPartParser, FormParser])
@@ -68,18 +249,231 @@ def upload_dataset(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    dataset = Dataset.objects.create(
-        owner=request.user,
-        name=name,
-        original_file=file,
+    profiling_mode = request.data.get("profiling_mode") or "AUTO"
+    valid_modes = {choice for choice, _ in Dataset.PROFILING_MODE_CHOICES}
+    if profiling_mode not in valid_modes:
+        return Response(
+            {"error": f"profiling_mode must be one of {sorted(valid_modes)}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    content_hash = upload_content_hash(file)
+    duplicate = find_duplicate_dataset(request.user, content_hash)
+    if duplicate is not None:
+        # Same bytes as an earlier upload: share its files and analysis
+        # rather than storing and profiling the file again.
+        dataset = clone_dataset(duplicate, name, profiling_mode)
+        serializer = DatasetSerializer(dataset)
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    dataset = _create_dataset(request.user, name, file, content_hash, profiling_mode)
+    enqueue_analysis(dataset)
+
+    serializer = DatasetSerializer(dataset)
+    return Response(
+        serializer.data,
+        status=status.HTTP_201_CREATED,
     )
 
-    AnalysisResult.objects.create(
-        dataset=dataset,
-        status="PENDING",
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def initiate_upload(request):
+    """
+    Start a resumable chunked upload.
+
+    Expected JSON payload:
+    {
+            "filename": string,
+            "name": string | null,
+            "profiling_mode": "AUTO" | "IN_MEMORY" | "STREAMING" | "APPROXIMATE",
+            "size": number | null
+    }
+
+    Then PUT each part (raw bytes, at most part_size each) to
+    uploads/<id>/parts/<n>/ starting at 1, and POST uploads/<id>/complete/.
+    """
+    filename = (request.data.get("filename") or "").strip()
+    if not filename:
+        return Response(
+            {"error": "filename is required."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    profiling_mode = request.data.get("profiling_mode") or "AUTO"
+    valid_modes = {choice for choice, _ in Dataset.PROFILING_MODE_CHOICES}
+    if profiling_mode not in valid_modes:
+        return Response(
+            {"error": f"profiling_mode must be one of {sorted(valid_modes)}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    total_size = request.data.get("size")
+    if total_size is not None:
+        try:
+            total_size = int(total_size)
+        except (TypeError, ValueError):
+            total_size = -1
+        if total_size < 0:
+            return Response(
+                {"error": "size must be a non-negative integer."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+    filename = os.path.basename(filename)[:255]
+    session = UploadSession.objects.create(
+        owner=request.user,
+        filename=filename,
+        name=request.data.get("name") or filename,
+        profiling_mode=profiling_mode,
+        total_size=total_size,
     )
+    return Response(
+        UploadSessionSerializer(session).data,
+        status=status.HTTP_201_CREATED,
+    )
+
+
+@api_view(["GET", "DELETE"])
+@permission_classes([IsAuthenticated])
+def upload_session(request, upload_id):
+    """
+    GET: the session with the parts received so far (to resume).
+    DELETE: abort the upload and discard its parts.
+    """
+    session = get_object_or_404(UploadSession, id=upload_id, owner=request.user)
+
+    if request.method == "GET":
+        return Response(UploadSessionSerializer(session).data)
+
+    if session.status == "OPEN":
+        discard_upload_parts(session)
+        session.status = "ABORTED"
+        session.save(update_fields=["status", "updated_at"])
+    return Response(status=status.HTTP_204_NO_CONTENT)
 
-    run_analysis_task.delay(dataset.id)
+
+@api_view(["PUT"])
+@permission_classes([IsAuthenticated])
+def upload_part(request, upload_id, part_number):
+    """
+    Store one part. The request body is the raw bytes of the part and is
+    streamed to disk; re-sending a part replaces it.
+    """
+    session = get_object_or_404(UploadSession, id=upload_id, owner=request.user)
+    if session.status != "OPEN":
+        return Response(
+            {"error": f"Upload is {session.status.lower()}."},
+            status=status.HTTP_409_CONFLICT,
+        )
+    if not 1 <= part_number <= MAX_UPLOAD_PARTS:
+        return Response(
+            {"error": f"Part numbers go from 1 to {MAX_UPLOAD_PARTS}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    content_length = request.META.get("CONTENT_LENGTH")
+    stream = request.stream
+    if stream is None:
+        return Response(
+            {"error": "Empty part."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        size = write_upload_part(
+            session,
+            part_number,
+            stream,
+            int(content_length) if content_length else None,
+        )
+    except ValueError as exc:
+        return Response(
+            {"error": str(exc)},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    session.save(update_fields=["updated_at"])
+    return Response({"number": part_number, "size": size})
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def complete_upload(request, upload_id):
+    """
+    Join the parts into the dataset file and start its analysis (or, for
+    a re-upload of an already analysed file, reuse that analysis).
+
+    Optional JSON payload: { "parts": number } -- defaults to the highest
+    part number received; parts 1..parts must all be present. A session
+    stuck ASSEMBLING (see UPLOAD_ASSEMBLY_TIMEOUT_SECONDS) is joined again.
+    """
+    # Only claiming the session and recording the result happen in
+    # transactions; the parts are joined and hashed outside them, so a
+    # multi-GB copy holds no row lock.
+    with transaction.atomic():
+        session = get_object_or_404(
+            UploadSession.objects.select_for_update(),
+            id=upload_id,
+            owner=request.user,
+        )
+        if assembly_is_stale(session):
+            logger.warning(
+                "Upload %s was left assembling since %s; joining it again",
+                session.id,
+                session.updated_at,
+            )
+        elif session.status != "OPEN":
+            return Response(
+                {"error": f"Upload is {session.status.lower()}."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        parts = received_parts(session)
+        part_count = request.data.get("parts") or (parts[-1]["number"] if parts else 0)
+        try:
+            part_count = int(part_count)
+        except (TypeError, ValueError):
+            part_count = 0
+        if part_count < 1:
+            return Response(
+                {"error": "No parts uploaded."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        session.status = "ASSEMBLING"
+        session.save(update_fields=["status", "updated_at"])
+
+    try:
+        name, content_hash = assemble_upload(session, part_count)
+    except Exception as exc:
+        # The parts are kept, so the client can fix them and complete again.
+        session.status = "OPEN"
+        session.save(update_fields=["status", "updated_at"])
+        if isinstance(exc, ValueError):
+            return Response(
+                {"error": str(exc)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        raise
+
+    with transaction.atomic():
+        duplicate = find_duplicate_dataset(request.user, content_hash)
+        if duplicate is not None:
+            Dataset._meta.get_field("original_file").storage.delete(name)
+            dataset = clone_dataset(duplicate, session.name, session.profiling_mode)
+        else:
+            dataset = _create_dataset(
+                request.user, session.name, name, content_hash, session.profiling_mode
+            )
+            transaction.on_commit(lambda: enqueue_analysis(dataset))
+
+        session.status = "COMPLETED"
+        session.dataset = dataset
+        session.save(update_fields=["status", "dataset", "updated_at"])
 
     serializer = DatasetSerializer(dataset)
     return Response(
@@ -88,9 +482,64 @@ def upload_dataset(request):
     )
 
 
+def _dataset_detail(request, dataset_id: int):
+    dataset = (
+        Dataset.objects.filter(id=dataset_id, owner=request.user)
+        .select_related("analysis")
+        .first()
+    )
+    if dataset is None:
+        return Response(
+            {"error": "Not found"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    serializer = DatasetSerializer(
+        dataset, context={"include_semantic_aggregates": True}
+    )
+    return serializer.data
+
+
+def _cached_dataset_response(request, dataset_id: int, variant: str, build):
+    """
+    Serve a GET from the response cache (see response_cache.py). On a miss
+    ``build()`` loads the data, returning it or an error Response, which is
+    passed through uncached. Hits cost no database query and no
+    serialization, and a matching If-None-Match gets a 304.
+    """
+    version = response_version(dataset_id)
+    entry = get_cached_response(dataset_id, version, variant) if version else None
+    if entry is None or entry.owner_id != request.user.id:
+        data = build()
+        if isinstance(data, Response):
+            return data
+        content = JSONRenderer().render(data)
+        etag = (
+            response_etag(dataset_id, version, variant)
+            if version
+            else content_etag(content)
+        )
+        entry = CachedResponse(request.user.id, etag, content)
+        if version:
+            set_cached_response(dataset_id, version, variant, entry)
+
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("If-None-Match", "")
+    if (
+        entry.etag in [tag.strip() for tag in if_none_match.split(",")]
+        or if_none_match == "*"
+    ):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return HttpResponse(entry.content, content_type="application/json", headers=headers)
+
+
 @api_view(["GET", "DELETE"])
 @permission_classes([IsAuthenticated])
 def get_dataset(request, dataset_id):
+    if request.method == "GET":
+        return _cached_dataset_response(
+            request, dataset_id, "detail", lambda: _dataset_detail(request, dataset_id)
+        )
+
     try:
         dataset = Dataset.objects.get(
             id=dataset_id,
@@ -102,17 +551,73 @@ def get_dataset(request, dataset_id):
             status=status.HTTP_404_NOT_FOUND,
         )
 
-    if request.method == "GET":
-        serializer = DatasetSerializer(dataset)
-        return Response(serializer.data)
-
     # DELETE
-    if dataset.original_file:
-        dataset.original_file.delete(save=False)
+    delete_dataset_files(dataset)
     dataset.delete()
     return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+@api_view(["GET", "POST"])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser, FormParser])
+def dataset_batches(request, dataset_id):
+    """
+    GET lists the row batches appended to a dataset.
+
+    POST appends one (multipart "file", in any upload format, with the
+    dataset's columns). Only the new rows are profiled; their statistics
+    are merged into the existing analysis in the background and the batch
+    is returned with status PENDING, along with "rescans_dataset" (the
+    first append to a dataset without stored sketches reads all of its
+    rows once) and "profiling_mode_change" ({"from", "to"}, or null).
+    Appending the same file again returns the existing batch instead of
+    adding the rows twice.
+    """
+    dataset = get_object_or_404(
+        Dataset,
+        id=dataset_id,
+        owner=request.user,
+    )
+
+    if request.method == "GET":
+        serializer = DatasetBatchSerializer(dataset.batches.all(), many=True)
+        return Response(serializer.data)
+
+    file = request.FILES.get("file")
+    if not file:
+        return Response(
+            {"error": "No file uploaded"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    content_hash = upload_content_hash(file)
+
+    with transaction.atomic():
+        analysis = get_object_or_404(
+            AnalysisResult.objects.select_for_update(), dataset=dataset
+        )
+        existing = find_appended_batch(dataset, content_hash)
+        if existing is not None:
+            return Response(DatasetBatchSerializer(existing).data)
+
+        # Batches are merged one at a time, each into a completed analysis.
+        if analysis.status != "COMPLETED":
+            return Response(
+                {"error": "Rows can be appended once the analysis has completed."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        batch = create_batch(dataset, file, content_hash)
+        effects = append_effects(dataset)
+        analysis.status = "RUNNING"
+        analysis.save(update_fields=["status", "updated_at"])
+        transaction.on_commit(lambda: append_batch_task.delay(batch.id))
+
+    return Response(
+        {**DatasetBatchSerializer(batch).data, **effects},
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def update_semantic_config(request, dataset_id):
@@ -128,6 +633,10 @@ def update_semantic_config(request, dataset_id):
             "time_column": string | null,
             "column_types": { [columnName: string]: string }
     }
+
+
+    The response includes summary_json.semantic_aggregates built from
+    cached parts; parts still being computed are listed under "pending".
     """
     dataset = get_object_or_404(
         Dataset,
@@ -142,9 +651,6 @@ def update_semantic_config(request, dataset_id):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    summary = analysis.summary_json or {}
-    columns = summary.get("columns") or {}
-
     data = request.data
     target_column = data.get("target_column")
     metric_columns = data.get("metric_columns") or []
@@ -163,7 +669,7 @@ def update_semantic_config(request, dataset_id):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    semantic_config = summary.get("semantic_config") or {}
+    semantic_config = load_summary_section(analysis, "semantic_config", {})
     semantic_config.update(
         {
             "target_column": target_column,
@@ -176,11 +682,12 @@ def update_semantic_config(request, dataset_id):
     target_display = None
 
     if target_column:
-        col_summary = columns.get(target_column) or {}
-        raw_type = col_summary.get("type")
         logical_type = column_types.get(target_column)
 
-        is_boolean = logical_type == "boolean" or raw_type == "boolean"
+        is_boolean = (
+            logical_type == "boolean"
+            or load_column_type(analysis, target_column) == "boolean"
+        )
 
         if is_boolean:
             labels = build_boolean_labels(target_column)
@@ -193,9 +700,14 @@ def update_semantic_config(request, dataset_id):
     if target_display is not None:
         semantic_config["target_display"] = target_display
 
-    summary["semantic_config"] = semantic_config
-    analysis.summary_json = summary
-    analysis.save(update_fields=["summary_json"])
+    # Only the small config section and the card are written; the column
+    # statistics are left alone.
+    save_summary_section(analysis, "semantic_config", semantic_config)
+    analysis.card = {
+        **(analysis.card or {}),
+        "semantic": card_semantic(semantic_config),
+    }
+    analysis.save(update_fields=["card", "updated_at"])
 
     logger.info(
         "Updated semantic_config for dataset %s: %s",
@@ -203,5 +715,193 @@ def update_semantic_config(request, dataset_id):
         semantic_config,
     )
 
-    serializer = DatasetSerializer(dataset)
+    # Only aggregates whose inputs changed are recomputed, in the background;
+    # the response carries what is cached and lists the rest as pending.
+    pending_keys = sync_semantic_aggregates(analysis)
+    if pending_keys:
+        compute_semantic_aggregates_task.delay(dataset.id, pending_keys)
+
+    serializer = DatasetSerializer(
+        dataset, context={"include_semantic_aggregates": True}
+    )
     return Response(serializer.data)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def dataset_preview(request, dataset_id):
+    """
+    One page of raw rows: ?limit=<n>&offset=<n>.
+
+    Pages are read from the row-group index of the columnar cache, so deep
+    pages cost the same as the first one.
+    """
+    dataset = get_object_or_404(
+        Dataset,
+        id=dataset_id,
+        owner=request.user,
+    )
+
+    limit, error = _int_param(
+        request, "limit", PREVIEW_DEFAULT_LIMIT, maximum=PREVIEW_MAX_LIMIT
+    )
+    if error is not None:
+        return error
+    offset, error = _int_param(request, "offset", 0)
+    if error is not None:
+        return error
+
+    total_rows = dataset_row_count(dataset)
+    if total_rows is None:
+        analysis = getattr(dataset, "analysis", None)
+        card = (analysis.card if analysis else None) or {}
+        total_rows = card.get("row_count")
+
+    df = load_dataset_rows(dataset, offset, limit)
+
+    return Response(
+        {
+            "columns": [str(col) for col in df.columns],
+            "rows": _frame_records(df),
+            "total_rows": total_rows if total_rows is not None else len(df),
+        }
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def dataset_quality_rows(request, dataset_id):
+    """
+    Page through rows with data-quality issues, read from the quality index
+    built during analysis:
+
+        ?limit=<n>&offset=<n>&column=<name>&kind=missing|coercion|outlier|any
+
+    kind defaults to "missing"; column defaults to every column.
+    "total_rows" counts the matching rows of every page;
+    "total_rows_with_missing" is the same number under its old name.
+    """
+    dataset = get_object_or_404(
+        Dataset,
+        id=dataset_id,
+        owner=request.user,
+    )
+
+    limit, error = _int_param(
+        request, "limit", QUALITY_ROWS_DEFAULT_LIMIT, maximum=PREVIEW_MAX_LIMIT
+    )
+    if error is not None:
+        return error
+    offset, error = _int_param(request, "offset", 0)
+    if error is not None:
+        return error
+
+    kind = request.query_params.get("kind") or "missing"
+    if kind not in (*ISSUE_KINDS, "any"):
+        return Response(
+            {"error": f"kind must be one of {[*ISSUE_KINDS, 'any']}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if not has_quality_index(dataset):
+        return Response(
+            {"error": "Quality index is not available for this dataset yet."},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    index_paths = quality_index_paths(dataset)
+    column = request.query_params.get("column") or None
+    if column is not None and column not in quality_index_columns(index_paths[0]):
+        return Response(
+            {"error": f"Unknown column '{column}'."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # Appended batches have their own index after the dataset's.
+    row_ids = np.concatenate(
+        [
+            read_quality_rows(path, column=column, kind=None if kind == "any" else kind)
+            for path in index_paths
+        ]
+    )
+    page_ids = row_ids[offset : offset + limit]
+    df = load_dataset_rows_by_id(dataset, page_ids)
+
+    return Response(
+        {
+            "columns": [str(col) for col in df.columns],
+            "rows": _frame_records(df),
+            "row_ids": page_ids.tolist(),
+            "total_rows": int(row_ids.size),
+            # Kept for older clients; despite the name it follows ``kind``.
+            "total_rows_with_missing": int(row_ids.size),
+        }
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def dataset_summary(request, dataset_id):
+    """
+    The heavy parts of summary_json, optionally limited to
+    ?sections=columns,missing_values,... Served from the response cache;
+    supports If-None-Match so clients can revalidate without downloading an
+    unchanged summary.
+    """
+    raw_sections = request.query_params.get("sections") or ""
+    sections = sorted(
+        {name.strip() for name in raw_sections.split(",") if name.strip()}
+    )
+
+    def build():
+        analysis = get_object_or_404(
+            AnalysisResult.objects.only("id", "dataset_id", "version"),
+            dataset_id=dataset_id,
+            dataset__owner=request.user,
+        )
+        return load_summary(analysis, sections or None) or {}
+
+    return _cached_dataset_response(
+        request, dataset_id, "summary:" + ",".join(sections), build
+    )
+
+
+@sync_to_async
+def _jwt_user(request):
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return authenticated[0] if authenticated else None
+
+
+@require_GET
+async def analysis_progress(request, dataset_id):
+    """
+    Server-Sent Events stream of analysis progress (stage changes, each
+    finished column with its summary, and a final status event), replacing
+    polling GET /datasets/<id>/. Plain async Django view: DRF views cannot
+    stream asynchronously, so the JWT is checked here directly. Under WSGI
+    the events come from a blocking generator instead, which holds one
+    worker thread per open stream.
+    """
+    user = await _jwt_user(request)
+    if user is None:
+        return JsonResponse(
+            {"error": "Authentication credentials were not provided."},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+
+    if not await Dataset.objects.filter(id=dataset_id, owner=user).aexists():
+        return JsonResponse({"error": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    if isinstance(request, ASGIRequest):
+        events = progress_event_stream(dataset_id)
+    else:
+        # WSGI buffers async iterators to completion; stream from a thread.
+        events = iter_progress_events(dataset_id)
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,151 @@
+"""
+Compare memory use of in-memory profiling with and without compaction
+(narrowed numbers, Categorical text columns) of the loaded frame.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_compaction --rows 2000000 5000000
+
+Each mode runs in a fresh process: ``peak`` is the growth of its maximum
+RSS while loading and profiling the columnar cache, ``steady`` the size
+of the loaded DataFrame, both per row. ``--no-id`` drops the one column
+compaction cannot shrink, a distinct string per row.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import warnings
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from analytics.columnar import read_columnar
+from analytics.profiling import profile_dataframe
+
+
+def make_parquet(path: str, rows: int, ids: bool = True, seed: int = 0) -> None:
+    """
+    A columnar cache like a typical CSV upload's: small and large
+    integers, prices with two decimals, a few string labels and dates
+    (~2% missing), a unique id per row and a boolean flag.
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.array(["north", "south", "east", "west", "central"], dtype=object)
+    days = pd.date_range("2023-01-01", periods=730).strftime("%Y-%m-%d")
+    label = labels[rng.integers(0, labels.size, size=rows)]
+    label[rng.random(rows) < 0.02] = None
+    table = pa.table(
+        {
+            "id": [f"order-{i:09d}" for i in range(rows)],
+            "quantity": rng.integers(1, 50, size=rows),
+            "customer": rng.integers(0, 2**40, size=rows),
+            "price": rng.integers(100, 100_000, size=rows) / 100.0,
+            "region": label,
+            "status": np.array(["open", "paid", "shipped"], dtype=object)[
+                rng.integers(0, 3, size=rows)
+            ],
+            "day": days.to_numpy(dtype=object)[rng.integers(0, days.size, size=rows)],
+            "returned": rng.random(rows) < 0.05,
+        }
+    )
+    if not ids:
+        table = table.drop_columns(["id"])
+    pq.write_table(table, path)
+
+
+def _max_rss() -> int:
+    # VmHWM starts over with the spawned interpreter; ru_maxrss would still
+    # hold the parent's peak from before the exec. Linux only.
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    raise RuntimeError("VmHWM not found in /proc/self/status")
+
+
+def _frame_bytes(df: pd.DataFrame) -> int:
+    # Like memory_usage(deep=True), but a Python object shared by several
+    # rows (Arrow de-duplicates equal strings) is counted once.
+    total = int(df.memory_usage(index=False).sum())
+    for position in range(len(df.columns)):
+        series = df.iloc[:, position]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            values = series.cat.categories.to_numpy(dtype=object)
+        elif series.dtype == "object":
+            values = series.to_numpy()
+        else:
+            continue
+        total += sum(
+            sys.getsizeof(value) for value in {id(v): v for v in values}.values()
+        )
+    return total
+
+
+def _profile(path: str, compact: bool) -> Dict[str, Any]:
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter("ignore")
+    baseline = _max_rss()
+    start = time.perf_counter()
+    df = read_columnar(path, compact=compact)
+    loaded = time.perf_counter()
+    summary = profile_dataframe(df)
+    done = time.perf_counter()
+    return {
+        "load": loaded - start,
+        "profile": done - loaded,
+        "peak": _max_rss() - baseline,
+        "steady": _frame_bytes(df),
+        "summary": json.dumps(summary, default=str, sort_keys=True),
+    }
+
+
+def _run(path: str, compact: bool) -> Dict[str, Any]:
+    # A fresh interpreter per run, so the peak of one does not hide the other.
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_profile, (path, compact))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    parser.add_argument("--no-id", action="store_true")
+    args = parser.parse_args()
+
+    print(
+        f"{'rows':>10} {'mode':>8} {'load s':>7} {'profile s':>10} "
+        f"{'peak MiB':>9} {'peak B/row':>11} {'steady B/row':>13}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.parquet")
+        for rows in args.rows:
+            make_parquet(path, rows, ids=not args.no_id)
+            runs = {"legacy": _run(path, False), "compact": _run(path, True)}
+            for mode, run in runs.items():
+                print(
+                    f"{rows:>10} {mode:>8} {run['load']:>7.2f} "
+                    f"{run['profile']:>10.2f} {run['peak'] / 2**20:>9.0f} "
+                    f"{run['peak'] / rows:>11.1f} {run['steady'] / rows:>13.1f}"
+                )
+            legacy, compact = runs["legacy"], runs["compact"]
+            if legacy["summary"] != compact["summary"]:
+                print(f"  warning: results differ from the legacy path ({rows} rows)")
+            print(
+                f"{'':>10} {'ratio':>8} {'':>7} {'':>10} "
+                f"{legacy['peak'] / compact['peak']:>8.1f}x {'':>11} "
+                f"{legacy['steady'] / compact['steady']:>12.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
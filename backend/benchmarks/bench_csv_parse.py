@@ -0,0 +1,119 @@
+"""
+Compare parsing a CSV upload with its parse plan (sniffed dialect,
+sampled column types, multi-threaded read) against pandas.read_csv and
+Arrow's own per-block type inference.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_csv_parse --rows 5000000 --delimiter ";"
+
+``plan`` times sniffing and sampling alone, which a stored plan skips;
+``inferred`` parses with the plan's dialect but no column types and
+``planned`` with both. ``cache`` is the whole columnar conversion from a
+stored plan, Parquet write included.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+import warnings
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from analytics.columnar import _read_csv, read_columnar, write_columnar_cache
+from analytics.formats import plan_csv
+
+
+def make_csv(path: str, rows: int, delimiter: str = ",", seed: int = 0) -> None:
+    """
+    Integer ids, floats with ~5% missing values (written with a decimal
+    comma when the delimiter is not ","), short string labels, booleans
+    and ISO dates.
+    """
+    rng = np.random.default_rng(seed)
+    amount = rng.normal(100.0, 25.0, size=rows).round(3)
+    df = pd.DataFrame(
+        {
+            "id": np.arange(rows),
+            "amount": np.where(rng.random(rows) < 0.05, np.nan, amount),
+            "count": rng.integers(0, 1000, size=rows),
+            "label": np.array(["alpha", "beta", "gamma", "delta"])[
+                rng.integers(0, 4, size=rows)
+            ],
+            "flag": rng.random(rows) < 0.5,
+            "day": pd.Timestamp("2024-01-01")
+            + pd.to_timedelta(rng.integers(0, 365, size=rows), unit="D"),
+        }
+    )
+    decimal = "," if delimiter != "," else "."
+    df.to_csv(path, sep=delimiter, decimal=decimal, index=False)
+
+
+def _timed(fn, *args, **kwargs) -> tuple[float, Any]:
+    start = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return time.perf_counter() - start, out
+
+
+def _same(expected: pd.DataFrame, actual: pd.DataFrame) -> bool:
+    if list(expected.columns) != list(actual.columns) or len(expected) != len(actual):
+        return False
+    for column in expected.columns:
+        want, got = expected[column], actual[column]
+        if want.dtype.kind == "f" or got.dtype.kind == "f":
+            if not np.allclose(
+                want.to_numpy(float), got.to_numpy(float), equal_nan=True
+            ):
+                return False
+        elif not (want.astype(str).to_numpy() == got.astype(str).to_numpy()).all():
+            return False
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    parser.add_argument("--delimiter", default=",")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter("ignore")
+
+    print(
+        f"{'rows':>10} {'MiB':>6} {'pandas s':>9} {'plan s':>7} {'inferred s':>11} "
+        f"{'planned s':>10} {'cache s':>8} {'speedup':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "data.csv")
+        dest = os.path.join(tmp, "data.parquet")
+        for rows in args.rows:
+            make_csv(source, rows, args.delimiter)
+            mib = os.path.getsize(source) / 2**20
+            decimal = "," if args.delimiter != "," else "."
+            legacy, expected = _timed(
+                pd.read_csv, source, sep=args.delimiter, decimal=decimal
+            )
+            plan_time, plan = _timed(plan_csv, source)
+            inferred, _ = _timed(_read_csv, source, None, {}, plan)
+            planned, _ = _timed(
+                _read_csv, source, None, plan.arrow_column_types(), plan
+            )
+            cache, _ = _timed(write_columnar_cache, source, dest, plan)
+            if not _same(expected, read_columnar(dest)):
+                print(f"  warning: results differ from pandas.read_csv ({rows} rows)")
+            print(
+                f"{rows:>10} {mib:>6.0f} {legacy:>9.2f} {plan_time:>7.2f} "
+                f"{inferred:>11.2f} {planned:>10.2f} {cache:>8.2f} "
+                f"{legacy / planned:>7.1f}x"
+            )
+            del expected
+
+
+if __name__ == "__main__":
+    main()
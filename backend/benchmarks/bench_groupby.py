@@ -0,0 +1,137 @@
+"""
+Compare the single-factorization metrics_by_target with the per-metric
+groupby loop it replaced.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_groupby --rows 2000000 --metrics 40
+
+The legacy loop computed mean, median and count only; ``legacy+`` is the
+same loop asked for every statistic the new path returns (std, min, max
+and quartiles too), which is the like-for-like comparison.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+import warnings
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from analytics.semantic_utils import _compute_metrics_by_target
+
+FULL_STATS = ["mean", "median", "count", "std", "min", "max", "p25", "p75"]
+
+
+def _p25(series: pd.Series) -> float:
+    return series.quantile(0.25)
+
+
+def _p75(series: pd.Series) -> float:
+    return series.quantile(0.75)
+
+
+def legacy_metrics_by_target(
+    df: pd.DataFrame, target_col: str, metric_cols: List[str], full: bool = False
+) -> Dict[str, List[Dict[str, Any]]]:
+    """The original loop: one groupby and one iterrows per metric."""
+    result: Dict[str, List[Dict[str, Any]]] = {}
+    aggs: List[Any] = ["mean", "median", "count"]
+    if full:
+        aggs += ["std", "min", "max", _p25, _p75]
+    for metric in metric_cols:
+        if not is_numeric_dtype(df[metric]):
+            continue
+        grouped = (
+            df[[target_col, metric]]
+            .dropna(subset=[target_col])
+            .groupby(target_col)[metric]
+            .agg(aggs)
+        )
+        grouped.columns = FULL_STATS[: len(aggs)]
+        result[metric] = [
+            {"target": str(idx), **{k: float(v) for k, v in row.items()}}
+            for idx, row in grouped.iterrows()
+        ]
+    return result
+
+
+def make_target_frame(
+    rows: int, metrics: int, targets: int, seed: int = 0
+) -> pd.DataFrame:
+    """
+    ``targets`` string labels (~1% missing) and ``metrics`` float columns
+    with ~5% missing values.
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.array([f"class_{i}" for i in range(targets)], dtype=object)
+    target = labels[rng.integers(0, targets, size=rows)]
+    target[rng.random(rows) < 0.01] = None
+    data: Dict[str, Any] = {"target": target}
+    for i in range(metrics):
+        values = rng.normal(i, 1.0 + i, size=rows)
+        values[rng.random(rows) < 0.05] = np.nan
+        data[f"m{i}"] = values
+    return pd.DataFrame(data)
+
+
+def _timed(fn, *args, **kwargs) -> tuple[float, Any]:
+    start = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return time.perf_counter() - start, out
+
+
+def _same(expected: Dict[str, Any], actual: Dict[str, Any]) -> bool:
+    for metric, rows in expected.items():
+        other = actual.get(metric) or []
+        if [r["target"] for r in rows] != [r["target"] for r in other]:
+            return False
+        for field in rows[0] if rows else []:
+            if field == "target":
+                continue
+            want = np.array([r[field] for r in rows], dtype=float)
+            got = np.array([np.nan if r[field] is None else r[field] for r in other])
+            if not np.allclose(want, got, equal_nan=True):
+                return False
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--metrics", type=int, default=40)
+    parser.add_argument("--targets", type=int, nargs="+", default=[5, 200, 2000])
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter("ignore")
+
+    print(
+        f"{'targets':>8} {'rows':>10} {'metrics':>8} {'legacy s':>9} "
+        f"{'legacy+ s':>10} {'new s':>7} {'speedup':>8} {'speedup+':>9}"
+    )
+    for targets in args.targets:
+        df = make_target_frame(args.rows, args.metrics, targets)
+        metrics = [f"m{i}" for i in range(args.metrics)]
+        legacy, expected = _timed(legacy_metrics_by_target, df, "target", metrics)
+        legacy_full, expected_full = _timed(
+            legacy_metrics_by_target, df, "target", metrics, full=True
+        )
+        new, actual = _timed(_compute_metrics_by_target, df, "target", metrics)
+        if not (_same(expected, actual) and _same(expected_full, actual)):
+            print(f"  warning: results differ from the legacy path ({targets} targets)")
+        print(
+            f"{targets:>8} {args.rows:>10} {args.metrics:>8} {legacy:>9.2f} "
+            f"{legacy_full:>10.2f} {new:>7.2f} {legacy / new:>7.1f}x "
+            f"{legacy_full / new:>8.1f}x"
+        )
+        del df, expected, expected_full, actual
+
+
+if __name__ == "__main__":
+    main()
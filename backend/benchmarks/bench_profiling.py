@@ -0,0 +1,121 @@
+"""
+Compare the batched profiling engine with the per-column loop it replaced.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_profiling --rows 20000 --columns 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+import warnings
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from analytics.profiling import infer_column_type, profile_dataframe
+
+
+def legacy_profile_dataframe(df: pd.DataFrame) -> Dict[str, Any]:
+    """The original run_analysis_task loop: several scans per column."""
+    result: Dict[str, Any] = {
+        "row_count": int(len(df)),
+        "column_count": int(len(df.columns)),
+        "columns": {},
+        "missing_values": df.isnull().sum().to_dict(),
+    }
+    for col in df.columns:
+        series = df[col]
+        col_type = infer_column_type(series, col)
+        col_summary: Dict[str, Any] = {
+            "type": col_type,
+            "describe": series.describe(include="all").to_dict(),
+        }
+        if col_type == "numeric":
+            numeric_series = series.dropna()
+            if not numeric_series.empty:
+                vc = numeric_series.value_counts(bins=10).sort_index()
+                col_summary["histogram"] = [
+                    {
+                        "bin": f"{float(i.left):.2f}–{float(i.right):.2f}",
+                        "count": int(c),
+                    }
+                    for i, c in vc.items()
+                ]
+        if col_type in ("categorical", "boolean"):
+            vc = series.astype(str).value_counts().head(10)
+            col_summary["value_counts"] = [
+                {"value": idx, "count": int(count)} for idx, count in vc.items()
+            ]
+        result["columns"][col] = col_summary
+    return result
+
+
+def make_wide_frame(rows: int, columns: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Synthetic wide frame: mostly floats and ints, plus booleans and
+    low-cardinality strings, with ~5% missing values in the float columns.
+    """
+    rng = np.random.default_rng(seed)
+    data: Dict[str, Any] = {}
+    for i in range(columns):
+        kind = i % 10
+        if kind < 5:
+            values = rng.normal(loc=i, scale=10.0, size=rows)
+            values[rng.random(rows) < 0.05] = np.nan
+        elif kind < 8:
+            values = rng.integers(0, 1000, size=rows)
+        elif kind == 8:
+            values = rng.integers(0, 2, size=rows)
+        else:
+            values = rng.choice(["alpha", "beta", "gamma", "delta"], size=rows)
+        data[f"col_{i}"] = values
+    return pd.DataFrame(data)
+
+
+def _timed(fn, *args) -> tuple[float, Any]:
+    start = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - start, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--columns", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter("ignore")
+
+    print(f"{'columns':>8} {'legacy s':>10} {'batched s':>10} {'speedup':>8}")
+    for columns in args.columns:
+        df = make_wide_frame(args.rows, columns)
+        legacy = min(
+            _timed(legacy_profile_dataframe, df)[0] for _ in range(args.repeat)
+        )
+        batched = min(_timed(profile_dataframe, df)[0] for _ in range(args.repeat))
+
+        expected = legacy_profile_dataframe(df)["columns"]
+        actual = profile_dataframe(df)["columns"]
+        mismatched = [
+            name
+            for name in expected
+            if expected[name]["type"] != actual[name]["type"]
+            or expected[name].get("histogram") != actual[name].get("histogram")
+        ]
+        if mismatched:
+            print(f"  warning: {len(mismatched)} columns differ, e.g. {mismatched[0]}")
+
+        print(
+            f"{columns:>8} {legacy:>10.3f} {batched:>10.3f} {legacy / batched:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Benchmark the analysis engine and semantic aggregates on synthetic
+datasets and compare with a stored baseline.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_suite --rows 10000 1000000 --save
+    # ... change something, then:
+    python -m benchmarks.bench_suite --rows 10000 1000000
+
+Each shape (see synthetic.SHAPES: narrow_tall, wide, high_cardinality,
+datetime_heavy, dirty) is written as a columnar cache and run through the
+workloads in a fresh process, without Django or Celery:
+
+- ``load``: read_columnar(compact=True), as in-memory analyses load it;
+- ``infer``: infer_column_type_details on every column;
+- ``profile``: profile_dataframe on the loaded frame;
+- ``stream`` / ``sketch``: profile_streaming / profile_approximate over
+  chunks of CHUNK_ROWS;
+- ``aggregates``: compute_semantic_aggregate_parts for the shape's
+  semantic_config, on its columns loaded as the aggregates task does.
+
+``rows/s`` is throughput, ``peak MiB`` the RSS growth while the workload
+ran (Linux; elsewhere the whole process's peak). ``--save`` stores the
+results in the baseline file (merged by shape, size and workload); later
+runs mark a workload ``SLOWER`` or ``MORE MEMORY`` beyond the tolerances
+and exit with status 1, and warn when its output changed. Baselines hold
+timings of one machine, so record them where they are compared.
+Combinations above ``--max-cells`` (rows x columns) are skipped, so the
+default 50M-row sizes only run for the narrow shapes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import warnings
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from analytics.columnar import iter_columnar, read_columnar
+from analytics.diagnostics import peak_rss, reset_peak_rss
+from analytics.profiling import (
+    infer_column_type_details,
+    profile_approximate,
+    profile_dataframe,
+    profile_streaming,
+)
+from analytics.semantic_utils import compute_semantic_aggregate_parts, semantic_columns
+from benchmarks.synthetic import SHAPES, column_count, write_dataset
+
+WORKLOADS = ["load", "infer", "profile", "stream", "sketch", "aggregates"]
+# As settings.ANALYSIS_CHUNK_ROWS.
+CHUNK_ROWS = 100_000
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+# Differences under these are noise (timer resolution, allocator reuse)
+# and never reported as regressions.
+MIN_SLOWDOWN_SECONDS = 0.05
+MIN_GROWTH_BYTES = 64 * 2**20
+
+
+def _rss() -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def _digest(result: Any) -> str:
+    # Rounded so last-bit float differences do not count as changed output.
+    def rounded(value: Any) -> Any:
+        if isinstance(value, float):
+            return float(f"{value:.9g}")
+        if isinstance(value, dict):
+            return {str(key): rounded(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [rounded(item) for item in value]
+        return value
+
+    text = json.dumps(rounded(result), sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def _aggregate_parts(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # aggregates.aggregate_parts, which cannot be imported without Django.
+    target, time_column = config["target_column"], config["time_column"]
+    parts = [{"kind": "target_distribution", "target_column": target, "metric": None}]
+    for metric in config["metric_columns"]:
+        parts.append(
+            {"kind": "metrics_by_target", "target_column": target, "metric": metric}
+        )
+        parts.append(
+            {"kind": "metrics_over_time", "time_column": time_column, "metric": metric}
+        )
+    return [{"target_column": None, "time_column": None, **part} for part in parts]
+
+
+class _Workloads:
+    """The benchmarked calls on one dataset, plus the untimed set-up each needs."""
+
+    def __init__(self, path: str, config: Dict[str, Any]) -> None:
+        self.path = path
+        self.config = config
+        self.frame: Optional[pd.DataFrame] = None
+
+    def prepare(self, name: str) -> None:
+        if name in ("infer", "profile"):
+            if self.frame is None:
+                self.frame = read_columnar(self.path, compact=True)
+        elif name == "aggregates":
+            self.frame = None
+            self.frame = read_columnar(self.path, columns=semantic_columns(self.config))
+        else:
+            self.frame = None
+
+    def _chunks(self, subset: Optional[List[str]]):
+        return iter_columnar(self.path, columns=subset, batch_rows=CHUNK_ROWS)
+
+    def load(self) -> Any:
+        self.frame = read_columnar(self.path, compact=True)
+        return self.frame.dtypes.astype(str).to_dict()
+
+    def infer(self) -> Any:
+        return {
+            name: infer_column_type_details(self.frame[name], name)["type"]
+            for name in self.frame.columns
+        }
+
+    def profile(self) -> Any:
+        return profile_dataframe(self.frame)
+
+    def stream(self) -> Any:
+        return profile_streaming(self._chunks)
+
+    def sketch(self) -> Any:
+        result = profile_approximate(self._chunks)
+        result.pop("sketches")
+        return result
+
+    def aggregates(self) -> Any:
+        parts = _aggregate_parts(self.config)
+        return compute_semantic_aggregate_parts(self.frame, parts)
+
+
+def _run_workloads(
+    path: str, config: Dict[str, Any], workloads: List[str], repeat: int
+) -> Dict[str, Dict[str, Any]]:
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter("ignore")
+    runner = _Workloads(path, config)
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in workloads:
+        runner.prepare(name)
+        seconds, peak = [], []
+        for _ in range(repeat):
+            gc.collect()
+            scoped = reset_peak_rss()
+            before = _rss() if scoped else 0
+            start = time.perf_counter()
+            output = getattr(runner, name)()
+            seconds.append(time.perf_counter() - start)
+            # Memory freed by the previous workload may still be returning.
+            peak.append(max(peak_rss() - before, 0))
+        results[name] = {
+            "seconds": min(seconds),
+            "peak_bytes": max(peak),
+            "digest": _digest(output),
+        }
+    return results
+
+
+def _run(path: str, config: Dict[str, Any], workloads: List[str], repeat: int):
+    # A fresh interpreter per dataset, so earlier peaks and caches (e.g.
+    # parsed time columns) do not carry over.
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_run_workloads, (path, config, workloads, repeat))
+
+
+def _environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "pyarrow": pa.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _load_baseline(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {"environment": None, "results": {}}
+    with open(path) as baseline:
+        return json.load(baseline)
+
+
+def _compare(
+    result: Dict[str, Any],
+    base: Optional[Dict[str, Any]],
+    tolerance: float,
+    memory_tolerance: float,
+) -> List[str]:
+    if base is None:
+        return []
+    flags = []
+    slower = result["seconds"] - base["seconds"]
+    if slower > MIN_SLOWDOWN_SECONDS and slower > tolerance * base["seconds"]:
+        flags.append("SLOWER")
+    growth = result["peak_bytes"] - base["peak_bytes"]
+    if growth > MIN_GROWTH_BYTES and growth > memory_tolerance * base["peak_bytes"]:
+        flags.append("MORE MEMORY")
+    return flags
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--shapes", nargs="+", choices=list(SHAPES), default=list(SHAPES)
+    )
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 1_000_000, 50_000_000]
+    )
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=WORKLOADS)
+    parser.add_argument("--wide-columns", type=int, default=None)
+    parser.add_argument("--max-cells", type=int, default=300_000_000)
+    parser.add_argument("--repeat", type=int, default=1, help="best of N timings")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="store as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--memory-tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    baseline = _load_baseline(args.baseline)
+    environment = _environment()
+    if baseline["environment"] not in (None, environment):
+        print(f"note: baseline recorded with {baseline['environment']}")
+
+    regressions = 0
+    print(
+        f"{'shape':>16} {'rows':>10} {'workload':>10} {'s':>8} {'rows/s':>11} "
+        f"{'peak MiB':>9} {'vs base':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.parquet")
+        for shape in args.shapes:
+            columns = column_count(shape, args.wide_columns)
+            for rows in args.rows:
+                if rows * columns > args.max_cells:
+                    print(f"{shape:>16} {rows:>10} skipped ({columns} columns)")
+                    continue
+                write_dataset(path, shape, rows, columns=args.wide_columns)
+                results = _run(
+                    path, SHAPES[shape].semantic_config, args.workloads, args.repeat
+                )
+                for workload, result in results.items():
+                    key = f"{shape}/{rows}/{workload}"
+                    base = baseline["results"].get(key)
+                    flags = _compare(
+                        result, base, args.tolerance, args.memory_tolerance
+                    )
+                    if base is not None and base["digest"] != result["digest"]:
+                        print(f"  warning: results differ from the baseline ({key})")
+                    ratio = (
+                        f"{result['seconds'] / base['seconds']:>7.2f}x"
+                        if base is not None and base["seconds"] > 0
+                        else f"{'-':>8}"
+                    )
+                    print(
+                        f"{shape:>16} {rows:>10} {workload:>10} "
+                        f"{result['seconds']:>8.3f} "
+                        f"{rows / max(result['seconds'], 1e-9):>11.0f} "
+                        f"{result['peak_bytes'] / 2**20:>9.1f} {ratio} "
+                        + " ".join(flags)
+                    )
+                    regressions += bool(flags)
+                    if args.save:
+                        baseline["results"][key] = result
+
+    if args.save:
+        baseline["environment"] = environment
+        with open(args.baseline, "w") as out:
+            json.dump(baseline, out, indent=2, sort_keys=True)
+        print(f"baseline saved to {args.baseline}")
+    elif regressions:
+        print(f"{regressions} regression(s) against {args.baseline}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
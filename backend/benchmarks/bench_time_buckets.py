@@ -0,0 +1,155 @@
+"""
+Compare vectorized time bucketing (metrics_over_time) with the
+label-per-row groupby it replaced.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_time_buckets --rows 50000000 --legacy-rows 5000000
+
+The legacy path builds one Python string per row and copies the frame, so
+it is measured on ``--legacy-rows`` rows (0 to skip) and its time scaled up
+for the comparison.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+import warnings
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from analytics.semantic_utils import _compute_metrics_over_time, parse_time_epochs
+
+
+def legacy_bucket_time_column(series: pd.Series) -> Optional[pd.Series]:
+    """The original bucketing: two parses and a string label per row."""
+    if series.isna().all():
+        return None
+    dt = pd.to_datetime(series, errors="coerce", utc=True).dropna()
+    if dt.empty:
+        return None
+    span_days = (dt.max() - dt.min()).days
+    bucket = pd.to_datetime(series, errors="coerce", utc=True)
+    if span_days <= 31:
+        return bucket.dt.strftime("%Y-%m-%d")
+    if span_days <= 365:
+        return bucket.dt.to_period("W").astype(str)
+    return bucket.dt.to_period("M").astype(str)
+
+
+def legacy_metrics_over_time(
+    df: pd.DataFrame, time_col: str, metric_cols: List[str]
+) -> Dict[str, List[Dict[str, Any]]]:
+    result: Dict[str, List[Dict[str, Any]]] = {}
+    bucket_series = legacy_bucket_time_column(df[time_col])
+    if bucket_series is None:
+        return result
+    work = df.copy()
+    work["_time_bucket"] = bucket_series
+    work = work.dropna(subset=["_time_bucket"])
+    for metric in metric_cols:
+        if not is_numeric_dtype(work[metric]):
+            continue
+        grouped = (
+            work[["_time_bucket", metric]]
+            .dropna(subset=[metric])
+            .groupby("_time_bucket")[metric]
+            .agg(["mean", "count"])
+        )
+        result[metric] = [
+            {"bucket": str(idx), "mean": float(row["mean"]), "count": int(row["count"])}
+            for idx, row in grouped.iterrows()
+        ]
+    return result
+
+
+def make_time_frame(rows: int, span_days: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Synthetic events: timestamps spread over ``span_days`` (~1% missing)
+    and two float metrics with ~5% missing values.
+    """
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2020-01-01T00:00:00", "ns").astype("int64")
+    offsets = rng.integers(0, span_days * 86_400 * 10**9, size=rows, dtype="int64")
+    times = pd.Series((start + offsets).astype("datetime64[ns]"))
+    times[rng.random(rows) < 0.01] = pd.NaT
+    data: Dict[str, Any] = {"ts": times}
+    for name in ("latency", "revenue"):
+        values = rng.gamma(2.0, 50.0, size=rows)
+        values[rng.random(rows) < 0.05] = np.nan
+        data[name] = values
+    return pd.DataFrame(data)
+
+
+def _timed(fn, *args, **kwargs) -> tuple[float, Any]:
+    start = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return time.perf_counter() - start, out
+
+
+def _same(expected: Dict[str, Any], actual: Dict[str, Any]) -> bool:
+    for metric, rows in expected.items():
+        # Weekly / monthly legacy labels turned missing times into a "NaT"
+        # bucket; they are now dropped as daily buckets always did.
+        rows = [row for row in rows if row["bucket"] != "NaT"]
+        other = actual.get(metric) or []
+        if [r["bucket"] for r in rows] != [r["bucket"] for r in other]:
+            return False
+        if [r["count"] for r in rows] != [r["count"] for r in other]:
+            return False
+        if not np.allclose([r["mean"] for r in rows], [r["mean"] for r in other]):
+            return False
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50_000_000)
+    parser.add_argument("--legacy-rows", type=int, default=5_000_000)
+    parser.add_argument("--spans", type=int, nargs="+", default=[20, 200, 2000])
+    parser.add_argument("--strings", action="store_true", help="ISO text timestamps")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter("ignore")
+    metrics = ["latency", "revenue"]
+
+    print(
+        f"{'span d':>7} {'rows':>11} {'parse s':>8} {'bucket s':>9} "
+        f"{'legacy s/M':>11} {'new s/M':>8} {'speedup':>8}"
+    )
+    for span in args.spans:
+        legacy_per_m = None
+        if args.legacy_rows:
+            small = make_time_frame(args.legacy_rows, span, seed=1)
+            if args.strings:
+                small["ts"] = small["ts"].dt.strftime("%Y-%m-%d %H:%M:%S")
+            legacy, expected = _timed(legacy_metrics_over_time, small, "ts", metrics)
+            actual = _compute_metrics_over_time(small, "ts", metrics)
+            if not _same(expected, actual):
+                print(f"  warning: results differ from the legacy path (span {span})")
+            legacy_per_m = legacy / args.legacy_rows * 1e6
+            del small
+
+        df = make_time_frame(args.rows, span)
+        if args.strings:
+            df["ts"] = df["ts"].dt.strftime("%Y-%m-%d %H:%M:%S")
+        parse, epochs = _timed(parse_time_epochs, df["ts"])
+        bucket, _ = _timed(_compute_metrics_over_time, df, "ts", metrics, epochs=epochs)
+        new_per_m = (parse + bucket) / args.rows * 1e6
+        speedup = f"{legacy_per_m / new_per_m:>7.1f}x" if legacy_per_m else "-"
+        legacy_text = f"{legacy_per_m:>11.3f}" if legacy_per_m else f"{'-':>11}"
+        print(
+            f"{span:>7} {args.rows:>11} {parse:>8.2f} {bucket:>9.2f} "
+            f"{legacy_text} {new_per_m:>8.3f} {speedup:>8}"
+        )
+        del df, epochs
+
+
+if __name__ == "__main__":
+    main()
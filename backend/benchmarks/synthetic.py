@@ -0,0 +1,271 @@
+"""
+Synthetic datasets for the benchmark suite (see bench_suite.py), written
+as the columnar cache an upload of that shape would get: Parquet with
+numbers as int64 / float64 / bool and dates left as strings, as the CSV
+parse plan produces them.
+
+Every shape is generated in batches of ``batch_rows``, so tens of millions
+of rows can be written without holding them in memory, and the same
+``seed`` always gives the same file.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+BATCH_ROWS = 1_000_000
+WIDE_COLUMNS = 200
+
+_EPOCH_2022 = 1_640_995_200  # 2022-01-01T00:00:00Z
+_REGIONS = ["north", "south", "east", "west", "central"]
+_EVENTS = ["view", "click", "add_to_cart", "checkout", "refund", "signup"]
+
+# Makes one batch: (rng, first row number, rows, columns) -> table.
+BatchMaker = Callable[[np.random.Generator, int, int, int], pa.Table]
+
+
+class Shape(NamedTuple):
+    description: str
+    make_batch: BatchMaker
+    # The semantic_config the aggregates are benchmarked with.
+    semantic_config: Dict[str, Any]
+
+
+def _pick(
+    rng: np.random.Generator,
+    values: List[str],
+    rows: int,
+    missing: float = 0.0,
+) -> pa.Array:
+    picked = pa.array(values, pa.string()).take(
+        pa.array(rng.integers(0, len(values), size=rows))
+    )
+    return _with_missing(rng, picked, missing)
+
+
+def _with_missing(
+    rng: np.random.Generator, array: pa.Array, missing: float
+) -> pa.Array:
+    if not missing:
+        return array
+    mask = pa.array(rng.random(len(array)) < missing)
+    return pc.if_else(mask, pa.scalar(None, array.type), array)
+
+
+def _numbered(prefix: str, numbers: np.ndarray) -> pa.Array:
+    return pc.binary_join_element_wise(
+        prefix, pa.array(numbers, pa.int64()).cast(pa.string()), ""
+    )
+
+
+def _floats(rng: np.random.Generator, values: np.ndarray, missing: float) -> pa.Array:
+    values = values.astype("float64")
+    values[rng.random(values.size) < missing] = np.nan
+    return pa.array(values, from_pandas=True)
+
+
+@lru_cache(maxsize=None)
+def _formatted(fmt: str, start: int, count: int, step: int) -> pa.Array:
+    # Each distinct day (or second of the day) is formatted once and rows
+    # take from it, which is far cheaper than formatting every row.
+    seconds = start + np.arange(count, dtype="int64") * step
+    return pc.strftime(pa.array(seconds, pa.timestamp("s")), format=fmt)
+
+
+def _timestamps(
+    rng: np.random.Generator, rows: int, span_days: int, fmt: str
+) -> pa.Array:
+    """Text dates in ``fmt`` from 2022-01-01 on; a " " starts the time part."""
+    date_fmt, _, time_fmt = fmt.partition(" ")
+    days = _formatted(date_fmt, _EPOCH_2022, span_days, 86_400).take(
+        pa.array(rng.integers(0, span_days, size=rows))
+    )
+    if not time_fmt:
+        return days
+    clock = _formatted(time_fmt, 0, 86_400, 1).take(
+        pa.array(rng.integers(0, 86_400, size=rows))
+    )
+    return pc.binary_join_element_wise(days, clock, " ")
+
+
+def narrow_tall(rng: np.random.Generator, start: int, rows: int, _: int) -> pa.Table:
+    return pa.table(
+        {
+            "id": np.arange(start, start + rows),
+            "region": _pick(rng, _REGIONS, rows, missing=0.02),
+            "quantity": rng.integers(1, 50, size=rows),
+            "price": rng.integers(100, 100_000, size=rows) / 100.0,
+            "day": _timestamps(rng, rows, 730, "%Y-%m-%d"),
+            "returned": rng.random(rows) < 0.05,
+        }
+    )
+
+
+def wide(rng: np.random.Generator, start: int, rows: int, columns: int) -> pa.Table:
+    # 75% float measurements, 15% small integers, 10% low-cardinality labels.
+    data: Dict[str, Any] = {"day": _timestamps(rng, rows, 365, "%Y-%m-%d")}
+    labels = [f"level_{i}" for i in range(12)]
+    for i in range(columns - 1):
+        if i % 10 == 9:
+            data[f"s{i}"] = _pick(rng, labels, rows, missing=0.01)
+        elif i % 10 >= 7:
+            data[f"c{i}"] = rng.integers(0, 1_000, size=rows)
+        else:
+            data[f"m{i}"] = _floats(rng, rng.normal(i, 1 + i % 7, size=rows), 0.03)
+    return pa.table(data)
+
+
+def high_cardinality(
+    rng: np.random.Generator, start: int, rows: int, _: int
+) -> pa.Table:
+    return pa.table(
+        {
+            "session": _numbered("sess-", np.arange(start, start + rows)),
+            "user": _numbered("user-", rng.integers(0, 10_000_000, size=rows)),
+            "city": _numbered("city-", rng.zipf(1.3, size=rows) % 50_000),
+            "url": _numbered("/p/", rng.integers(0, 2_000_000, size=rows)),
+            "amount": _floats(rng, rng.lognormal(3.0, 1.0, size=rows), 0.02),
+            "day": _timestamps(rng, rows, 365, "%Y-%m-%d"),
+        }
+    )
+
+
+def datetime_heavy(rng: np.random.Generator, start: int, rows: int, _: int) -> pa.Table:
+    return pa.table(
+        {
+            "ts": _timestamps(rng, rows, 3 * 365, "%Y-%m-%d %H:%M:%S"),
+            "day": _timestamps(rng, rows, 3 * 365, "%Y-%m-%d"),
+            "us_date": _timestamps(rng, rows, 3 * 365, "%m/%d/%Y"),
+            "month": _timestamps(rng, rows, 3 * 365, "%Y-%m"),
+            "epoch": _EPOCH_2022 + rng.integers(0, 3 * 365 * 86_400, size=rows),
+            "event": _pick(rng, _EVENTS, rows),
+            "duration_s": _floats(rng, rng.gamma(2.0, 30.0, size=rows), 0.05),
+            "value": _floats(rng, rng.normal(100.0, 25.0, size=rows), 0.05),
+        }
+    )
+
+
+def dirty(rng: np.random.Generator, start: int, rows: int, _: int) -> pa.Table:
+    """
+    What real uploads look like: numbers as text with junk tokens and
+    thousands separators, mixed boolean spellings, inconsistently cased
+    labels, several date formats, outliers, and empty / constant columns.
+    """
+    amounts = pa.array(rng.integers(0, 50_000, size=rows) / 10.0).cast(pa.string())
+    junk = _pick(rng, ["N/A", "", "-", "?", "1,234.5", " 42 ", "null"], rows)
+    is_junk = pa.array(rng.random(rows) < 0.1)
+
+    score = rng.normal(50.0, 10.0, size=rows)
+    score[rng.random(rows) < 0.001] = 1e12
+    days = _timestamps(rng, rows, 730, "%Y-%m-%d")
+    other_days = _timestamps(rng, rows, 730, "%d.%m.%Y")
+    return pa.table(
+        {
+            "amount_text": pc.if_else(is_junk, junk, amounts),
+            "flag": _pick(rng, ["yes", "no", "Y", "N", "true", "False"], rows, 0.05),
+            "category": _pick(
+                rng, ["North", " north", "NORTH", "South", "south ", "East"], rows, 0.1
+            ),
+            "mixed": pc.if_else(
+                pa.array(rng.random(rows) < 0.97),
+                pa.array(rng.integers(0, 1_000, size=rows)).cast(pa.string()),
+                _pick(rng, ["unknown", "see notes", "#REF!"], rows),
+            ),
+            "date_mixed": _with_missing(
+                rng,
+                pc.if_else(pa.array(rng.random(rows) < 0.8), days, other_days),
+                0.05,
+            ),
+            "score": _floats(rng, score, 0.2),
+            "empty": pa.nulls(rows, pa.float64()),
+            "constant": np.full(rows, 1, dtype="int64"),
+        }
+    )
+
+
+SHAPES: Dict[str, Shape] = {
+    "narrow_tall": Shape(
+        "6 columns: ids, prices, labels, dates, flags",
+        narrow_tall,
+        {
+            "target_column": "region",
+            "time_column": "day",
+            "metric_columns": ["price", "quantity"],
+        },
+    ),
+    "wide": Shape(
+        f"{WIDE_COLUMNS} columns, mostly floats",
+        wide,
+        {
+            "target_column": "s9",
+            "time_column": "day",
+            "metric_columns": ["m0", "m1", "m2", "c7", "c8"],
+        },
+    ),
+    "high_cardinality": Shape(
+        "unique ids, ~millions of users and urls, zipf-distributed cities",
+        high_cardinality,
+        {
+            "target_column": "city",
+            "time_column": "day",
+            "metric_columns": ["amount"],
+        },
+    ),
+    "datetime_heavy": Shape(
+        "timestamps, dates and months in four text formats plus epochs",
+        datetime_heavy,
+        {
+            "target_column": "event",
+            "time_column": "ts",
+            "metric_columns": ["duration_s", "value"],
+        },
+    ),
+    "dirty": Shape(
+        "numbers as text with junk, mixed spellings, mixed date formats",
+        dirty,
+        {
+            "target_column": "category",
+            "time_column": "date_mixed",
+            "metric_columns": ["score", "amount_text", "mixed"],
+        },
+    ),
+}
+
+
+def column_count(shape: str, columns: Optional[int] = None) -> int:
+    if shape == "wide":
+        return columns or WIDE_COLUMNS
+    return SHAPES[shape].make_batch(np.random.default_rng(0), 0, 1, 0).num_columns
+
+
+def write_dataset(
+    path: str,
+    shape: str,
+    rows: int,
+    seed: int = 0,
+    columns: Optional[int] = None,
+    batch_rows: int = BATCH_ROWS,
+) -> None:
+    """
+    Write ``rows`` rows of ``shape`` to a Parquet file at ``path``.
+    ``columns`` only applies to the wide shape.
+    """
+    rng = np.random.default_rng(seed)
+    make_batch = SHAPES[shape].make_batch
+    width = columns or WIDE_COLUMNS
+    writer = None
+    try:
+        for start in range(0, max(rows, 1), batch_rows):
+            table = make_batch(rng, start, min(batch_rows, rows - start), width)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -82,6 +83,112 @@ CELERY_RESULT_BACKEND = "redis://localhost:6379/1"
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
+# Analysis work is split over three queues (analytics.scheduling), each
+# served by its own worker so a multi-GB upload never delays small ones:
+#   celery -A core worker -Q analysis_small -c 4
+#   celery -A core worker -Q analysis_large -c 1
+#   celery -A core worker -Q analysis_recompute,celery -c 2
+# Uploads are routed by estimated cost when they are enqueued; re-runs over
+# an existing analysis always go to analysis_recompute.
+CELERY_TASK_ROUTES = {
+    "analytics.tasks.append_batch_task": {"queue": "analysis_recompute"},
+    "analytics.tasks.compute_semantic_aggregates_task": {
+        "queue": "analysis_recompute"
+    },
+}
+# Workers reserve one message at a time, so a worker busy with a long job
+# does not hold back messages that an idle worker could start.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# Uploads are streamed to a temporary file and hashed as they arrive, so
+# re-uploads of identical files can be detected (analytics.uploads).
+FILE_UPLOAD_HANDLERS = ["analytics.uploads.HashingFileUploadHandler"]
+
+# Chunked uploads (/api/uploads/): parts are stored under UPLOAD_SESSION_DIR
+# in media storage until the upload completes. Clients are told to send
+# UPLOAD_PART_SIZE_BYTES per part; larger parts than UPLOAD_MAX_PART_BYTES
+# are rejected. A session left ASSEMBLING for UPLOAD_ASSEMBLY_TIMEOUT_SECONDS
+# (its worker died while joining the parts) can be completed again.
+UPLOAD_SESSION_DIR = "uploads"
+UPLOAD_PART_SIZE_BYTES = 8 * 1024 * 1024
+UPLOAD_MAX_PART_BYTES = 64 * 1024 * 1024
+UPLOAD_ASSEMBLY_TIMEOUT_SECONDS = 60 * 60
+
+# Analysis engine: files larger than this are profiled in chunks of
+# ANALYSIS_CHUNK_ROWS rows instead of being loaded into a single DataFrame.
+ANALYSIS_STREAMING_THRESHOLD_BYTES = 256 * 1024 * 1024
+ANALYSIS_CHUNK_ROWS = 100_000
+# Above this, AUTO switches to single-pass sketches (approximate quantiles,
+# distinct counts and top values, each reported with its error bound).
+ANALYSIS_APPROXIMATE_THRESHOLD_BYTES = 4 * 1024 * 1024 * 1024
+
+# Datasets with at least ANALYSIS_PARALLEL_MIN_COLUMNS columns are split into
+# column shards profiled by parallel Celery subtasks, one shard per
+# ANALYSIS_PARALLEL_COLUMNS_PER_SHARD columns up to ANALYSIS_PARALLEL_MAX_SHARDS
+# (size this to the worker pool's total concurrency).
+ANALYSIS_PARALLEL_MIN_COLUMNS = 200
+ANALYSIS_PARALLEL_COLUMNS_PER_SHARD = 50
+ANALYSIS_PARALLEL_MAX_SHARDS = 32
+
+# Upload cost = decoded bytes + ANALYSIS_COST_BYTES_PER_COLUMN per column;
+# jobs up to ANALYSIS_SMALL_JOB_MAX_COST go to the analysis_small queue.
+ANALYSIS_COST_BYTES_PER_COLUMN = 256 * 1024
+ANALYSIS_SMALL_JOB_MAX_COST = 64 * 1024 * 1024
+# Analyses one owner may have running per queue; further runs are put back
+# on the queue for ANALYSIS_DEFER_SECONDS so other owners' jobs go first,
+# and fail once deferred for ANALYSIS_MAX_DEFER_SECONDS in total.
+# Running analyses touch their row at most every ANALYSIS_HEARTBEAT_SECONDS
+# as they make progress; one not updated for ANALYSIS_SLOT_STALE_SECONDS
+# (its worker died) stops counting.
+ANALYSIS_OWNER_CONCURRENCY = {"analysis_small": 4, "analysis_large": 1}
+ANALYSIS_DEFER_SECONDS = 5
+ANALYSIS_MAX_DEFER_SECONDS = 2 * 60 * 60
+ANALYSIS_HEARTBEAT_SECONDS = 60
+ANALYSIS_SLOT_STALE_SECONDS = 60 * 60
+
+# Analysis progress events (GET /api/datasets/<id>/progress/) go through
+# Redis pub/sub; the latest state is kept for ANALYSIS_PROGRESS_TTL_SECONDS
+# so late subscribers can catch up.
+ANALYSIS_PROGRESS_REDIS_URL = "redis://localhost:6379/2"
+ANALYSIS_PROGRESS_TTL_SECONDS = 60 * 60
+ANALYSIS_PROGRESS_KEEPALIVE_SECONDS = 15
+
+# Time columns parsed for semantic aggregates are kept per worker process,
+# up to SEMANTIC_TIME_CACHE_BYTES in total (8 bytes per row); columns above
+# SEMANTIC_TIME_CACHE_MAX_ENTRY_BYTES are not kept.
+SEMANTIC_TIME_CACHE_BYTES = 512 * 1024 * 1024
+SEMANTIC_TIME_CACHE_MAX_ENTRY_BYTES = 128 * 1024 * 1024
+
+# Per-column timings stored in AnalysisResult.diagnostics are limited to
+# the ANALYSIS_DIAGNOSTICS_MAX_COLUMNS slowest columns.
+ANALYSIS_DIAGNOSTICS_MAX_COLUMNS = 500
+# GET /api/metrics/ (Prometheus text format) needs
+# "Authorization: Bearer <METRICS_TOKEN>", read from the environment.
+# Without a token it answers 404, unless METRICS_PUBLIC serves it to anyone.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+METRICS_PUBLIC = False
+
+# Shared cache (boolean label lookups, dataset responses, ...).
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://localhost:6379/3",
+        "OPTIONS": {"socket_timeout": 1, "socket_connect_timeout": 1},
+    }
+}
+# Rendered dataset detail / summary responses stay cached for at most
+# DATASET_RESPONSE_CACHE_TTL_SECONDS; writes invalidate them sooner (see
+# analytics/response_cache.py).
+DATASET_RESPONSE_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# Antonyms for boolean target labels come from a table shipped with the
+# app, generated from WordNet 3.0 with `python manage.py build_antonym_table`
+# (needs NLTK), so requests never load the corpus. Words missing from it are
+# looked up by a background task into the shared cache; lookups are also
+# memoized per process.
+ANTONYM_TABLE_PATH = BASE_DIR / "analytics" / "data" / "antonyms.json"
+ANTONYM_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+ANTONYM_LRU_SIZE = 4096
 
 TEMPLATES = [
     {
@@ -12,10 +12,22 @@ import {
   CardContent,
 } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
-import type { Dataset } from "@/types/dataset";
+import type { CursorPage, Dataset } from "@/types/dataset";
 import { DeleteDatasetButton } from "@/components/datasets/DeleteDatasetButton";
 import { DatasetTable } from "@/components/datasets/DatasetTable";
 
+async function fetchDatasetCards(): Promise<Dataset[]> {
+  const datasets: Dataset[] = [];
+  let path: string | null = "/datasets/?view=card&page_size=200";
+  while (path) {
+    const page = (await apiFetch(path)) as CursorPage<Dataset>;
+    datasets.push(...page.results);
+    // `next` is absolute; keep only its query (the cursor).
+    path = page.next ? `/datasets/${new URL(page.next).search}` : null;
+  }
+  return datasets;
+}
+
 export default function DashboardPage() {
   const router = useRouter();
 
@@ -28,7 +40,7 @@ export default function DashboardPage() {
   useEffect(() => {
     async function load(): Promise<void> {
       try {
-        const data = (await apiFetch("/datasets/")) as Dataset[];
+        const data = await fetchDatasetCards();
         setDatasets(data);
       } finally {
         setLoadingDatasets(false);
@@ -51,7 +63,7 @@ export default function DashboardPage() {
 
     const interval = setInterval(async () => {
       try {
-        const updated = (await apiFetch("/datasets/")) as Dataset[];
+        const updated = await fetchDatasetCards();
         setDatasets(updated);
       } catch {
         // ignore polling errors
@@ -20,7 +20,7 @@ interface QualityRow {
 interface QualityRowsResponse {
   columns: string[];
   rows: QualityRow[];
-  total_rows_with_missing: number;
+  total_rows: number;
 }
 
 interface DataQualitySheetProps {
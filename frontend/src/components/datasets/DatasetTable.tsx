@@ -78,19 +78,23 @@ export function DatasetTable(props: DatasetTableProps) {
       datasets.map((ds) => {
         const analysis = ds.analysis;
         const summary = analysis?.summary_json as SummaryJson | undefined;
+        const card = analysis?.card ?? null;
 
         const columns = summary?.columns ?? {};
         const columnEntries = Object.entries(columns);
 
-        const totalColumns = summary?.column_count ?? columnEntries.length;
+        const totalColumns =
+          card?.column_count ?? summary?.column_count ?? columnEntries.length;
 
         const missingValues = summary?.missing_values ?? {};
-        const totalMissing = Object.values(missingValues).reduce(
-          (acc, value) => acc + (typeof value === "number" ? value : 0),
-          0,
-        );
-
-        const rowCount = summary?.row_count ?? 0;
+        const totalMissing =
+          card?.missing_cells ??
+          Object.values(missingValues).reduce(
+            (acc, value) => acc + (typeof value === "number" ? value : 0),
+            0,
+          );
+
+        const rowCount = card?.row_count ?? summary?.row_count ?? 0;
         const cellCount =
           rowCount > 0 && totalColumns > 0 ? rowCount * totalColumns : 0;
         const missingPercent =
@@ -98,9 +102,13 @@ export function DatasetTable(props: DatasetTableProps) {
 
         let dataQualityScore: number | undefined;
         if (totalColumns > 0) {
-          const knownTypeCount = columnEntries.filter(
-            ([, col]) => col.type && col.type !== "unknown",
-          ).length;
+          const knownTypeCount = card
+            ? Object.entries(card.type_counts)
+                .filter(([type]) => type !== "unknown")
+                .reduce((acc, [, count]) => acc + count, 0)
+            : columnEntries.filter(
+                ([, col]) => col.type && col.type !== "unknown",
+              ).length;
           const typeCoverage = knownTypeCount / totalColumns;
 
           const missingQuality =
@@ -113,7 +121,7 @@ export function DatasetTable(props: DatasetTableProps) {
           dataQualityScore = Math.round(score);
         }
 
-        const semantic = summary?.semantic_config ?? null;
+        const semantic = card?.semantic ?? summary?.semantic_config ?? null;
         const targetName = semantic?.target_column ?? "";
         const timeName = semantic?.time_column ?? "";
         const metrics = Array.isArray(semantic?.metric_columns)
@@ -2,6 +2,8 @@
 
 import { JSX, useRef, useState, type ChangeEvent, type FormEvent } from "react";
 import { API_BASE_URL, apiFetch, getAccessToken } from "@/lib/api";
+import { streamAnalysisProgress } from "@/lib/progress";
+import { CHUNKED_UPLOAD_THRESHOLD_BYTES, uploadInParts } from "@/lib/uploads";
 import type { Dataset } from "@/types/dataset";
 import type { SummaryJson } from "@/types/analysis";
 import type { DatasetWizardState } from "@/types/datasetWizard";
@@ -10,6 +12,9 @@ import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
 import { Progress } from "@/components/ui/progress";
 
+// Stripped from the file name to suggest a dataset name.
+const DATASET_FILE_EXTENSION = /\.(csv|jsonl|ndjson|parquet)(\.(gz|zst))?$/i;
+
 interface DatasetWizardStepUploadProps {
   state: DatasetWizardState;
   onStateChange: (next: DatasetWizardState) => void;
@@ -36,9 +41,7 @@ export function DatasetWizardStepUpload(
     setLocalFile(file);
 
     if (file) {
-      const baseName = file.name.toLowerCase().endsWith(".csv")
-        ? file.name.slice(0, -4)
-        : file.name;
+      const baseName = file.name.replace(DATASET_FILE_EXTENSION, "");
       setLocalName(baseName);
       onStateChange({
         ...state,
@@ -81,6 +84,28 @@ export function DatasetWizardStepUpload(
     return null;
   }
 
+  async function waitForSummary(
+    datasetId: number,
+  ): Promise<SummaryJson | null> {
+    // Progress is pushed over SSE; the bar moves from 40% to 95% as columns
+    // finish, and the dataset is fetched once at the end.
+    let final;
+    try {
+      final = await streamAnalysisProgress(datasetId, (event) => {
+        if (event.type === "column" && event.total) {
+          setProgress(40 + Math.round((event.done / event.total) * 55));
+        }
+      });
+    } catch (err) {
+      console.error("Progress stream failed, polling instead:", err);
+      return pollForSummary(datasetId);
+    }
+    if (final.status !== "COMPLETED") return null;
+
+    const ds = (await apiFetch(`/datasets/${datasetId}/`)) as Dataset;
+    return (ds.analysis?.summary_json as SummaryJson | undefined) ?? null;
+  }
+
   async function handleUpload(e: FormEvent<HTMLFormElement>) {
     e.preventDefault();
 
@@ -110,34 +135,43 @@ export function DatasetWizardStepUpload(
     });
 
     try {
-      const formData = new FormData();
-      formData.append("file", localFile);
-      if (localName) {
-        formData.append("name", localName);
-      }
+      let newDataset: Dataset;
 
-      const res = await fetch(`${API_BASE_URL}/datasets/upload/`, {
-        method: "POST",
-        headers: {
-          Authorization: `Bearer ${token}`,
-        },
-        body: formData,
-      });
+      if (localFile.size > CHUNKED_UPLOAD_THRESHOLD_BYTES) {
+        // Large files are sent in resumable parts; the bar covers 10-40%.
+        newDataset = await uploadInParts(localFile, localName, (fraction) =>
+          setProgress(10 + Math.round(fraction * 30)),
+        );
+      } else {
+        const formData = new FormData();
+        formData.append("file", localFile);
+        if (localName) {
+          formData.append("name", localName);
+        }
 
-      if (!res.ok) {
-        const text = await res.text();
-        console.error("Upload error:", text);
-        onStateChange({
-          ...state,
-          uploadStatus: "error",
-          uploadError: "Upload failed. Please check your CSV and try again.",
+        const res = await fetch(`${API_BASE_URL}/datasets/upload/`, {
+          method: "POST",
+          headers: {
+            Authorization: `Bearer ${token}`,
+          },
+          body: formData,
         });
-        setProgress(0);
-        setSubmitting(false);
-        return;
-      }
 
-      const newDataset = (await res.json()) as Dataset;
+        if (!res.ok) {
+          const text = await res.text();
+          console.error("Upload error:", text);
+          onStateChange({
+            ...state,
+            uploadStatus: "error",
+            uploadError: "Upload failed. Please check your CSV and try again.",
+          });
+          setProgress(0);
+          setSubmitting(false);
+          return;
+        }
+
+        newDataset = (await res.json()) as Dataset;
+      }
 
       setProgress(40);
       onStateChange({
@@ -148,7 +182,7 @@ export function DatasetWizardStepUpload(
         uploadError: null,
       });
 
-      const summary = await pollForSummary(newDataset.id);
+      const summary = await waitForSummary(newDataset.id);
 
       if (summary) {
         setProgress(100);
@@ -193,7 +227,8 @@ export function DatasetWizardStepUpload(
           Upload your dataset
         </h1>
         <p className="text-xs text-muted-foreground">
-          Upload a CSV file. We&apos;ll analyse it and show you a preview of the
+          Upload a CSV, NDJSON or Parquet file (CSV and NDJSON may be gzip or
+          zstd compressed). We&apos;ll analyse it and show you a preview of the
           columns and basic stats in the next steps.
         </p>
       </header>
@@ -206,7 +241,7 @@ export function DatasetWizardStepUpload(
               ref={fileInputRef}
               id="dataset-file"
               type="file"
-              accept=".csv,text/csv"
+              accept=".csv,.csv.gz,.csv.zst,.jsonl,.ndjson,.jsonl.gz,.jsonl.zst,.ndjson.gz,.ndjson.zst,.parquet,text/csv"
               onChange={handleFileChange}
               className="hidden"
             />
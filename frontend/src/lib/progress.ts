@@ -0,0 +1,75 @@
+import { API_BASE_URL, getAccessToken } from "@/lib/api";
+import type { AnalysisStatus, ColumnSummary } from "@/types/analysis";
+
+export type AnalysisProgressEvent =
+  | {
+      type: "stage";
+      stage: string;
+      mode?: string;
+      total_columns?: number;
+    }
+  | {
+      type: "column";
+      column: string;
+      done: number;
+      total: number | null;
+      summary: ColumnSummary;
+    }
+  | { type: "chunk"; pass: number; rows: number }
+  | { type: "status"; status: AnalysisStatus; error?: string };
+
+/**
+ * Follow `/datasets/<id>/progress/` (Server-Sent Events) until the analysis
+ * completes or fails. Uses fetch rather than EventSource so the JWT can go
+ * in the Authorization header. Resolves with the final status event.
+ */
+export async function streamAnalysisProgress(
+  datasetId: number,
+  onEvent: (event: AnalysisProgressEvent) => void,
+  signal?: AbortSignal,
+): Promise<Extract<AnalysisProgressEvent, { type: "status" }>> {
+  const token = getAccessToken();
+  const res = await fetch(`${API_BASE_URL}/datasets/${datasetId}/progress/`, {
+    headers: {
+      Accept: "text/event-stream",
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    },
+    signal,
+  });
+
+  if (!res.ok || !res.body) {
+    throw new Error(`Progress stream failed with ${res.status}`);
+  }
+
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf("\n\n");
+
+      const data = block
+        .split("\n")
+        .filter((line) => line.startsWith("data: "))
+        .map((line) => line.slice(6))
+        .join("\n");
+      if (!data) continue; // comment / keepalive
+
+      const event = JSON.parse(data) as AnalysisProgressEvent;
+      onEvent(event);
+      if (event.type === "status") {
+        await reader.cancel();
+        return event;
+      }
+    }
+  }
+
+  throw new Error("Progress stream ended before the analysis finished");
+}
@@ -0,0 +1,91 @@
+import { API_BASE_URL, apiFetch, getAccessToken } from "@/lib/api";
+import type { Dataset } from "@/types/dataset";
+
+// Files above this size go through the resumable /uploads/ API instead of a
+// single multipart POST.
+export const CHUNKED_UPLOAD_THRESHOLD_BYTES = 32 * 1024 * 1024;
+
+const PART_ATTEMPTS = 3;
+
+interface UploadSession {
+  id: string;
+  status: "OPEN" | "ASSEMBLING" | "COMPLETED" | "ABORTED";
+  part_size: number;
+  parts: { number: number; size: number }[];
+}
+
+async function putPart(
+  uploadId: string,
+  number: number,
+  body: Blob,
+): Promise<void> {
+  for (let attempt = 1; ; attempt += 1) {
+    let res: Response | null = null;
+    try {
+      const token = getAccessToken();
+      res = await fetch(
+        `${API_BASE_URL}/uploads/${uploadId}/parts/${number}/`,
+        {
+          method: "PUT",
+          headers: {
+            "Content-Type": "application/octet-stream",
+            ...(token ? { Authorization: `Bearer ${token}` } : {}),
+          },
+          body,
+        },
+      );
+    } catch (err) {
+      // Network error: retry.
+      if (attempt >= PART_ATTEMPTS) throw err;
+    }
+    if (res?.ok) return;
+    // Client errors will not go away by retrying.
+    if (res && (res.status < 500 || attempt >= PART_ATTEMPTS)) {
+      throw new Error(`Part ${number} failed with ${res.status}`);
+    }
+    await new Promise((resolve) => setTimeout(resolve, 1000 * attempt));
+  }
+}
+
+/**
+ * Upload a file in parts (initiate, PUT each part, complete). Parts the
+ * server already has are skipped, so calling this again with the same
+ * `uploadId` resumes an interrupted upload. `onProgress` gets 0..1.
+ */
+export async function uploadInParts(
+  file: File,
+  name: string | null,
+  onProgress?: (fraction: number) => void,
+  uploadId?: string,
+): Promise<Dataset> {
+  const session = uploadId
+    ? await apiFetch<UploadSession>(`/uploads/${uploadId}/`)
+    : await apiFetch<UploadSession>("/uploads/", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+          filename: file.name,
+          name: name || null,
+          size: file.size,
+        }),
+      });
+
+  const partSize = session.part_size;
+  const partCount = Math.max(1, Math.ceil(file.size / partSize));
+  const received = new Set(session.parts.map((part) => part.number));
+
+  let done = received.size;
+  for (let number = 1; number <= partCount; number += 1) {
+    if (received.has(number)) continue;
+    const start = (number - 1) * partSize;
+    await putPart(session.id, number, file.slice(start, start + partSize));
+    done += 1;
+    onProgress?.(done / partCount);
+  }
+
+  return apiFetch<Dataset>(`/uploads/${session.id}/complete/`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ parts: partCount }),
+  });
+}
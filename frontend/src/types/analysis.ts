@@ -10,6 +10,12 @@ export interface ValueCount {
   count: number;
 }
 
+export interface TypeInference {
+  confidence: number;
+  sample_size: number;
+  method: "dtype" | "sample" | "full";
+}
+
 export interface ColumnSummary {
   type?:
     | "numeric"
@@ -20,6 +26,7 @@ export interface ColumnSummary {
     | "unknown"
     | "ignored"
     | string;
+  type_inference?: TypeInference;
   describe?: Record<string, unknown>;
   histogram?: HistogramBin[];
   value_counts?: ValueCount[];
@@ -58,38 +65,77 @@ export interface SemanticConfig {
   primary_entity_key?: string | null;
 }
 
-// export interface TargetDistributionRow {
-//   target: string;
-//   count: number;
-//   pct: number;
-// }
-
-// export interface MetricByTargetRow {
-//   target: string;
-//   mean: number | null;
-//   median?: number | null;
-//   count: number;
-// }
-
-// export interface MetricOverTimeRow {
-//   bucket: string;
-//   mean: number | null;
-//   count: number;
-// }
-
-// export interface SemanticAggregates {
-//   target_distribution?: TargetDistributionRow[];
-//   metrics_by_target?: Record<string, MetricByTargetRow[]>;
-//   metrics_over_time?: Record<string, MetricOverTimeRow[]>;
-// }
+export interface TargetDistributionRow {
+  target: string;
+  count: number;
+  pct: number;
+}
+
+export interface MetricByTargetRow {
+  target: string;
+  mean: number | null;
+  median?: number | null;
+  count: number;
+  std?: number | null;
+  min?: number | null;
+  max?: number | null;
+  p25?: number | null;
+  p75?: number | null;
+  // Set once appended rows were merged in: median and quartiles are then
+  // count-weighted estimates rather than exact values.
+  quantiles_approximate?: boolean;
+}
+
+export interface MetricOverTimeRow {
+  bucket: string;
+  mean: number | null;
+  count: number;
+  std?: number | null;
+  min?: number | null;
+  max?: number | null;
+}
+
+export interface SemanticAggregates {
+  target_distribution?: TargetDistributionRow[];
+  metrics_by_target?: Record<string, MetricByTargetRow[]>;
+  metrics_over_time?: Record<string, MetricOverTimeRow[]>;
+  // Parts still being computed, e.g. "metrics_by_target.revenue".
+  pending?: string[];
+}
 
 export interface SummaryJson {
   row_count?: number;
   column_count?: number;
   columns?: Record<string, ColumnSummary>;
   missing_values?: Record<string, number>;
+  // Non-zero counts per column of each data-quality issue kind.
+  quality_issues?: Record<
+    string,
+    Partial<Record<"missing" | "coercion" | "outlier", number>>
+  >;
   semantic_config?: SemanticConfig | null;
-  // semantic_aggregates?: SemanticAggregates | null;
+  semantic_aggregates?: SemanticAggregates | null;
   // Optional: space for precomputed insight blocks
   semantic_insights?: unknown;
 }
+
+export interface AnalysisCard {
+  row_count: number;
+  column_count: number;
+  type_counts: Record<string, number>;
+  missing_cells: number;
+  semantic: Pick<
+    SemanticConfig,
+    "target_column" | "time_column" | "metric_columns"
+  >;
+}
+
+export interface AnalysisResult {
+  status: AnalysisStatus;
+  summary_json?: SummaryJson | null;
+  // Present in the card list view (/datasets/?view=card) instead of
+  // summary_json.
+  card?: AnalysisCard | null;
+  created_at: string;
+  error_message: string | null;
+}
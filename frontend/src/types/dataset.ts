@@ -7,3 +7,9 @@ export interface Dataset {
   uploaded_at: string;
   analysis?: AnalysisResult | null;
 }
+
+export interface CursorPage<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}